@@ -0,0 +1,73 @@
+"""
+Compares the throughput of a `DistPacketGenerator` whose inter-arrival times and packet sizes
+are drawn one Python call at a time (`functools.partial` of `random.expovariate`) against one
+using the block-sampled distribution objects in `ns.utils.distributions`, as well as the cost
+of drawing a single sample from each distribution.
+
+Usage: python benchmarks/dist_generator.py [number of packets]
+"""
+import random
+import sys
+import time
+import timeit
+from functools import partial
+
+import simpy
+
+from ns.packet.dist_generator import DistPacketGenerator
+from ns.utils.distributions import (Constant, EmpiricalCDF, Exponential,
+                                    LogNormal, Pareto)
+
+
+class NullSink:
+    """A sink that only counts packets, so that the generator dominates the cost."""
+
+    def __init__(self):
+        self.packets_received = 0
+
+    def put(self, packet):
+        self.packets_received += 1
+
+
+def packets_per_second(arrival_dist, size_dist, n) -> float:
+    """Returns the number of packets generated per second of wall-clock time."""
+    env = simpy.Environment()
+    pg = DistPacketGenerator(env, "pg", arrival_dist, size_dist, flow_id=0)
+    pg.out = NullSink()
+
+    start = time.perf_counter()
+    # the mean inter-arrival time is 1
+    env.run(until=n)
+    elapsed = time.perf_counter() - start
+
+    return pg.packets_sent / elapsed
+
+
+def per_sample(dist, n) -> float:
+    """Returns the time taken by each sample, in nanoseconds."""
+    return min(timeit.repeat(dist, number=n, repeat=3)) / n * 1e9
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    print("Cost per sample:")
+    print(f"  random.expovariate:  {per_sample(partial(random.expovariate, 1.0), n):6.1f} ns")
+    print(f"  Exponential:         {per_sample(Exponential(1.0, generator=1), n):6.1f} ns")
+    print(f"  Constant:            {per_sample(Constant(1000), n):6.1f} ns")
+    print(f"  Pareto:              {per_sample(Pareto(1.5, 100, generator=1), n):6.1f} ns")
+    print(f"  LogNormal:           {per_sample(LogNormal(6.0, 1.0, generator=1), n):6.1f} ns")
+    print(f"  EmpiricalCDF:        "
+          f"{per_sample(EmpiricalCDF([64, 576, 1500], [0.5, 0.6, 1.0], generator=1), n):6.1f} ns")
+
+    per_call = packets_per_second(partial(random.expovariate, 1.0),
+                                  partial(random.expovariate, 0.001), n)
+    block = packets_per_second(Exponential(1.0, generator=1), Exponential(0.001, generator=2), n)
+
+    print("DistPacketGenerator throughput:")
+    print(f"  random.expovariate:  {per_call:10.0f} packets/s")
+    print(f"  Exponential:         {block:10.0f} packets/s ({block / per_call:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Measures the cost of scheduling each packet in a `DRRServer` as the number of configured
+classes grows from 10 to 10,000, while the number of active (backlogged) classes stays
+the same. With an active list of backlogged queues, the cost per packet should remain flat.
+
+Usage: python benchmarks/drr.py [simulation time]
+"""
+import sys
+import time
+
+import simpy
+
+from ns.packet.dist_generator import DistPacketGenerator
+from ns.packet.sink import PacketSink
+from ns.scheduler.drr import DRRServer
+
+ACTIVE_FLOWS = 10
+
+
+def simulate(n_classes, until):
+    """Runs a DRR server with `n_classes` configured classes, of which only the first
+    ACTIVE_FLOWS are sending packets, and returns the time spent per packet."""
+    env = simpy.Environment()
+
+    sink = PacketSink(env, rec_arrivals=False, rec_waits=False)
+    weights = {class_id: 1 + class_id % 4 for class_id in range(n_classes)}
+    server = DRRServer(env, rate=8e6, weights=weights)
+    server.out = sink
+
+    for flow_id in range(ACTIVE_FLOWS):
+        generator = DistPacketGenerator(
+            env, f"flow_{flow_id}", lambda: 0.001, lambda: 1000, flow_id=flow_id
+        )
+        generator.out = server
+
+    start = time.perf_counter()
+    env.run(until=until)
+    elapsed = time.perf_counter() - start
+
+    packets = sum(sink.packets_received.values())
+    return packets, elapsed / packets
+
+
+sim_time = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+for n_classes in (10, 100, 1000, 10000):
+    packets, per_packet = simulate(n_classes, sim_time)
+    print(
+        f"{n_classes:>6} classes: {packets} packets sent, "
+        f"{per_packet * 1e6:.2f} microseconds/packet"
+    )
@@ -0,0 +1,72 @@
+"""
+Checks that a `FastPort` delivers the same packets at the same times as a `Port`, and
+compares the number of simpy events scheduled and the wall-clock time of both.
+
+Usage: python benchmarks/fast_port.py [simulation time]
+"""
+import random
+import sys
+import time
+from functools import partial
+
+import simpy
+
+from ns.packet.dist_generator import DistPacketGenerator
+from ns.packet.sink import PacketSink
+from ns.port.fast_port import FastPort
+from ns.port.port import Port
+
+
+class CountingEnvironment(simpy.Environment):
+    """A simpy environment that counts the number of events scheduled."""
+
+    def __init__(self):
+        super().__init__()
+        self.events_scheduled = 0
+
+    def schedule(self, event, priority=1, delay=0):
+        self.events_scheduled += 1
+        super().schedule(event, priority, delay)
+
+
+def simulate(port_type, until):
+    """Runs an M/M/1/K queue with a port of the given type."""
+    random.seed(42)
+    env = CountingEnvironment()
+
+    sink = PacketSink(env, rec_arrivals=False)
+    generator = DistPacketGenerator(
+        env,
+        "pg",
+        partial(random.expovariate, 0.9),
+        partial(random.expovariate, 0.01),
+        flow_id=0,
+    )
+    port = port_type(env, 800.0, qlimit=20)
+    generator.out = port
+    port.out = sink
+
+    start = time.perf_counter()
+    env.run(until=until)
+    elapsed = time.perf_counter() - start
+
+    # Excluding the timeouts scheduled by the packet generator itself
+    port_events = env.events_scheduled - generator.packets_sent
+    return sink, port, port_events, elapsed
+
+
+sim_time = float(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+sink, port, port_events, elapsed = simulate(Port, sim_time)
+fast_sink, fast_port, fast_port_events, fast_elapsed = simulate(FastPort, sim_time)
+
+assert port.packets_dropped == fast_port.packets_dropped
+assert len(sink.waits[0]) == len(fast_sink.waits[0])
+assert all(
+    abs(a - b) < 1e-9 for a, b in zip(sink.waits[0], fast_sink.waits[0])
+), "FastPort delivered packets at different times than Port."
+
+sent = port.packets_received - port.packets_dropped
+print(f"{sent} packets transmitted, {port.packets_dropped} dropped: identical departures.")
+print(f"    Port: {port_events / sent:.2f} events/packet, {elapsed:.3f} seconds")
+print(f"FastPort: {fast_port_events / sent:.2f} events/packet, {fast_elapsed:.3f} seconds")
@@ -0,0 +1,69 @@
+"""
+Compares the memory footprint and the construction throughput of the slotted
+`Packet` class against the previous `__dict__`-based layout, which allocated the
+`prio` and `perhop_time` dictionaries eagerly for every packet.
+
+Usage: python benchmarks/packet.py [number of packets]
+"""
+import sys
+import timeit
+import tracemalloc
+
+from ns.packet.packet import Packet
+
+
+class DictPacket:
+    """The previous packet layout, kept here as a baseline."""
+
+    def __init__(self, time, size, packet_id, src="source", flow_id=0):
+        self.time = time
+        self.delivered_time = 0
+        self.first_sent_time = 0
+        self.size = size
+        self.packet_id = packet_id
+        self.realtime = 0
+        self.src = src
+        self.dst = "destination"
+        self.flow_id = flow_id
+        self.payload = None
+        self.lost = 0
+        self.self_lost = False
+        self.tx_in_flight = -1
+        self.delivered = packet_id
+        self.is_app_limited = False
+        self.color = None
+        self.prio = {}
+        self.ack = None
+        self.current_time = 0
+        self.perhop_time = {}
+
+
+def memory_per_packet(cls, n):
+    """Returns the number of bytes allocated per live packet."""
+    tracemalloc.start()
+    packets = [cls(0.0, 1000, i, src="pg", flow_id=0) for i in range(n)]
+    current, __ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del packets
+    return current / n
+
+
+def packets_per_second(cls, n):
+    """Returns the construction throughput in packets per second."""
+    elapsed = min(
+        timeit.repeat(
+            lambda: [cls(0.0, 1000, i, src="pg", flow_id=0) for i in range(n)],
+            number=1,
+            repeat=5,
+        )
+    )
+    return n / elapsed
+
+
+n_packets = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+for name, cls in (("dict-based", DictPacket), ("slotted", Packet)):
+    print(
+        f"{name:>10}: {memory_per_packet(cls, n_packets):7.1f} bytes/packet, "
+        f"{packets_per_second(cls, n_packets):12,.0f} packets/second"
+    )
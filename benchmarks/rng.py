@@ -0,0 +1,51 @@
+"""
+Compares the cost of drawing one uniform variate per packet from the global `random` module,
+from a NumPy generator one call at a time, and from a `BlockRNG` that draws its variates from
+the same NumPy generator in vectorized blocks. Also checks that the stream given to an element
+by a `SeedTree` does not depend on the order in which the streams are created.
+
+Usage: python benchmarks/rng.py [number of variates]
+"""
+import random
+import sys
+import timeit
+
+import numpy as np
+
+from ns.utils.rng import BlockRNG, SeedTree
+
+
+def per_variate(stmt, n, setup_globals) -> float:
+    """Returns the time taken by each variate, in nanoseconds."""
+    return min(timeit.repeat(stmt, number=n, repeat=3, globals=setup_globals)) / n * 1e9
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    generator = np.random.Generator(np.random.PCG64(1))
+    block_rng = BlockRNG(np.random.Generator(np.random.PCG64(1)))
+
+    print(f"random.random():         {per_variate('random.random()', n, {'random': random}):6.1f} ns")
+    print(f"Generator.random():      {per_variate('g.random()', n, {'g': generator}):6.1f} ns")
+    print(f"BlockRNG.random():       {per_variate('b.random()', n, {'b': block_rng}):6.1f} ns")
+
+    first = SeedTree(1)
+    wire_first = first.rng(("wire", 1))
+    red_first = first.rng("red")
+
+    second = SeedTree(1)
+    red_second = second.rng("red")
+    wire_second = second.rng(("wire", 1))
+
+    assert [wire_first.random() for __ in range(10)] == [
+        wire_second.random() for __ in range(10)
+    ]
+    assert [red_first.random() for __ in range(10)] == [
+        red_second.random() for __ in range(10)
+    ]
+    print("Streams are independent of their creation order.")
+
+
+if __name__ == "__main__":
+    main()
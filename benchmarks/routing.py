@@ -0,0 +1,65 @@
+"""
+Compares the time taken by `generate_flows()` and `generate_fib()` to set up the flows of a
+fat-tree when each path is chosen from the list of all the shortest paths computed by
+`nx.all_shortest_paths()` for every flow, against the cached search trees of a `ShortestPaths`
+routing index and the arithmetic routing of a `FatTreePaths` routing index. All three choose
+the same paths for the same seed.
+
+Usage: python benchmarks/routing.py [k] [number of flows]
+"""
+import random
+import sys
+import time
+
+import networkx as nx
+
+from ns.topos.fattree import build as build_fattree
+from ns.topos.utils import (FatTreePaths, ShortestPaths, generate_fib,
+                            generate_flows)
+
+
+class AllShortestPaths:
+    """A routing index that lists all the shortest paths for every flow, in the same way as
+    `generate_flows()` used to."""
+
+    def __init__(self, G):
+        self.G = G
+
+    def count(self, src, dst) -> int:
+        self.paths = list(nx.all_shortest_paths(self.G, src, dst))
+        return len(self.paths)
+
+    def path(self, src, dst, index: int) -> list:
+        return self.paths[index]
+
+
+def setup_time(ft, hosts, n_flows, paths) -> tuple:
+    """Returns the time taken to generate the flows and their forwarding entries, and the
+    flows themselves."""
+    random.seed(1)
+    start = time.perf_counter()
+    all_flows = generate_flows(ft, hosts, n_flows, paths=paths)
+    generate_fib(ft, all_flows)
+    return time.perf_counter() - start, all_flows
+
+
+def main():
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    n_flows = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    ft = build_fattree(k)
+    hosts = {n for n in ft.nodes() if ft.nodes[n]["type"] == "host"}
+
+    print(f"Setting up {n_flows} flows on a fat-tree with k = {k}:")
+    reference, reference_flows = setup_time(ft, hosts, n_flows, AllShortestPaths(ft))
+    print(f"  nx.all_shortest_paths: {reference:8.3f} seconds")
+    for name, paths in [("ShortestPaths", ShortestPaths(ft)),
+                        ("FatTreePaths", FatTreePaths(ft, k))]:
+        elapsed, all_flows = setup_time(ft, hosts, n_flows, paths)
+        same = all(all_flows[fid].path == reference_flows[fid].path for fid in all_flows)
+        print(f"  {name + ':':22s} {elapsed:8.3f} seconds ({reference / elapsed:.0f}x), "
+              f"same paths: {same}")
+
+
+if __name__ == "__main__":
+    main()
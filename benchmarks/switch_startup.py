@@ -0,0 +1,97 @@
+"""
+Measures the time taken to build and wire a fat-tree of `FairPacketSwitch` instances, one for
+each node as in `examples/fattree.py`, and the peak resident set size (RSS) of the process,
+with all the ports and schedulers created up front and with lazy ports, which are only
+created when they receive their first packet. A short simulation of a few flows then shows
+how many ports are actually created. Each configuration is measured in its own process, so
+that their peak RSS can be compared.
+
+Usage: python benchmarks/switch_startup.py [k] [number of classes] [number of flows]
+"""
+import multiprocessing
+import resource
+import sys
+import time
+
+import simpy
+
+from ns.packet.dist_generator import DistPacketGenerator
+from ns.packet.sink import PacketSink
+from ns.switch.switch import FairPacketSwitch
+from ns.topos.fattree import build as build_fattree
+from ns.topos.utils import generate_fib, generate_flows
+
+pir = 1000000000  # 1Gbps
+buffer_size = 1000
+
+
+def measure(k, n_classes, n_flows, lazy_ports, results):
+    """Builds the network, runs a short simulation, and reports the measurements."""
+    ft = build_fattree(k)
+    hosts = {n for n in ft.nodes() if ft.nodes[n]["type"] == "host"}
+    all_flows = generate_flows(ft, hosts, n_flows)
+    ft = generate_fib(ft, all_flows)
+    weights = {c: 1 for c in range(n_classes)}
+
+    env = simpy.Environment()
+    start = time.perf_counter()
+    kwargs = {"lazy_ports": True} if lazy_ports else {}
+    for node_id in ft.nodes():
+        node = ft.nodes[node_id]
+        node["device"] = FairPacketSwitch(env,
+                                          k,
+                                          pir,
+                                          buffer_size,
+                                          weights,
+                                          "DRR",
+                                          lambda p: p.flow_id % n_classes,
+                                          element_id=f"{node_id}",
+                                          **kwargs)
+        node["device"].demux.fib = node["flow_to_port"]
+
+    for node_id in ft.nodes():
+        node = ft.nodes[node_id]
+        for port_number, next_hop in node["port_to_nexthop"].items():
+            node["device"].ports[port_number].out = ft.nodes[next_hop]["device"]
+    startup = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    for fid, flow in all_flows.items():
+        pg = DistPacketGenerator(env, f"Flow_{fid}", lambda: 0.0008, lambda: 1024,
+                                 finish=0.1, flow_id=fid)
+        pg.out = ft.nodes[flow.src]["device"]
+        ft.nodes[flow.dst]["device"].demux.ends[fid] = PacketSink(env)
+
+    start = time.perf_counter()
+    env.run(until=0.2)
+    elapsed = time.perf_counter() - start
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    received = sum(sink.packets_received[fid] for n in ft.nodes()
+                   for fid, sink in ft.nodes[n]["device"].demux.ends.items())
+    created = sum(1 for n in ft.nodes() for port in ft.nodes[n]["device"].egress_ports
+                  if not hasattr(port, "create"))
+    results.put((startup, rss, peak_rss, elapsed, created, received))
+
+
+def main():
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    n_classes = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    n_flows = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    print(f"A fat-tree with k = {k}, {n_classes} classes per port, and {n_flows} flows:")
+    for name, lazy_ports in [("eager ports", False), ("lazy ports", True)]:
+        results = multiprocessing.Queue()
+        process = multiprocessing.Process(target=measure,
+                                          args=(k, n_classes, n_flows, lazy_ports, results))
+        process.start()
+        startup, rss, peak_rss, elapsed, created, received = results.get()
+        process.join()
+        print(f"  {name + ':':13s} startup {startup:6.2f} s, RSS {rss:7.1f} MB after startup "
+              f"and {peak_rss:7.1f} MB after the simulation, {created} ports created, "
+              f"{received} packets received in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
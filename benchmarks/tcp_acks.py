@@ -0,0 +1,78 @@
+"""
+Measures the cost of processing each acknowledgment at a `TCPPacketGenerator` for flows with
+increasing bandwidth-delay products, whose congestion windows grow to tens of thousands of
+segments. Since the in-flight segments are kept in the order of their sequence numbers, each
+cumulative acknowledgment only visits the segments that it acknowledges, and the cost per
+acknowledgment does not grow with the number of segments in flight.
+
+Usage: python benchmarks/tcp_acks.py [flow size in bytes]
+"""
+import sys
+import time
+
+import simpy
+
+from ns.flow.cc import TCPReno
+from ns.flow.flow import Flow
+from ns.packet.tcp_generator import TCPPacketGenerator
+from ns.packet.tcp_sink import TCPSink
+from ns.port.port import Port
+from ns.port.wire import Wire
+
+
+class PeakInFlight:
+    """Forwards packets to a downstream element, and records the peak number of segments
+    in flight at the sender whenever a segment is sent."""
+
+    def __init__(self, sender):
+        self.sender = sender
+        self.out = None
+        self.peak = 0
+
+    def put(self, packet):
+        self.peak = max(self.peak, len(self.sender.sent_packets))
+        self.out.put(packet)
+
+
+def simulate(flow_size: int, rate: float, rtt: float):
+    """Simulates a TCP connection over a link with the given rate and round-trip time, and
+    returns the running time, the number of acknowledgments, and the peak number of
+    segments in flight."""
+    env = simpy.Environment()
+
+    flow = Flow(fid=0, src="sender", dst="receiver", size=flow_size, finish_time=1000)
+    # the slow start threshold is high enough for the window to grow to the BDP
+    cc = TCPReno(ssthresh=int(rate * rtt / 8) * 2)
+    sender = TCPPacketGenerator(env, flow=flow, cc=cc, element_id=flow.src)
+    peak = PeakInFlight(sender)
+    port = Port(env, rate=rate)
+    downstream = Wire(env, lambda: rtt / 2)
+    upstream = Wire(env, lambda: rtt / 2)
+    receiver = TCPSink(env, rec_waits=False)
+
+    sender.out = peak
+    peak.out = port
+    port.out = downstream
+    downstream.out = receiver
+    receiver.out = upstream
+    upstream.out = sender
+
+    start = time.perf_counter()
+    env.run()
+    return time.perf_counter() - start, receiver.packets_received[0], peak.peak
+
+
+def main():
+    flow_size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000000
+    rate = 1e9
+
+    print(f"TCP connections transferring {flow_size} bytes over a 1 Gbps link:")
+    for rtt in [0.001, 0.01, 0.1]:
+        elapsed, acks, peak = simulate(flow_size, rate, rtt)
+        print(f"  RTT {rtt * 1000:5.0f} ms, BDP {rate * rtt / 8 / 512:7.0f} segments: "
+              f"{elapsed:6.2f} seconds, {elapsed / acks * 1e6:6.1f} us per ack, "
+              f"{peak:6d} segments in flight at the peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compares the cost of the retransmission timers of a TCP connection whose congestion window
+grows to thousands of segments, when each segment's timer is a `Timer` with a simpy process
+of its own, and when all the timers are managed by a `TimerWheel`. The numbers of simpy
+events processed by the simulation are reported along with the running times, and the two
+simulations deliver the same segments at the same times.
+
+Usage: python benchmarks/tcp_timers.py [flow size in bytes]
+"""
+import sys
+import time
+
+import simpy
+
+from ns.flow.cc import TCPReno
+from ns.flow.flow import Flow
+from ns.packet.tcp_generator import TCPPacketGenerator
+from ns.packet.tcp_sink import TCPSink
+from ns.port.port import Port
+from ns.port.wire import Wire
+from ns.utils.timer import Timer
+
+
+class ProcessTimers:
+    """Starts a `Timer`, with a simpy process of its own, for each segment."""
+
+    def __init__(self, env):
+        self.env = env
+
+    def timer(self, timer_id, timeout_callback, rto):
+        return Timer(self.env, timer_id, timeout_callback, rto)
+
+
+def simulate(flow_size: int, process_timers: bool):
+    """Simulates a TCP connection over a 100 Mbps link with a 10 ms round-trip time, and
+    returns the running time, the number of events, and the arrival times at the sink."""
+    env = simpy.Environment()
+    events = [0]
+    schedule = env.schedule
+
+    def counted_schedule(*args, **kwargs):
+        events[0] += 1
+        schedule(*args, **kwargs)
+
+    env.schedule = counted_schedule
+
+    flow = Flow(fid=0, src="sender", dst="receiver", size=flow_size, finish_time=1000)
+    sender = TCPPacketGenerator(env, flow=flow, cc=TCPReno(), element_id=flow.src,
+                                timer_wheel=ProcessTimers(env) if process_timers else None)
+    port = Port(env, rate=100000000)
+    downstream = Wire(env, lambda: 0.005)
+    upstream = Wire(env, lambda: 0.005)
+    receiver = TCPSink(env, rec_waits=False)
+
+    sender.out = port
+    port.out = downstream
+    downstream.out = receiver
+    receiver.out = upstream
+    upstream.out = sender
+
+    start = time.perf_counter()
+    env.run()
+    return time.perf_counter() - start, events[0], receiver.arrivals[0]
+
+
+def main():
+    flow_size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000000
+
+    print(f"A TCP connection transferring {flow_size} bytes:")
+    results = {}
+    for name, process_timers in [("a process per timer", True), ("timer wheel", False)]:
+        elapsed, events, arrivals = simulate(flow_size, process_timers)
+        results[name] = arrivals
+        print(f"  {name + ':':22s} {elapsed:6.2f} seconds, {events:9d} events")
+
+    assert len(set(map(tuple, results.values()))) == 1
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+An example of Equal-Cost Multi-Path (ECMP) forwarding in a fat-tree, which compares the load on
+the uplinks of the edge and aggregation switches when each flow is pinned to a random shortest
+path at setup time with per-flow forwarding entries, when the switches hash each flow onto one
+of their equal-cost uplinks using an ECMPDemux, and when the flows are further split into
+flowlets that are spread over the uplinks independently.
+
+The equal-cost groups of all the switches are generated from the topology by generate_ecmp(),
+with one group per top-of-rack switch rather than per-flow entries, and the switches find the
+group of each packet from the destination that its generator stamps on it.
+"""
+import simpy
+
+from ns.demux.ecmp_demux import ECMPDemux
+from ns.packet.dist_generator import DistPacketGenerator
+from ns.packet.sink import PacketSink
+from ns.switch.switch import SimplePacketSwitch
+from ns.topos.fattree import build as build_fattree
+from ns.topos.utils import generate_ecmp, generate_fib, generate_flows
+from ns.utils.distributions import Constant, Exponential
+from ns.utils.rng import SeedTree
+
+k = 4
+n_flows = 48
+pir = 100000000  # 100Mbps
+buffer_size = 1000
+finish_time = 0.2
+
+
+def simulate(ft, all_flows, attachments, mode, flowlet_gap=None):
+    """Simulates the flows with the given forwarding mode, and returns the numbers of packets
+    sent on each uplink, the mean delay of all packets, and the number of flowlets."""
+    env = simpy.Environment()
+    seed_tree = SeedTree(1)
+
+    for node_id in ft.nodes():
+        node = ft.nodes[node_id]
+        device = SimplePacketSwitch(env, k, pir, buffer_size, element_id=f"{node_id}")
+        if mode == "FIB":
+            device.demux.fib = node["flow_to_port"]
+        else:
+            device.demux = ECMPDemux(env,
+                                     groups=node["ecmp_groups"],
+                                     outs=device.ports,
+                                     attachments=attachments,
+                                     flowlet_gap=flowlet_gap,
+                                     salt=node_id,
+                                     rng=seed_tree.rng(("flowlets", node_id)))
+        node["device"] = device
+
+    for node_id in ft.nodes():
+        node = ft.nodes[node_id]
+        for port_number, next_hop in node["port_to_nexthop"].items():
+            node["device"].ports[port_number].out = ft.nodes[next_hop]["device"]
+
+    sinks = []
+    for fid, flow in all_flows.items():
+        pg = DistPacketGenerator(env,
+                                 f"Flow_{fid}",
+                                 Exponential(2000, generator=seed_tree.generator(("flow", fid))),
+                                 Constant(1000),
+                                 finish=finish_time,
+                                 flow_id=fid,
+                                 dst=flow.dst)
+        pg.out = ft.nodes[flow.src]["device"]
+        sink = PacketSink(env, rec_arrivals=False, rec_perhop_times=False)
+        ft.nodes[flow.dst]["device"].demux.ends[fid] = sink
+        sinks.append(sink)
+
+    env.run(until=finish_time + 0.01)
+
+    # the uplinks from the edge switches to the aggregation switches, and from the
+    # aggregation switches to the core switches
+    layers = {"edge": "aggregation", "aggregation": "core"}
+    uplinks = [
+        ft.nodes[n]["device"].ports[port].packets_received
+        for n in ft.nodes() if ft.nodes[n]["layer"] in layers
+        for port, next_hop in ft.nodes[n]["port_to_nexthop"].items()
+        if ft.nodes[next_hop]["layer"] == layers[ft.nodes[n]["layer"]]
+    ]
+
+    waits = [w for sink in sinks for waits in sink.waits.values() for w in waits]
+    flowlets = sum(ft.nodes[n]["device"].demux.flowlets for n in ft.nodes()
+                   if mode != "FIB")
+    return uplinks, sum(waits) / len(waits), flowlets
+
+
+def main():
+    ft = build_fattree(k)
+    hosts = {n for n in ft.nodes() if ft.nodes[n]["type"] == "host"}
+    all_flows = generate_flows(ft, hosts, n_flows, rng=SeedTree(1).python_rng("flows"))
+    ft = generate_fib(ft, all_flows)
+    attachments = generate_ecmp(ft, hosts)
+
+    print("Forwarding         Uplink load (max / mean)   Mean delay (ms)   Flowlets")
+    for name, mode, flowlet_gap in [("Per-flow paths", "FIB", None),
+                                    ("ECMP", "ECMP", None),
+                                    ("ECMP + flowlets", "ECMP", 0.001)]:
+        uplinks, delay, flowlets = simulate(ft, all_flows, attachments, mode, flowlet_gap)
+        imbalance = max(uplinks) / (sum(uplinks) / len(uplinks))
+        print(f"{name:17s}  {imbalance:24.2f}   {delay * 1000:15.3f}   {flowlets:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -59,8 +59,17 @@ for node_id in ft.nodes():
     node = ft.nodes[node_id]
     flow_classes = partial(flow_to_classes, n_id=node_id, fib=node["flow_to_port"])
 
+    # only the ports that carry traffic are created, as most of them never do
     node["device"] = FairPacketSwitch(
-        env, k, pir, buffer_size, weights, "DRR", flow_classes, element_id=f"{node_id}"
+        env,
+        k,
+        pir,
+        buffer_size,
+        weights,
+        "DRR",
+        flow_classes,
+        element_id=f"{node_id}",
+        lazy_ports=True,
     )
 
     # node["device"] = SimplePacketSwitch(
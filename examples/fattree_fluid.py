@@ -0,0 +1,125 @@
+"""
+This example cross-checks a flow-level FluidSimulation against a packet-level simulation of the
+same fat-tree network, in which every node is a FairPacketSwitch with a Deficit Round Robin
+scheduler on each of its outgoing ports.
+
+Each flow sends packets of a constant size at a constant rate, which is its demand in the fluid
+simulation. The throughput of each flow at its packet sink in the packet-level simulation,
+measured after a warmup period, is compared with its max-min fair rate in the fluid simulation.
+The two may differ for flows that share a link upstream of their bottlenecks with a flow that is
+bottlenecked elsewhere: without congestion control, such a flow keeps sending at its demand,
+and uses more of the upstream link than its max-min fair share.
+
+The fluid simulation is then run on a larger fat-tree with flows that complete after
+transferring a given number of bytes, which would take far longer at the packet level.
+
+Usage: python fattree_fluid.py [k] [number of flows]
+"""
+import random
+import sys
+import time
+
+import simpy
+
+from ns.flow.fluid import FluidSimulation
+from ns.packet.dist_generator import DistPacketGenerator
+from ns.packet.sink import PacketSink
+from ns.switch.switch import FairPacketSwitch
+from ns.topos.fattree import build as build_fattree
+from ns.topos.utils import generate_fib, generate_flows
+
+pir = 10000000  # 10Mbps
+buffer_size = 100000
+packet_size = 1000
+warmup = 0.5
+finish_time = 2.0
+
+
+def packet_level(ft, k, all_flows, demands):
+    """Simulates the flows at the packet level, and returns their throughputs after the
+    warmup period."""
+    env = simpy.Environment()
+    weights = {fid: 1 for fid in all_flows}
+
+    for node_id in ft.nodes():
+        node = ft.nodes[node_id]
+        node["device"] = FairPacketSwitch(
+            env, k, pir, buffer_size, weights, "DRR", element_id=f"{node_id}"
+        )
+        node["device"].demux.fib = node["flow_to_port"]
+
+    for n in ft.nodes():
+        node = ft.nodes[n]
+        for port_number, next_hop in node["port_to_nexthop"].items():
+            node["device"].ports[port_number].out = ft.nodes[next_hop]["device"]
+
+    for fid, flow in all_flows.items():
+        pg = DistPacketGenerator(
+            env,
+            f"Flow_{fid}",
+            lambda interval=packet_size * 8 / demands[fid]: interval,
+            lambda: packet_size,
+            finish=finish_time,
+            flow_id=fid,
+        )
+        pg.out = ft.nodes[flow.src]["device"]
+        flow.pkt_sink = PacketSink(env, rec_waits=False, rec_perhop_times=False)
+        ft.nodes[flow.dst]["device"].demux.ends[fid] = flow.pkt_sink
+
+    env.run(until=finish_time)
+
+    throughputs = {}
+    for fid, flow in all_flows.items():
+        arrivals = [t for t in flow.pkt_sink.arrivals[fid] if t >= warmup]
+        throughputs[fid] = len(arrivals) * packet_size * 8 / (finish_time - warmup)
+    return throughputs
+
+
+def main():
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    n_flows = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    random.seed(1)
+
+    # cross-checking a small fat-tree against the packet-level simulation
+    ft = build_fattree(4)
+    hosts = {n for n in ft.nodes() if ft.nodes[n]["type"] == "host"}
+    all_flows = generate_flows(ft, hosts, 24)
+    ft = generate_fib(ft, all_flows)
+    demands = {fid: random.choice([1, 2, 4, 8]) * 1000000 for fid in all_flows}
+
+    fluid = FluidSimulation(ft, all_flows, pir, demands=demands)
+    fluid.run(until=0)
+    throughputs = packet_level(ft, 4, all_flows, demands)
+
+    print("Flow   Demand (Mbps)   Fluid (Mbps)   Packet-level (Mbps)")
+    errors = []
+    for fid in sorted(all_flows):
+        rate = fluid.rates[fid]
+        errors.append(abs(throughputs[fid] - rate) / rate)
+        print(f"{fid:4d}   {demands[fid] / 1e6:13.2f}   {rate / 1e6:12.2f}"
+              f"   {throughputs[fid] / 1e6:19.2f}")
+    print(f"Median relative error: {sorted(errors)[len(errors) // 2]:.3f}, "
+          f"within 5% for {sum(e <= 0.05 for e in errors)} of {len(errors)} flows.")
+
+    # flows that complete after transferring their bytes on a large fat-tree
+    ft = build_fattree(k)
+    hosts = {n for n in ft.nodes() if ft.nodes[n]["type"] == "host"}
+    all_flows = generate_flows(ft, hosts, n_flows)
+    for fid, flow in all_flows.items():
+        flow.size = random.choice([10000, 100000, 1000000])
+        flow.start_time = random.uniform(0, 1)
+
+    start = time.perf_counter()
+    fluid = FluidSimulation(ft, all_flows, 1000000000, interval=0.0001)
+    fluid.run()
+    elapsed = time.perf_counter() - start
+
+    fcts = sorted(fluid.flow_completion_time(fid) for fid in all_flows)
+    print(f"{n_flows} flows on a fat-tree with k = {k}: {fluid.allocations} allocations "
+          f"in {elapsed:.2f} seconds, median flow completion time "
+          f"{fcts[len(fcts) // 2] * 1000:.3f} ms.")
+
+
+if __name__ == "__main__":
+    main()
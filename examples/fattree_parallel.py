@@ -0,0 +1,121 @@
+"""
+This example simulates the fat-tree network in `fattree.py` in parallel, with its pods
+partitioned across worker processes using a ParallelSimulation, and checks that the results
+are identical to those of the same network simulated in a single process.
+
+Each link is given a propagation delay of ten microseconds, which is also the lookahead used to
+synchronize the partitions. The network is built in each worker process by the module-level
+function `build()`, which only creates the switches, packet generators, and packet sinks of the
+nodes in its partition. Each flow draws its packet inter-arrival times from its own stream in a
+SeedTree, so that the packets it generates do not depend on how the network is partitioned.
+
+Usage: python fattree_parallel.py [k] [number of flows] [number of partitions]
+"""
+import sys
+import time
+from functools import partial
+
+from ns.packet.dist_generator import DistPacketGenerator
+from ns.packet.sink import PacketSink
+from ns.switch.switch import FairPacketSwitch
+from ns.topos.fattree import build as build_fattree
+from ns.topos.parallel import ParallelSimulation, pod_partition
+from ns.topos.utils import generate_fib, generate_flows
+from ns.utils.distributions import Constant, Exponential
+from ns.utils.rng import SeedTree
+
+pir = 1000000000  # 1Gbps
+buffer_size = 1000
+link_delay = 0.00001
+finish_time = 0.05
+
+
+def flow_to_classes(packet, n_id=0, fib=None, n_classes=1):
+    return (packet.flow_id + n_id + fib[packet.flow_id]) % n_classes
+
+
+def build(env, G, nodes, k, all_flows, seed):
+    """Builds the switches, packet generators and packet sinks of a subset of nodes."""
+    seed_tree = SeedTree(seed)
+    n_classes = len(all_flows)
+    weights = {c: 1 for c in range(n_classes)}
+
+    devices = {}
+    for node_id in nodes:
+        node = G.nodes[node_id]
+        flow_classes = partial(flow_to_classes,
+                               n_id=node_id,
+                               fib=node["flow_to_port"],
+                               n_classes=n_classes)
+        devices[node_id] = FairPacketSwitch(env,
+                                            k,
+                                            pir,
+                                            buffer_size,
+                                            weights,
+                                            "DRR",
+                                            flow_classes,
+                                            element_id=f"{node_id}")
+        devices[node_id].demux.fib = node["flow_to_port"]
+
+    sinks = {}
+    for fid, flow in all_flows.items():
+        if flow.src in devices:
+            start = seed_tree.python_rng(("start", fid)).uniform(0, 0.001)
+            pg = DistPacketGenerator(env,
+                                     f"Flow_{fid}",
+                                     Exponential(1250,
+                                                 generator=seed_tree.generator(("flow", fid))),
+                                     Constant(1024),
+                                     initial_delay=start,
+                                     finish=finish_time,
+                                     flow_id=fid)
+            pg.out = devices[flow.src]
+        if flow.dst in devices:
+            sinks[fid] = PacketSink(env)
+            devices[flow.dst].demux.ends[fid] = sinks[fid]
+
+    def collect():
+        return {fid: list(sink.waits[fid]) for fid, sink in sinks.items()}
+
+    return devices, collect
+
+
+def simulate(ft, partition, k, all_flows):
+    """Runs the simulation, and returns the waiting times of all the flows."""
+    sim = ParallelSimulation(ft,
+                             build,
+                             partition,
+                             link_delay,
+                             k=k,
+                             all_flows=all_flows,
+                             seed=1)
+    start = time.perf_counter()
+    waits = {}
+    for result in sim.run(until=finish_time + 0.01):
+        waits.update(result)
+    return waits, time.perf_counter() - start, sim
+
+
+def main():
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    n_flows = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    n_partitions = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    ft = build_fattree(k)
+    hosts = {n for n in ft.nodes() if ft.nodes[n]["type"] == "host"}
+    all_flows = generate_flows(ft, hosts, n_flows, rng=SeedTree(1).python_rng("flows"))
+    ft = generate_fib(ft, all_flows)
+
+    single, single_time, __ = simulate(ft, {n: 0 for n in ft.nodes()}, k, all_flows)
+    parallel, parallel_time, sim = simulate(ft, pod_partition(ft, n_partitions), k,
+                                            all_flows)
+
+    n_packets = sum(len(waits) for waits in single.values())
+    print(f"Single process: {n_packets} packets received in {single_time:.2f} seconds.")
+    print(f"{n_partitions} partitions: {sim.windows} synchronization windows, "
+          f"{sim.packets_exchanged} packets exchanged, {parallel_time:.2f} seconds.")
+    print(f"Identical results: {single == parallel}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+An example of a hybrid simulation, in which two flows of interest are simulated packet by packet
+through a WFQ server, while the background traffic on the same link is modeled as fluid rates.
+
+The background traffic consists of many flows, each with a given number of bytes to transfer,
+which are simulated at the flow level by a FluidSimulation that records the load of the link
+over time. The WFQ server is given this load as its background load, and serves the packets of
+the two foreground flows, with weights 1 and 2, at the capacity left over by the background
+traffic. The throughputs of the two flows in each second are compared with their weighted
+max-min fair shares of the capacity left over.
+"""
+import random
+
+import networkx as nx
+import simpy
+
+from ns.flow.flow import Flow
+from ns.flow.fluid import FluidSimulation
+from ns.packet.dist_generator import DistPacketGenerator
+from ns.packet.sink import PacketSink
+from ns.scheduler.wfq import WFQServer
+
+capacity = 10000000  # 10Mbps
+packet_size = 1000
+demands = [6000000, 6000000]
+weights = [1, 2]
+finish_time = 10
+
+random.seed(1)
+
+# the background flows, simulated at the flow level
+G = nx.Graph()
+G.add_edge("src", "dst")
+background_flows = {}
+for fid in range(30):
+    background_flows[fid] = Flow(fid, "src", "dst",
+                                 size=random.choice([100000, 200000, 500000]),
+                                 start_time=random.uniform(0, finish_time))
+    background_flows[fid].path = ["src", "dst"]
+
+fluid = FluidSimulation(G,
+                        background_flows,
+                        capacity,
+                        demands={fid: 2000000 for fid in background_flows},
+                        record_links=[("src", "dst")])
+fluid.run()
+background = fluid.background_load("src", "dst")
+
+# the foreground flows, simulated at the packet level
+env = simpy.Environment()
+wfq_server = WFQServer(env, capacity, weights, background=background)
+ps = PacketSink(env, rec_waits=False, rec_perhop_times=False)
+wfq_server.out = ps
+
+for flow_id, demand in enumerate(demands):
+    pg = DistPacketGenerator(env,
+                             f"flow_{flow_id}",
+                             lambda interval=packet_size * 8 / demand: interval,
+                             lambda: packet_size,
+                             finish=finish_time,
+                             flow_id=flow_id)
+    pg.out = wfq_server
+
+env.run(until=finish_time)
+
+
+def fair_shares(available):
+    """Returns the weighted max-min fair shares of the foreground flows."""
+    share_0 = min(demands[0],
+                  max(available * weights[0] / sum(weights), available - demands[1]))
+    return [share_0, min(demands[1], available - share_0)]
+
+
+print("Time   Background (Mbps)   Flow 0 (Mbps)   Flow 1 (Mbps)   Fair shares (Mbps)")
+for second in range(1, finish_time):
+    available = background.service(second, second + 1, capacity)
+    received = [
+        sum(second <= t < second + 1 for t in ps.arrivals[flow_id]) * packet_size * 8
+        for flow_id in range(len(demands))
+    ]
+    shares = fair_shares(available)
+    print(f"{second:4d}   {(capacity - available) / 1e6:17.2f}   {received[0] / 1e6:13.2f}"
+          f"   {received[1] / 1e6:13.2f}   {shares[0] / 1e6:8.2f}, {shares[1] / 1e6:.2f}")
+
+background_bytes = sum(fluid.bytes_sent.values())
+print(f"{sum(ps.packets_received.values())} foreground packets were simulated, while "
+      f"{background_bytes / packet_size:.0f} packets of background traffic were not.")
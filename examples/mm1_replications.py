@@ -0,0 +1,64 @@
+"""
+This example runs independent replications of the M/M/1 queueing system in `mm1.py`, for
+several packet arrival rates, in parallel across all CPU cores using a ReplicationRunner.
+
+The scenario function builds the network for a given arrival rate, and returns a function that
+collects the results of a replication: the per-flow delay statistics of a StatsPacketSink and
+the average queue size observed by a PortMonitor. These results are sent back to the parent
+process, where the delay statistics of all the replications with the same arrival rate are
+merged together and compared with the theoretical mean waiting time 1 / (μ - λ), with a packet
+service rate μ = 1.25 packets per second.
+"""
+import random
+from functools import partial
+
+from ns.packet.dist_generator import DistPacketGenerator
+from ns.packet.stats_sink import FlowStats, StatsPacketSink
+from ns.port.monitor import PortMonitor
+from ns.port.port import Port
+from ns.utils.replication import ReplicationRunner
+
+SERVICE_RATE = 1.25
+
+
+def mm1(env, arrival_rate):
+    """Builds an M/M/1 system with a given packet arrival rate."""
+    arrival_dist = partial(random.expovariate, arrival_rate)
+    size_dist = partial(random.expovariate, 0.01)  # a mean size of 100 bytes
+    samp_dist = partial(random.expovariate, 1.0)
+
+    ps = StatsPacketSink(env)
+    pg = DistPacketGenerator(env, "pg", arrival_dist, size_dist, flow_id=0)
+    port = Port(env, 1000.0)
+    pm = PortMonitor(env, port, samp_dist)
+
+    pg.out = port
+    port.out = ps
+
+    def collect():
+        return ps.stats[0], sum(pm.sizes) / len(pm.sizes)
+
+    return collect
+
+
+if __name__ == "__main__":
+    runner = ReplicationRunner(mm1,
+                               until=2000,
+                               params={"arrival_rate": [0.25, 0.5, 0.75]},
+                               replications=8,
+                               seed=1)
+
+    for params, results in runner.results_by_params(runner.run()).items():
+        arrival_rate = dict(params)["arrival_rate"]
+
+        flow_stats = FlowStats()
+        for replication_stats, _ in results:
+            flow_stats.merge(replication_stats)
+        occupancy = sum(size for _, size in results) / len(results)
+
+        print(f"λ = {arrival_rate}: {flow_stats.delays.count} packets in "
+              f"{len(results)} replications, average wait = "
+              f"{flow_stats.delays.mean:.3f} (theory: "
+              f"{1 / (SERVICE_RATE - arrival_rate):.3f}), 99th percentile = "
+              f"{flow_stats.delay_sketch.quantile(0.99):.3f}, average queue size = "
+              f"{occupancy:.3f}")
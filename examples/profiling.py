@@ -0,0 +1,67 @@
+"""
+An example of profiling a simulation of a fat-tree, to find the network elements that dominate
+its running time. Every switch (including its ports, schedulers, and demultiplexer), packet
+generator, and packet sink is instrumented by a Profiler, which reports the elements that took
+the most time, as well as the time taken by each type of element, at the end of `env.run()`.
+The simulation runs in a ProfiledEnvironment, so that the simpy processes of the elements are
+profiled as well.
+"""
+from functools import partial
+
+from ns.packet.dist_generator import DistPacketGenerator
+from ns.packet.sink import PacketSink
+from ns.switch.switch import FairPacketSwitch
+from ns.topos.fattree import build as build_fattree
+from ns.topos.utils import generate_fib, generate_flows
+from ns.utils.distributions import Constant, Exponential
+from ns.utils.profiler import ProfiledEnvironment, Profiler
+from ns.utils.rng import SeedTree
+
+k = 4
+n_flows = 32
+pir = 100000000  # 100Mbps
+buffer_size = 1000
+finish_time = 0.1
+
+env = ProfiledEnvironment()
+profiler = Profiler(env, top=10, report=True)
+seed_tree = SeedTree(1)
+
+ft = build_fattree(k)
+hosts = {n for n in ft.nodes() if ft.nodes[n]["type"] == "host"}
+all_flows = generate_flows(ft, hosts, n_flows, rng=seed_tree.python_rng("flows"))
+ft = generate_fib(ft, all_flows)
+
+weights = {fid: 1 for fid in all_flows}
+
+for node_id in ft.nodes():
+    node = ft.nodes[node_id]
+    node["device"] = FairPacketSwitch(env,
+                                      k,
+                                      pir,
+                                      buffer_size,
+                                      weights,
+                                      "DRR",
+                                      element_id=f"{node_id}",
+                                      lazy_ports=True)
+    node["device"].demux.fib = node["flow_to_port"]
+    profiler.instrument(node["device"], f"Switch {node_id}")
+
+for node_id in ft.nodes():
+    node = ft.nodes[node_id]
+    for port_number, next_hop in node["port_to_nexthop"].items():
+        node["device"].ports[port_number].out = ft.nodes[next_hop]["device"]
+
+for fid, flow in all_flows.items():
+    pg = DistPacketGenerator(env,
+                             f"Flow_{fid}",
+                             Exponential(2000, generator=seed_tree.generator(("flow", fid))),
+                             Constant(1000),
+                             finish=finish_time,
+                             flow_id=fid)
+    pg.out = ft.nodes[flow.src]["device"]
+    sink = PacketSink(env, rec_perhop_times=False)
+    ft.nodes[flow.dst]["device"].demux.ends[fid] = sink
+    profiler.instrument_all([pg, sink])
+
+env.run(until=finish_time + 0.01)
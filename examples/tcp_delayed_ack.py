@@ -0,0 +1,64 @@
+"""
+An example of delayed and stretch acknowledgments, in which a TCP flow is sent over a bottleneck
+port, and the TCP sink acknowledges every segment, every other segment (delayed ACKs, as in
+RFC 1122 and RFC 5681), every eight segments (stretch ACKs), or each burst of back-to-back
+segments (as with generic receive offload, GRO). Acknowledging several segments with a single
+ack packet reduces the number of packets on the reverse path, and the number of events in the
+simulation, while the sender grows its congestion window by the number of segments
+acknowledged, up to two segments for each ack packet (L = 2 in RFC 3465, set by `abc_limit`
+for the sinks that delay their acknowledgments), rather than by the number of ack packets
+received.
+"""
+import simpy
+
+from ns.flow.cc import TCPReno
+from ns.flow.flow import Flow
+from ns.packet.tcp_generator import TCPPacketGenerator
+from ns.packet.tcp_sink import TCPSink
+from ns.port.port import Port
+from ns.port.wire import Wire
+
+flow_size = 4000000  # in bytes
+rate = 10000000  # 10 Mbps
+
+
+def simulate(ack_every: int, ack_delay: float, gro: bool):
+    """Simulates the flow, and returns the completion time of the flow, the number of ack
+    packets sent by the sink, and the number of events processed."""
+    env = simpy.Environment()
+    events = [0]
+    schedule = env.schedule
+
+    def counted_schedule(*args, **kwargs):
+        events[0] += 1
+        schedule(*args, **kwargs)
+
+    env.schedule = counted_schedule
+
+    flow = Flow(fid=0, src="sender", dst="receiver", size=flow_size, finish_time=1000)
+    sender = TCPPacketGenerator(env, flow=flow, cc=TCPReno(), element_id=flow.src,
+                                abc_limit=2 if ack_every > 1 else 1)
+    port = Port(env, rate=rate)
+    downstream = Wire(env, lambda: 0.02)
+    upstream = Wire(env, lambda: 0.02)
+    receiver = TCPSink(env, rec_waits=False, ack_every=ack_every, ack_delay=ack_delay,
+                       gro=gro)
+
+    sender.out = port
+    port.out = downstream
+    downstream.out = receiver
+    receiver.out = upstream
+    upstream.out = sender
+
+    env.run()
+    return receiver.arrivals[0][-1], receiver.acks_sent, events[0]
+
+
+print(f"A TCP flow of {flow_size} bytes over a {rate / 1e6:.0f} Mbps link:")
+print("Acknowledgments   Ack packets   Completion (s)      Events")
+for name, ack_every, ack_delay, gro in [("Every segment", 1, 0.04, False),
+                                        ("Delayed ACK", 2, 0.04, False),
+                                        ("Stretch ACK", 8, 0.04, False),
+                                        ("GRO", 16, 0.001, True)]:
+    completion, acks, events = simulate(ack_every, ack_delay, gro)
+    print(f"{name:15s}   {acks:11d}   {completion:14.2f}   {events:9d}")
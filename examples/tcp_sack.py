@@ -0,0 +1,63 @@
+"""
+An example of TCP loss recovery with and without selective acknowledgments (SACK), in which a
+TCP flow is sent over a bottleneck port and a lossy wire. Without SACK, the sender only
+retransmits the first missing segment after three duplicate acknowledgments, and relies on a
+retransmission timeout for each of the other segments lost in the same window. With SACK, the
+sink reports the data received out of order, and the sender recovers from all the losses in a
+window in about one round-trip time, as in RFC 6675.
+"""
+import simpy
+
+from ns.flow.cc import TCPReno
+from ns.flow.flow import Flow
+from ns.packet.tcp_generator import TCPPacketGenerator
+from ns.packet.tcp_sink import TCPSink
+from ns.port.port import Port
+from ns.port.wire import Wire
+from ns.utils.rng import SeedTree
+
+flow_size = 2000000  # in bytes
+rate = 10000000  # 10 Mbps
+loss_rate = 0.02
+
+
+def simulate(sack: bool):
+    """Simulates the flow, and returns the sender, the completion time of the flow, and the
+    number of events processed."""
+    env = simpy.Environment()
+    seed_tree = SeedTree(1)
+    events = [0]
+    schedule = env.schedule
+
+    def counted_schedule(*args, **kwargs):
+        events[0] += 1
+        schedule(*args, **kwargs)
+
+    env.schedule = counted_schedule
+
+    flow = Flow(fid=0, src="sender", dst="receiver", size=flow_size, finish_time=1000)
+    sender = TCPPacketGenerator(env, flow=flow, cc=TCPReno(), element_id=flow.src,
+                                sack=sack)
+    port = Port(env, rate=rate)
+    downstream = Wire(env, lambda: 0.02, loss_dist=lambda packet_id: loss_rate,
+                      rng=seed_tree.rng("downstream"))
+    upstream = Wire(env, lambda: 0.02)
+    receiver = TCPSink(env, rec_waits=False, sack=sack)
+
+    sender.out = port
+    port.out = downstream
+    downstream.out = receiver
+    receiver.out = upstream
+    upstream.out = sender
+
+    env.run()
+    return sender, receiver.arrivals[0][-1], events[0]
+
+
+print(f"A TCP flow of {flow_size} bytes over a {rate / 1e6:.0f} Mbps link, "
+      f"with a loss rate of {loss_rate:.0%}:")
+print("Loss recovery   Retransmissions   Timeouts   Completion (s)      Events")
+for name, sack in [("Reno", False), ("SACK", True)]:
+    sender, completion, events = simulate(sack)
+    print(f"{name:13s}   {sender.retransmissions:15d}   {sender.timeouts:8d}   "
+          f"{completion:14.2f}   {events:9d}")
@@ -0,0 +1,153 @@
+"""
+A demultiplexing element that implements Equal-Cost Multi-Path (ECMP) forwarding: each
+destination is mapped to a group of equal-cost output ports, and each flow is pinned to one of
+the ports in the group by hashing its flow tuple (source, destination, and flow ID), so that
+the packets of a flow are never reordered.
+
+With flowlet switching, the packets of a flow are split into flowlets at any gap between two
+consecutive packets that is longer than a given threshold, and each new flowlet is sent to a
+port chosen at random from the group. As long as the gap exceeds the difference in delays
+between the paths, the packets of a flow are still delivered in order.
+
+Packets whose destinations have no group are counted as misses and sent to the default
+element, rather than reported one at a time. The entries of the flows that have been idle for
+longer than a timeout are removed, so that the state kept for the flows does not grow with the
+number of flows that have ever passed through the switch.
+
+Reference:
+
+S. Sinha, S. Kandula, and D. Katabi, "Harnessing TCP's Burstiness with Flowlet Switching,"
+Proc. ACM HotNets, 2004.
+"""
+import random
+import zlib
+from collections.abc import Callable
+
+
+class ECMPDemux:
+    """
+    The constructor takes the groups of equal-cost output ports for each destination, and a
+    list of downstream elements for the corresponding output ports, as its input.
+
+    Parameters
+    ----------
+    env: simpy.Environment
+        the simulation environment.
+    groups: dict
+        the equal-cost groups. Key: destination, Value: list of output ports.
+    outs: list
+        list of downstream elements corresponding to the output ports.
+    ends: dict
+        the downstream elements for the flows that end at this element. Key: flow id,
+        Value: downstream element.
+    default:
+        default downstream element.
+    destination: function
+        a function that returns the destination of a packet. The default is a lambda
+        function that returns the packet's dst field, which is set by the packet generators
+        to the destination of their flows.
+    attachments: dict (or None)
+        a dictionary mapping each destination that has no group of its own to the node
+        that it is attached to, such as the top-of-rack switch of a host, whose group is
+        used instead. This keeps the groups as small as the number of top-of-rack switches.
+    flowlet_gap: float (or None)
+        the minimum gap between two consecutive packets of a flow that starts a new flowlet;
+        if None, flowlet switching is disabled, and each flow always uses the same port.
+    salt: int or str
+        a value mixed into the hash of each flow tuple, which should differ across switches
+        so that their choices of ports are not correlated.
+    rng: random number generator (or None)
+        the generator used to choose the ports of new flowlets, such as a `BlockRNG`
+        obtained from a `SeedTree`; the global `random` module is used if None.
+    idle_timeout: float (or None)
+        the time after which the entry of an idle flow is removed, so that its next packet
+        is hashed again as the first packet of a new flow; if None, entries are never removed.
+    """
+
+    def __init__(
+        self,
+        env,
+        groups: dict = None,
+        outs: list = None,
+        ends: dict = None,
+        default=None,
+        destination: Callable = lambda p: p.dst,
+        attachments: dict = None,
+        flowlet_gap: float = None,
+        salt=0,
+        rng=None,
+        idle_timeout: float = 1.0,
+    ) -> None:
+        self.env = env
+        self.groups = groups
+        self.outs = outs
+        self.ends = ends if ends else dict()
+        self.default = default
+        self.destination = destination
+        self.attachments = attachments if attachments is not None else dict()
+        self.flowlet_gap = flowlet_gap
+        self.salt = salt
+        self.rng = random if rng is None else rng
+        self.packets_received = 0
+        self.flowlets = 0
+        self.misses = 0
+
+        # the group, the current port, and the time of the last packet of each flow,
+        # so that the flow tuple is only looked up and hashed for the first packet
+        self.flows = dict()
+        self.idle_timeout = idle_timeout
+        # the time at which the entries of the idle flows are to be removed next
+        self.next_expiry = float("inf") if idle_timeout is None else idle_timeout
+
+    def expire_flows(self, now: float):
+        """Removes the entries of the flows that have been idle for longer than the idle
+        timeout, which takes time proportional to the number of flows once per timeout."""
+        self.flows = {
+            flow_id: flow for flow_id, flow in self.flows.items()
+            if now - flow[2] <= self.idle_timeout
+        }
+        self.next_expiry = now + self.idle_timeout
+
+    def flow_hash(self, packet, dst) -> int:
+        """Returns the hash of the flow tuple of a packet, which does not depend on Python's
+        randomized hashing of strings, so that simulations are reproducible."""
+        flow_tuple = (self.salt, packet.src, dst, packet.flow_id)
+        return zlib.crc32(repr(flow_tuple).encode())
+
+    def put(self, packet):
+        """ Sends a packet to this element. """
+        self.packets_received += 1
+        flow_id = packet.flow_id
+
+        if flow_id in self.ends:
+            self.ends[flow_id].put(packet)
+            return
+
+        now = self.env.now
+        if now >= self.next_expiry:
+            self.expire_flows(now)
+        flow = self.flows.get(flow_id)
+
+        if flow is None:
+            try:
+                dst = self.destination(packet)
+                if dst in self.groups:
+                    group = self.groups[dst]
+                else:
+                    group = self.groups[self.attachments[dst]]
+                port = group[self.flow_hash(packet, dst) % len(group)]
+            except (KeyError, IndexError, ValueError, ZeroDivisionError):
+                self.misses += 1
+                if self.default:
+                    self.default.put(packet)
+                return
+
+            flow = [group, port, now]
+            self.flows[flow_id] = flow
+        elif self.flowlet_gap is not None and now - flow[2] > self.flowlet_gap:
+            group = flow[0]
+            flow[1] = group[self.rng.randint(0, len(group) - 1)]
+            self.flowlets += 1
+
+        flow[2] = now
+        self.outs[flow[1]].put(packet)
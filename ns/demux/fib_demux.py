@@ -3,6 +3,17 @@ class FIBDemux:
     The constructor takes a list of downstream elements for the
     corresponding output ports as its input.
 
+    Packets from flows that are neither in the FIB nor in the ends are counted as misses and
+    sent to the default element, rather than reported one at a time.
+
+    In the compiled mode, the forwarding information base and the ends are compiled into a
+    single table mapping each flow ID directly to its downstream element, which is a list
+    indexed by flow IDs if they are all non-negative integers and at least half of the list
+    would be used, and a dictionary otherwise, such as when the flow IDs of the acks are
+    offset from those of the data packets. Each packet then costs a single lookup. The table
+    is compiled when the first packet arrives, and must be recompiled with `compile()` if
+    the FIB, the ends, or the output ports change afterwards.
+
     Parameters
     ----------
     fib: dict
@@ -13,23 +24,104 @@ class FIBDemux:
         list of downstream elements corresponding to the output ports
     default:
         default downstream element
+    compiled: bool
+        if True, uses a compiled forwarding table.
     """
     def __init__(self,
                  fib: dict = None,
                  outs: list = None,
                  ends: dict = None,
-                 default=None) -> None:
+                 default=None,
+                 compiled: bool = False) -> None:
         self.outs = outs
         self.default = default
         self.packets_received = 0
+        self.misses = 0
         self.fib = fib
         if ends:
             self.ends = ends
         else:
             self.ends = dict()
 
+        self.compiled = compiled
+        self.table = None
+        self.table_size = 0
+
+    def compile(self):
+        """Compiles the FIB and the ends into a table mapping flow IDs to downstream
+        elements, and forwards all further packets using the table. Raises ValueError if
+        a FIB entry does not map to one of the output ports."""
+        elements = {}
+        for flow_id, port in (self.fib or {}).items():
+            try:
+                if not 0 <= port < len(self.outs):
+                    raise IndexError
+                elements[flow_id] = self.outs[port]
+            except (IndexError, TypeError) as exc:
+                raise ValueError(f"FIB entry for flow {flow_id!r} has an invalid output "
+                                 f"port {port!r}") from exc
+        elements.update(self.ends)
+
+        # a list indexed by flow IDs is only used if at least half of it would be used
+        table_size = 0
+        if all(isinstance(flow_id, int) and flow_id >= 0 for flow_id in elements):
+            table_size = max(elements, default=-1) + 1
+        if 0 < table_size <= 2 * len(elements):
+            self.table_size = table_size
+            self.table = [None] * self.table_size
+            for flow_id, element in elements.items():
+                self.table[flow_id] = element
+            self.put = self.put_indexed
+        else:
+            self.table = elements
+            self.table_size = 0
+            self.put = self.put_mapped
+
+    def miss(self, packet):
+        """Counts a packet whose flow is not in the FIB or the ends, and sends it to the
+        default element, if any."""
+        self.misses += 1
+        if self.default:
+            self.default.put(packet)
+
+    def put_indexed(self, packet):
+        """Sends a packet to this element, using a compiled table indexed by flow IDs."""
+        self.packets_received += 1
+        flow_id = packet.flow_id
+
+        try:
+            element = self.table[flow_id] if 0 <= flow_id < self.table_size else None
+        except TypeError:
+            # flow IDs that are not integers cannot be in the table
+            element = None
+
+        if element is not None:
+            element.put(packet)
+        else:
+            self.miss(packet)
+
+    def put_mapped(self, packet):
+        """Sends a packet to this element, using a compiled table keyed by flow IDs."""
+        self.packets_received += 1
+        element = self.table.get(packet.flow_id)
+
+        if element is not None:
+            element.put(packet)
+        else:
+            self.miss(packet)
+
     def put(self, packet):
         """ Sends a packet to this element. """
+        if self.compiled:
+            # put() itself is rebound to the compiled method, which may then be wrapped,
+            # such as by the profiling hooks, so the first packet is sent directly
+            self.compile()
+            if isinstance(self.table, list):
+                self.put_indexed(packet)
+            else:
+                self.put_mapped(packet)
+            return
+
         self.packets_received += 1
         flow_id = packet.flow_id
 
@@ -38,7 +130,5 @@ class FIBDemux:
         else:
             try:
                 self.outs[self.fib[packet.flow_id]].put(packet)
-            except (KeyError, IndexError, ValueError) as exc:
-                print("FIB Demux Error: " + str(exc))
-                if self.default:
-                    self.default.put(packet)
+            except (KeyError, IndexError, ValueError):
+                self.miss(packet)
@@ -1,7 +1,9 @@
 """
 A demultiplexing element that chooses the output port at random.
 """
-from random import choices
+import random
+from bisect import bisect
+from itertools import accumulate
 
 
 class RandomDemux:
@@ -15,16 +17,25 @@ class RandomDemux:
         the simulation environment
     probs : List
         list of probabilities for the corresponding output ports
+    rng: random number generator (or None)
+        the generator used to choose the output ports, such as a `BlockRNG` obtained
+        from a `SeedTree`; the global `random` module is used if None.
     """
-    def __init__(self, env, probs):
+    def __init__(self, env, probs, rng=None):
         self.env = env
 
         self.probs = probs
         self.n_ports = len(self.probs)
+        self.rng = random if rng is None else rng
+        # the cumulative weights are computed once, rather than for each packet
+        self.cum_weights = list(accumulate(self.probs))
+        self.total_weight = self.cum_weights[-1] + 0.0
         self.outs = [None for __ in range(self.n_ports)]
         self.packets_received = 0
 
     def put(self, packet):
         """ Sends a packet to this element. """
         self.packets_received += 1
-        choices(self.outs, weights=self.probs)[0].put(packet)
+        port = bisect(self.cum_weights, self.rng.random() * self.total_weight, 0,
+                      self.n_ports - 1)
+        self.outs[port].put(packet)
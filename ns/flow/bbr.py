@@ -54,7 +54,9 @@ class BBRAckStates(Enum):
 
 
 def update_windowed_max_filter(_filter, value, time, window_length):
-    _filter[time % window_length] = value
+    # each slot keeps the maximum of the samples taken in its time slot, so that the
+    # filter does not just follow the latest sample; slots are reset when entered
+    _filter[time % window_length] = max(_filter[time % window_length], value)
     ret = 0
 
     for i in range(window_length):
@@ -65,7 +67,14 @@ def update_windowed_max_filter(_filter, value, time, window_length):
 
 
 class BBR(CongestionControl):
-    """The BBR congestion control algorithm."""
+    """The BBR congestion control algorithm.
+
+    Parameters
+    ----------
+    rng: random number generator (or None)
+        the generator used to randomize the wait before probing for bandwidth, such as
+        a `BlockRNG` obtained from a `SeedTree`; the global `random` module is used if None.
+    """
 
     def __init__(
         self,
@@ -75,8 +84,10 @@ class BBR(CongestionControl):
         inf: float = float("inf"),
         debug: bool = False,
         rtt_estimate: float = 0.1,
+        rng=None,
     ):
         super().__init__(mss, cwnd, ssthresh, debug)
+        self.rng = random if rng is None else rng
         self.bw_probe_samples = 0
         self.prior_cwnd = 0
         self.idle_restart = False
@@ -205,6 +216,7 @@ class BBR(CongestionControl):
             self.next_round_delivered = self.C.delivered
             self.round_count += 1
             self.round_count %= self.BBRExtraAckedFilterLen
+            self.BBRExtraAckedFilter[self.round_count] = 0
             self.round_start = True
 
     def bbr_update_max_bw(self):
@@ -307,8 +319,8 @@ class BBR(CongestionControl):
         self.next_round_delivered = self.C.delivered
 
     def bbr_pick_probe_wait(self):
-        self.rounds_since_bw_probe = random.randint(0, 1)
-        self.bw_probe_wait = 2.0 + random.uniform(0.0, 1.0)
+        self.rounds_since_bw_probe = self.rng.randint(0, 1)
+        self.bw_probe_wait = 2.0 + self.rng.uniform(0.0, 1.0)
 
     def bbr_start_probebw_down(self):
         self.bbr_reset_congestion_signals()
@@ -334,6 +346,7 @@ class BBR(CongestionControl):
     def bbr_advance_max_bw_filter(self):
         self.cycle_count += 1
         self.cycle_count %= self.MaxBwFilterLen
+        self.BBRMaxBwFilter[self.cycle_count] = 0
 
     def bbr_is_inflight_too_high(self):
         return self.rs.lost > self.rs.tx_in_flight * self.BBRLossThresh
@@ -0,0 +1,372 @@
+"""
+Implements a flow-level (fluid) simulation of a network topology, which models each flow as a
+continuous stream of bits rather than as individual packets, for capacity planning studies on
+large topologies where per-packet fidelity is not needed.
+
+At any time, the active flows share the capacity of the links along their paths according to
+the (weighted) max-min fair allocation, which is what an ideal fair queueing scheduler (such as
+WFQ or DRR) would converge to on every outgoing port. The allocation is computed by progressive
+filling: the rates of all flows are increased together, in proportion to their weights, until a
+link is saturated or a flow reaches its demand; the flows through the saturated link (or the
+flow at its demand) are then frozen at their current rates, and the remaining flows continue to
+be filled.
+
+The simulation only advances from one event to the next: the start of a flow, the completion
+of a flow that has transferred all of its bytes, and the finish time of a flow. The projected
+completion times of the flows are kept in a heap, and the bytes transferred by a flow are only
+accounted for when its rate changes. After each event, the rates are only recomputed for the
+flows that share links, directly or through other flows, with the flows that have started or
+completed, as the max-min fair rates of the other flows are unaffected. The cost of an event is
+therefore proportional to the number of flows whose rates it may change, rather than to the
+number of active flows. On topologies where most flows end up sharing links with each other
+(such as a loaded fat-tree), this is still most of the active flows; an update interval can
+then be set, so that the rates are only recomputed at most once per interval, using the rates
+from the previous update in the meantime.
+
+The loads of selected links can be recorded over time, and used as the background loads of the
+ports and schedulers in a hybrid simulation, in which a few flows of interest are simulated
+packet by packet over the same links (see `ns.utils.background`).
+
+Reference:
+
+D. Bertsekas and R. Gallager, "Data Networks," 2nd ed., Prentice Hall, 1992, Section 6.5.2.
+"""
+import heapq
+import math
+from collections import defaultdict as dd
+
+from ns.utils.background import BackgroundLoad
+
+
+class FluidSimulation:
+    """Simulates flows over a topology at the flow level, with (weighted) max-min fair rates.
+
+    Parameters
+    ----------
+    G: networkx.Graph
+        the topology. The capacity of a link (in bits per second, in each direction) can be
+        set as the 'capacity' attribute of its edge.
+    flows: dict
+        a dictionary mapping flow IDs to `Flow` objects, such as those generated by
+        `ns.topos.utils.generate_flows()`, each with a path. A flow starts at its start time
+        (0 if None) and completes when `size` bytes have been transferred; a flow without a
+        size does not complete, and a flow stops at its finish time, if any.
+    capacity: float
+        the capacity of the links without a 'capacity' attribute, in bits per second.
+    weights: dict (or None)
+        a dictionary mapping flow IDs to their weights; each flow has a weight of 1 if None.
+    demands: dict (or None)
+        a dictionary mapping flow IDs to their maximum rates, in bits per second; flows that
+        are not in the dictionary are limited only by the capacities of the links.
+    interval: float
+        the minimum time between two updates of the rates; if 0, the rates are updated
+        after every event. With hundreds of thousands of flows or more that share links with
+        each other, an interval is needed for the simulation to run in seconds.
+    record_links: list (or None)
+        a list of (u, v) pairs of nodes, for each of which the total rate of the flows over
+        the link from u to v is recorded over time, so that it can be used as the background
+        load of a packet-level simulation of the link.
+    debug: bool
+        If True, prints more verbose debug information.
+    """
+
+    def __init__(
+        self,
+        G,
+        flows: dict,
+        capacity: float,
+        weights: dict = None,
+        demands: dict = None,
+        interval: float = 0,
+        record_links: list = None,
+        debug: bool = False,
+    ):
+        self.flows = flows
+        self.weights = weights if weights is not None else {}
+        self.demands = demands if demands is not None else {}
+        self.interval = interval
+        self.debug = debug
+        self.now = 0.0
+
+        # each direction of an edge is a link, identified by its index
+        self.link_index = {}
+        self.capacities = []
+        self.paths = {}
+        for fid, flow in flows.items():
+            path = []
+            for u, v in zip(flow.path, flow.path[1:]):
+                link = self.link_index.get((u, v))
+                if link is None:
+                    link = len(self.capacities)
+                    self.link_index[(u, v)] = link
+                    self.capacities.append(G.edges[u, v].get("capacity", capacity))
+                path.append(link)
+            self.paths[fid] = path
+
+        self.active = set()
+        self.rates = {}
+        # the number of bytes that remain to be transferred by each active flow, and the time
+        # up to which the bytes it transferred have been accounted for
+        self.remaining = {}
+        self.settled = {}
+        self.bytes_sent = dd(lambda: 0.0)
+        # the active flows over each link
+        self.link_flows = dd(set)
+        # the projected completion times of the active flows, as (time, version, flow ID);
+        # an entry is out of date, and skipped, if its version is not the flow's current one
+        self.completions = []
+        self.versions = {}
+        # the flows that have started, and the links whose flows have changed, since the
+        # rates were last computed
+        self.new_flows = set()
+        self.changed_links = set()
+        self.start_times = {}
+        self.completion_times = {}
+        self.last_update = -math.inf
+        self.allocations = 0
+
+        # the load of each recorded link over time, as a list of (time, rate) pairs
+        self.link_loads = {}
+        self.recorded_links = {}
+        for u, v in record_links if record_links is not None else []:
+            self.link_loads[(u, v)] = [(0.0, 0.0)]
+            if (u, v) in self.link_index:
+                self.recorded_links[self.link_index[(u, v)]] = (u, v)
+
+        # the starts and finish times of the flows, in the order of their times
+        self.events = []
+        for fid, flow in flows.items():
+            start = flow.start_time if flow.start_time is not None else 0.0
+            self.events.append((start, 0, fid))
+            if flow.finish_time is not None:
+                self.events.append((flow.finish_time, 1, fid))
+        heapq.heapify(self.events)
+
+    def affected_flows(self) -> set:
+        """Returns the active flows whose rates may have changed since the last allocation:
+        the flows that have started, and the flows that share links, directly or through
+        other flows, with the flows that have started or completed."""
+        flows = set(self.new_flows)
+        links = list(self.changed_links)
+        seen = set(links)
+        while links:
+            for fid in self.link_flows[links.pop()]:
+                if fid not in flows:
+                    flows.add(fid)
+                    for link in self.paths[fid]:
+                        if link not in seen:
+                            seen.add(link)
+                            links.append(link)
+
+        self.new_flows.clear()
+        self.changed_links.clear()
+        return flows
+
+    def allocate(self):
+        """Computes the (weighted) max-min fair rates of the affected active flows using
+        progressive filling. The links of these flows carry no other active flows, so
+        that the rates of the other flows remain max-min fair."""
+        self.allocations += 1
+        self.last_update = self.now
+
+        active = self.affected_flows()
+        paths = self.paths
+        weights = {fid: self.weights.get(fid, 1) for fid in active}
+
+        capacity = {}
+        weight_sum = {}
+        flows_on = {}
+        for fid, weight in weights.items():
+            for link in paths[fid]:
+                if link in capacity:
+                    weight_sum[link] += weight
+                    flows_on[link].append(fid)
+                else:
+                    capacity[link] = self.capacities[link]
+                    weight_sum[link] = weight
+                    flows_on[link] = [fid]
+
+        # the fill level at which each link is saturated, or each flow reaches its demand;
+        # entries for links become stale when their level changes, and are then skipped
+        levels = [(capacity[link] / weight_sum[link], link, None) for link in capacity]
+        for fid, weight in weights.items():
+            if fid in self.demands:
+                levels.append((self.demands[fid] / weight, -1, fid))
+        heapq.heapify(levels)
+
+        rates = {}
+        while levels:
+            level, link, fid = heapq.heappop(levels)
+
+            if fid is not None:
+                frozen = [fid] if fid not in rates else []
+            elif weight_sum[link] > 0 and level == capacity[link] / weight_sum[link]:
+                frozen = [f for f in flows_on[link] if f not in rates]
+            else:
+                continue
+
+            for fid in frozen:
+                weight = weights[fid]
+                rate = weight * level
+                rates[fid] = rate
+                for other in paths[fid]:
+                    remaining = capacity[other] - rate
+                    capacity[other] = remaining if remaining > 0.0 else 0.0
+                    weight_sum[other] -= weight
+                    if weight_sum[other] > 1e-12:
+                        heapq.heappush(
+                            levels, (capacity[other] / weight_sum[other], other, None))
+                    else:
+                        weight_sum[other] = 0.0
+
+        # flows without any link (between a host and itself) are only limited by demands
+        for fid in active:
+            if fid not in rates:
+                rates[fid] = self.demands.get(fid, math.inf)
+
+        for fid, rate in rates.items():
+            self.set_rate(fid, rate)
+
+    def settle(self, fid):
+        """Accounts for the bytes transferred by an active flow up to the current time."""
+        elapsed = self.now - self.settled[fid]
+        if elapsed > 0:
+            sent = self.rates[fid] * elapsed / 8.0
+            self.bytes_sent[fid] += sent
+            self.remaining[fid] -= sent
+        self.settled[fid] = self.now
+
+    def set_rate(self, fid, rate: float):
+        """Changes the rate of an active flow, and updates its projected completion time."""
+        if rate == self.rates[fid]:
+            return
+
+        self.settle(fid)
+        self.rates[fid] = rate
+
+        version = self.versions[fid] + 1
+        self.versions[fid] = version
+        remaining = self.remaining[fid]
+        if remaining != math.inf and rate > 0:
+            heapq.heappush(self.completions, (self.now + remaining * 8.0 / rate, version, fid))
+
+    def advance(self, time: float):
+        """Advances the simulation to the given time. The transfers of the active flows are
+        accounted for when their rates change, when they complete, and when `run()` returns."""
+        self.now = time
+
+    def next_completion(self) -> tuple:
+        """Returns the time at which the next active flow will complete, and its flow ID."""
+        completions = self.completions
+        while completions:
+            time, version, fid = completions[0]
+            if self.versions.get(fid) == version:
+                return time, fid
+            heapq.heappop(completions)
+        return math.inf, None
+
+    def complete(self, fid):
+        """Removes a flow that has completed, or that has reached its finish time."""
+        self.settle(fid)
+        self.active.discard(fid)
+        self.completion_times[fid] = self.now
+        del self.remaining[fid]
+        del self.settled[fid]
+        del self.rates[fid]
+        del self.versions[fid]
+
+        self.new_flows.discard(fid)
+        for link in self.paths[fid]:
+            self.link_flows[link].discard(fid)
+            self.changed_links.add(link)
+
+        if self.debug:
+            print(f"At time {self.now:.6f}, flow {fid} completed after sending "
+                  f"{self.bytes_sent[fid]:.0f} bytes.")
+
+    def run(self, until: float = math.inf):
+        """Runs the simulation until the given time, or until all flows have completed."""
+        pending_update = False
+
+        while True:
+            completion_time, completion_fid = self.next_completion()
+            event_time = self.events[0][0] if self.events else math.inf
+            update_time = self.last_update + self.interval if pending_update else math.inf
+            time = min(completion_time, event_time, update_time)
+
+            if time > until or time == math.inf:
+                if until < math.inf:
+                    self.advance(until)
+                for fid in self.active:
+                    self.settle(fid)
+                return
+
+            self.advance(time)
+            changed = False
+
+            if completion_time <= time:
+                # all the flows completing at this time (up to rounding errors) are removed
+                while completion_fid is not None:
+                    if completion_time > self.now:
+                        self.settle(completion_fid)
+                        if self.remaining[completion_fid] > 1e-6:
+                            break
+                    self.complete(completion_fid)
+                    completion_time, completion_fid = self.next_completion()
+                changed = True
+
+            # all the flows that start or finish at this time are handled together
+            while self.events and self.events[0][0] <= self.now:
+                __, kind, fid = heapq.heappop(self.events)
+                if kind == 0:
+                    size = self.flows[fid].size
+                    self.active.add(fid)
+                    self.start_times[fid] = self.now
+                    self.remaining[fid] = size if size is not None else math.inf
+                    self.settled[fid] = self.now
+                    self.rates[fid] = 0.0
+                    self.versions[fid] = 0
+                    self.new_flows.add(fid)
+                    for link in self.paths[fid]:
+                        self.link_flows[link].add(fid)
+                        self.changed_links.add(link)
+                elif fid in self.active:
+                    self.complete(fid)
+                changed = True
+
+            if changed or pending_update:
+                if self.now >= self.last_update + self.interval:
+                    self.allocate()
+                    pending_update = False
+                else:
+                    pending_update = True
+                self.record_loads()
+
+    def record_loads(self):
+        """Records the current loads of the recorded links."""
+        if not self.recorded_links:
+            return
+
+        for link, edge in self.recorded_links.items():
+            load = sum(self.rates[fid] for fid in self.link_flows[link])
+            profile = self.link_loads[edge]
+            if profile[-1][0] == self.now:
+                profile[-1] = (self.now, load)
+            elif profile[-1][1] != load:
+                profile.append((self.now, load))
+
+    def background_load(self, u, v) -> BackgroundLoad:
+        """Returns the recorded load of the link from u to v over time, as the background
+        load of a port or a scheduler serving the same link at the packet level."""
+        return BackgroundLoad(self.link_loads[(u, v)])
+
+    def flow_completion_time(self, fid) -> float:
+        """Returns the time taken by a flow from its start to its completion."""
+        return self.completion_times[fid] - self.start_times[fid]
+
+    def average_rate(self, fid) -> float:
+        """Returns the average rate of a flow since its start, in bits per second."""
+        end = self.completion_times.get(fid, self.now)
+        if end <= self.start_times[fid]:
+            return 0.0
+        return self.bytes_sent[fid] * 8.0 / (end - self.start_times[fid])
@@ -8,7 +8,7 @@ import simpy
 
 from ns.packet.packet import Packet
 from ns.packet.rate_sample import Connection, RateSample
-from ns.utils.timer import Timer
+from ns.utils.timer import TimerWheel
 
 
 class BBRPacketGenerator:
@@ -25,6 +25,9 @@ class BBRPacketGenerator:
     rec_flow: bool
         Are we recording the statistics of packets generated?
     rate_sample: RateSample
+    timer_wheel: TimerWheel
+        The timer wheel that manages the retransmission timer, which may be shared by many
+        generators. If None, the generator uses a timer wheel of its own.
     """
 
     def __init__(
@@ -36,6 +39,7 @@ class BBRPacketGenerator:
         rtt_estimate=0.14,
         granularity=0.01,
         debug=True,
+        timer_wheel=None,
     ):
         self.element_id = element_id
         self.env = env
@@ -72,6 +76,8 @@ class BBRPacketGenerator:
         # the in-flight packets (segments)
         self.sent_packets = {}
 
+        # the retransmission timer, managed by a timer wheel rather than a simpy process
+        self.timer_wheel = TimerWheel(env) if timer_wheel is None else timer_wheel
         self.timer = None
         self.to_pkt_id = 0
 
@@ -122,6 +128,7 @@ class BBRPacketGenerator:
                     self.mss,
                     self.next_seq,
                     src=self.flow.src,
+                    dst=self.flow.dst,
                     flow_id=self.flow.fid,
                     tx_in_flight=self.packet_in_flight,
                 )
@@ -160,7 +167,7 @@ class BBRPacketGenerator:
                 )
 
                 if self.timer is None:
-                    self.timer = Timer(self.env, 0, self.timeout_callback, self.rto)
+                    self.timer = self.timer_wheel.timer(0, self.timeout_callback, self.rto)
                     self.to_pkt_id = packet.packet_id
 
                 if self.debug:
@@ -254,7 +261,7 @@ class BBRPacketGenerator:
             )
             self.rto = max(self.rto, 1)
         else:
-            sample_err = self.rtt_estimate - sample_rtt
+            sample_err = abs(self.rtt_estimate - sample_rtt)
             self.est_deviation = (3 * self.est_deviation + sample_err) / 4
             self.rtt_estimate = (7 * self.rtt_estimate + sample_rtt) / 8
             self.rto = min(
@@ -262,10 +269,14 @@ class BBRPacketGenerator:
             )
             self.rto = max(self.rto, 1)
 
+        prior_max_ack = self.max_ack
         self.max_ack = max(self.max_ack, ack.ack)
 
-        if ack.packet_id == self.to_pkt_id and self.max_ack < self.next_seq:
-            self.timer.restart(self.rto, self.sent_packets[self.max_ack].time)
+        # the timer is restarted whenever new data is acknowledged (RFC 6298), as a delayed
+        # or stretch acknowledgment may not be the acknowledgment of the segment that the
+        # timer has been set for
+        if self.max_ack > prior_max_ack and self.max_ack < self.next_seq:
+            self.timer.restart(self.rto)
 
         if self.dupack == 2:
             self.congestion_control.C.lost += self.sent_packets[ack.ack].size
@@ -329,7 +340,8 @@ class BBRPacketGenerator:
                 self.sent_packets[ack.packet_id].delivered_time = 0
                 self.sent_packets[ack.packet_id].self_lost = False
 
-            for i in range(self.max_ack, ack.ack, self.mss):
+            # all the segments covered by the acknowledgment have been delivered
+            for i in range(prior_max_ack, ack.ack, self.mss):
                 if i in self.sent_packets.keys():
                     if self.sent_packets[i].delivered_time:
                         self.packet_in_flight -= self.sent_packets[i].size
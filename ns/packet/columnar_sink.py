@@ -0,0 +1,182 @@
+"""
+Implements a ColumnarPacketSink, which records the same statistics as a PacketSink,
+but stores them in compact typed columns rather than in per-flow lists of Python
+objects.
+
+All packets share a single table: each arriving packet appends one row, and the
+flow that the packet belongs to is stored as a small integer index into the list of
+flows seen so far. The columns are growable `array.array` buffers holding
+unboxed float64 and int32 values, which can be exported as NumPy arrays with a
+single memory copy per column, or saved to an `.npz` file.
+"""
+
+from array import array
+from collections import defaultdict as dd
+
+import numpy as np
+
+
+class ColumnarPacketSink:
+    """A ColumnarPacketSink records the arrival times, waiting times, sizes and (optionally)
+    per-hop arrival times of the incoming packets into typed columns.
+
+    Parameters
+    ----------
+    env: simpy.Environment
+        the simulation environment
+    rec_arrivals: bool
+        if True, arrivals will be recorded
+    absolute_arrivals: bool
+        if True absolute arrival times will be returned by `arrivals()`, otherwise the
+        time between consecutive arrivals is returned.
+    rec_waits: bool
+        if True, the waiting times experienced by the packets are recorded
+    rec_flow_ids: bool
+        if True, the flow IDs that the packets are used as the index for recording;
+        otherwise, the 'src' field in the packets are used
+    rec_perhop_times: bool
+        if True, the per-hop arrival times of the packets are recorded as three extra
+        columns (row, element, time), one entry per hop
+    debug: bool
+        If True, prints more verbose debug information.
+    """
+
+    def __init__(
+        self,
+        env,
+        rec_arrivals: bool = True,
+        absolute_arrivals: bool = True,
+        rec_waits: bool = True,
+        rec_flow_ids: bool = True,
+        rec_perhop_times: bool = False,
+        debug: bool = False,
+    ):
+        self.env = env
+        self.rec_arrivals = rec_arrivals
+        self.absolute_arrivals = absolute_arrivals
+        self.rec_waits = rec_waits
+        self.rec_flow_ids = rec_flow_ids
+        self.rec_perhop_times = rec_perhop_times
+        self.debug = debug
+
+        # mapping flow IDs (or sources) to their indices in the 'flow' column
+        self.flow_index = {}
+        self.flow_ids = []
+        # mapping element IDs to their indices in the 'hop_element' column
+        self.element_index = {}
+        self.element_ids = []
+
+        # one row per packet received
+        self.flow = array("i")
+        self.arrival = array("d")
+        self.time = array("d")
+        self.size = array("d")
+
+        # one row per hop of each packet received
+        self.hop_row = array("q")
+        self.hop_element = array("i")
+        self.hop_time = array("d")
+
+        self.packets_received = dd(lambda: 0)
+        self.bytes_received = dd(lambda: 0)
+
+    def put(self, packet):
+        """Sends a packet to this element."""
+        now = self.env.now
+
+        if self.rec_flow_ids:
+            rec_index = packet.flow_id
+        else:
+            rec_index = packet.src
+
+        index = self.flow_index.get(rec_index)
+        if index is None:
+            index = len(self.flow_ids)
+            self.flow_index[rec_index] = index
+            self.flow_ids.append(rec_index)
+
+        if self.rec_waits or self.rec_arrivals:
+            if self.rec_perhop_times and packet.has_perhop_time:
+                row = len(self.flow)
+                for element_id, hop_time in packet.perhop_time.items():
+                    element = self.element_index.get(element_id)
+                    if element is None:
+                        element = len(self.element_ids)
+                        self.element_index[element_id] = element
+                        self.element_ids.append(element_id)
+                    self.hop_row.append(row)
+                    self.hop_element.append(element)
+                    self.hop_time.append(hop_time)
+
+            self.flow.append(index)
+            self.arrival.append(now)
+            self.time.append(packet.time)
+            self.size.append(packet.size)
+
+        if self.debug:
+            print(
+                "At time {:.2f}, packet {:d} in flow {} arrived.".format(
+                    now, packet.packet_id, packet.flow_id
+                )
+            )
+
+        self.packets_received[rec_index] += 1
+        self.bytes_received[rec_index] += packet.size
+
+        if packet.pool is not None:
+            # the packet has reached its destination, and can be recycled
+            packet.pool.release(packet)
+
+    def flow_mask(self, flow_id) -> np.ndarray:
+        """Returns a boolean mask selecting the rows that belong to a flow."""
+        if flow_id not in self.flow_index:
+            return np.zeros(len(self.flow), dtype=bool)
+
+        return np.frombuffer(self.flow, dtype=np.int32) == self.flow_index[flow_id]
+
+    def arrivals(self, flow_id) -> np.ndarray:
+        """Returns the arrival times (or inter-arrival times) of the packets in a flow."""
+        arrivals = np.frombuffer(self.arrival, dtype=np.float64)[self.flow_mask(flow_id)]
+
+        if self.absolute_arrivals or len(arrivals) == 0:
+            return arrivals
+
+        return np.diff(arrivals, prepend=0.0)
+
+    def waits(self, flow_id) -> np.ndarray:
+        """Returns the waiting times experienced by the packets in a flow."""
+        mask = self.flow_mask(flow_id)
+        return (
+            np.frombuffer(self.arrival, dtype=np.float64)[mask]
+            - np.frombuffer(self.time, dtype=np.float64)[mask]
+        )
+
+    def packet_sizes(self, flow_id) -> np.ndarray:
+        """Returns the sizes of the packets in a flow."""
+        return np.frombuffer(self.size, dtype=np.float64)[self.flow_mask(flow_id)]
+
+    def packet_times(self, flow_id) -> np.ndarray:
+        """Returns the creation times of the packets in a flow."""
+        return np.frombuffer(self.time, dtype=np.float64)[self.flow_mask(flow_id)]
+
+    def to_numpy(self) -> dict:
+        """Returns copies of all the recorded columns as NumPy arrays."""
+        columns = {
+            "flow": np.array(self.flow, dtype=np.int32),
+            "arrival": np.array(self.arrival, dtype=np.float64),
+            "time": np.array(self.time, dtype=np.float64),
+            "size": np.array(self.size, dtype=np.float64),
+            "flow_ids": np.asarray(self.flow_ids),
+        }
+
+        if self.rec_perhop_times:
+            columns["hop_row"] = np.array(self.hop_row, dtype=np.int64)
+            columns["hop_element"] = np.array(self.hop_element, dtype=np.int32)
+            columns["hop_time"] = np.array(self.hop_time, dtype=np.float64)
+            columns["element_ids"] = np.asarray(self.element_ids)
+
+        return columns
+
+    def save(self, filename):
+        """Saves all the recorded columns to an uncompressed `.npz` file."""
+        np.savez(filename, **self.to_numpy())
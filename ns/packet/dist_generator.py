@@ -29,8 +29,16 @@ class DistPacketGenerator:
         Starts generation after an initial delay. Defaults to 0.
     finish: number
         Stops generation at the finish time. Defaults to infinite.
+    flow_id: int
+        the flow ID of the packets.
+    dst:
+        the destination of the packets, such as the host that receives the flow, which
+        is used by demultiplexers that forward packets by their destinations.
     rec_flow: bool
         Are we recording the statistics of packets generated?
+    pool: PacketPool
+        If provided, packets are drawn from this pool rather than newly allocated,
+        and are returned to it by the sink or drop site where their life ends.
     """
 
     def __init__(
@@ -43,7 +51,9 @@ class DistPacketGenerator:
         finish=None,
         size=None,
         flow_id=0,
+        dst="destination",
         rec_flow=False,
+        pool=None,
         debug=False,
     ):
         self.element_id = element_id
@@ -58,27 +68,30 @@ class DistPacketGenerator:
         self.sent_size = 0
         self.action = env.process(self.run())
         self.flow_id = flow_id
+        self.dst = dst
 
         self.rec_flow = rec_flow
         self.time_rec = []
         self.size_rec = []
+        self.pool = pool
         self.debug = debug
 
     def run(self):
         """The generator function used in simulations."""
         yield self.env.timeout(self.initial_delay)
 
+        new_packet = Packet if self.pool is None else self.pool.acquire
+
         while self.env.now < self.finish and self.sent_size < self.size:
-            packet = Packet(
+            packet = new_packet(
                 self.env.now,
                 self.size_dist(),
                 self.packets_sent,
                 src=self.element_id,
+                dst=self.dst,
                 flow_id=self.flow_id,
             )
 
-            self.out.put(packet)
-
             self.packets_sent += 1
             self.sent_size += packet.size
 
@@ -98,5 +111,9 @@ class DistPacketGenerator:
                     )
                 )
 
+            # the packet may be recycled by a downstream sink as soon as it is sent,
+            # so all statistics must be recorded before this point
+            self.out.put(packet)
+
             # waits for the next transmission
             yield self.env.timeout(self.arrival_dist())
@@ -1,6 +1,11 @@
 """
 A very simple class that represents a packet.
 """
+from types import MappingProxyType
+
+# a shared, read-only empty mapping that stands for the per-hop arrival times of packets
+# that have none, so that no dictionary is allocated for them
+NO_PERHOP_TIME = MappingProxyType({})
 
 
 class Packet:
@@ -16,6 +21,10 @@ class Packet:
     We use a float to represent the size of the packet in bytes so that we can
     compare to ideal M/M/1 queues.
 
+    Packets use `__slots__` to keep their memory footprint small, and the `prio`
+    and `perhop_time` dictionaries are only allocated when they are first used,
+    since most topologies (e.g., FIFO-only ones) never touch them.
+
     Parameters
     ----------
     time: float
@@ -30,6 +39,31 @@ class Packet:
         an integer or string that can be used to identify a flow
     """
 
+    __slots__ = (
+        "time",
+        "delivered_time",
+        "first_sent_time",
+        "size",
+        "packet_id",
+        "realtime",
+        "src",
+        "dst",
+        "flow_id",
+        "payload",
+        "lost",
+        "self_lost",
+        "tx_in_flight",
+        "delivered",
+        "is_app_limited",
+        "color",
+        "ack",
+        "sack",
+        "current_time",
+        "pool",
+        "_prio",
+        "_perhop_time",
+    )
+
     def __init__(
         self,
         time,
@@ -47,7 +81,6 @@ class Packet:
         self.time = time
         self.delivered_time = last_ack_time
         self.first_sent_time = 0
-        # self.sent_time = 0
         self.size = size
         self.packet_id = packet_id
         self.realtime = realtime
@@ -65,10 +98,40 @@ class Packet:
 
         self.is_app_limited = False
         self.color = None  # Used by the two-rate tri-color token bucket shaper
-        self.prio = {}  # used by the Static Priority scheduler
         self.ack = None  # used by TCPPacketGenerator and TCPSink
+        self.sack = None  # the selective acknowledgment blocks of an ack, used by TCPSink
         self.current_time = 0  # used by the Wire element
-        self.perhop_time = {}  # used by Port to record per-hop arrival times
+        self.pool = None  # the PacketPool this packet is to be returned to, if any
+        self._prio = None  # used by the Static Priority scheduler
+        self._perhop_time = None  # used by Port to record per-hop arrival times
+
+    @property
+    def prio(self) -> dict:
+        """The priorities assigned to this packet by each Static Priority scheduler."""
+        if self._prio is None:
+            self._prio = {}
+        return self._prio
+
+    @prio.setter
+    def prio(self, value):
+        self._prio = value
+
+    @property
+    def perhop_time(self) -> dict:
+        """The arrival times of this packet at each port along its path."""
+        if self._perhop_time is None:
+            self._perhop_time = {}
+        return self._perhop_time
+
+    @perhop_time.setter
+    def perhop_time(self, value):
+        self._perhop_time = value
+
+    @property
+    def has_perhop_time(self) -> bool:
+        """True if any per-hop arrival times have been recorded for this packet, which can
+        be checked without allocating the `perhop_time` dictionary."""
+        return self._perhop_time is not None
 
     def __repr__(self):
         return f"id: {self.packet_id}, src: {self.src}, time: {self.time}, size: {self.size}"
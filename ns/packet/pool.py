@@ -0,0 +1,58 @@
+"""
+Implements a packet pool, which allows packets to be recycled rather than
+allocated afresh for each transmission.
+
+Packet generators that are given a pool draw their packets from it, and the
+pool is recorded in the `pool` field of each packet. Elements where a packet's
+life ends --- sinks, as well as drop sites such as the tail-drop buffer in a
+`Port`, the RED buffer in a `REDPort`, and packet losses on a `Wire` --- return
+the packet to its pool. Packets that do not belong to a pool are left alone, so
+the pool is entirely opt-in.
+
+Once a packet has been returned, it may be handed out again by the next call to
+`acquire()`, and must therefore no longer be referenced by any element.
+"""
+from ns.packet.packet import Packet
+
+
+class PacketPool:
+    """A free list of packets that can be reused by packet generators.
+
+    Parameters
+    ----------
+    capacity: int (or None)
+        the maximum number of free packets kept in the pool; packets returned
+        beyond this limit are left to the garbage collector. Defaults to unlimited.
+    """
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity
+        self.free = []
+        self.packets_allocated = 0
+        self.packets_reused = 0
+        self.packets_released = 0
+
+    def acquire(self, *args, **kwargs) -> Packet:
+        """Returns a packet initialized with the same arguments as the `Packet`
+        constructor, reusing a free packet whenever one is available."""
+        if self.free:
+            packet = self.free.pop()
+            packet.__init__(*args, **kwargs)
+            self.packets_reused += 1
+        else:
+            packet = Packet(*args, **kwargs)
+            self.packets_allocated += 1
+
+        packet.pool = self
+        return packet
+
+    def release(self, packet):
+        """Returns a packet to the pool once it is no longer referenced."""
+        packet.pool = None
+        self.packets_released += 1
+
+        if self.capacity is None or len(self.free) < self.capacity:
+            self.free.append(packet)
+
+    def __len__(self):
+        return len(self.free)
@@ -10,6 +10,8 @@ from collections import defaultdict as dd
 
 import simpy
 
+from ns.packet.packet import NO_PERHOP_TIME
+
 
 class PacketSink:
     """A PacketSink is designed to record both arrival times and waiting times from the incoming
@@ -30,6 +32,10 @@ class PacketSink:
     rec_flow_ids: bool
         if True, the flow IDs that the packets are used as the index for recording;
         otherwise, the 'src' field in the packets are used
+    rec_perhop_times: bool
+        if True (and `rec_waits` is True), the per-hop arrival times of the packets
+        are recorded as well, with an empty read-only mapping for the packets that have
+        none, so that they match the other recorded values one to one
     debug: bool
         If True, prints more verbose debug information.
     """
@@ -42,12 +48,14 @@ class PacketSink:
         rec_waits: bool = True,
         rec_flow_ids: bool = True,
         debug: bool = False,
+        rec_perhop_times: bool = True,
     ):
         self.store = simpy.Store(env)
         self.env = env
         self.rec_waits = rec_waits
         self.rec_flow_ids = rec_flow_ids
         self.rec_arrivals = rec_arrivals
+        self.rec_perhop_times = rec_perhop_times
         self.absolute_arrivals = absolute_arrivals
         self.waits = dd(list)
         self.arrivals = dd(list)
@@ -76,7 +84,12 @@ class PacketSink:
             self.waits[rec_index].append(self.env.now - packet.time)
             self.packet_sizes[rec_index].append(packet.size)
             self.packet_times[rec_index].append(packet.time)
-            self.perhop_times[rec_index].append(packet.perhop_time)
+            if self.rec_perhop_times:
+                # a shared empty mapping stands for packets without per-hop arrival
+                # times, so that no dictionary is allocated for each of them
+                self.perhop_times[rec_index].append(
+                    packet.perhop_time if packet.has_perhop_time else NO_PERHOP_TIME
+                )
             self.arrivals[rec_index].append(self.env.now)
 
         if self.rec_arrivals:
@@ -108,3 +121,7 @@ class PacketSink:
 
         self.packets_received[rec_index] += 1
         self.bytes_received[rec_index] += packet.size
+
+        if packet.pool is not None:
+            # the packet has reached its destination, and can be recycled
+            packet.pool.release(packet)
@@ -0,0 +1,151 @@
+"""
+Implements a StatsPacketSink, which keeps streaming summary statistics of the packet delays
+and the throughput of each flow, rather than recording every packet that arrived. The amount
+of memory used per flow is bounded, regardless of how long the simulation runs, and the
+statistics can be queried while the simulation is still running.
+
+Statistics kept by different sinks (for example, by sinks in different replications of the
+same simulation) can be merged together.
+"""
+from ns.utils.stats import DDSketch, RunningStats, WindowedRate
+
+
+class FlowStats:
+    """The summary statistics of a single flow.
+
+    Parameters
+    ----------
+    relative_accuracy: float
+        The relative accuracy of the delay quantile estimates.
+    window: float
+        The length of each window over which the throughput is measured.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, window: float = 1.0):
+        self.delays = RunningStats()
+        self.delay_sketch = DDSketch(relative_accuracy)
+        self.throughput = WindowedRate(window)
+
+    def add(self, now, packet):
+        """Adds a packet that arrived at time `now`."""
+        delay = now - packet.time
+        self.delays.add(delay)
+        self.delay_sketch.add(delay)
+        self.throughput.add(now, packet.size)
+
+    def merge(self, other):
+        """Merges the statistics of another flow into this one."""
+        self.delays.merge(other.delays)
+        self.delay_sketch.merge(other.delay_sketch)
+        self.throughput.merge(other.throughput)
+
+
+class StatsPacketSink:
+    """A StatsPacketSink maintains online statistics of the delays (mean, variance and
+    quantiles) and the throughput of the incoming packets, for each flow.
+
+    Parameters
+    ----------
+    env: simpy.Environment
+        the simulation environment
+    rec_flow_ids: bool
+        if True, the flow IDs that the packets are used as the index for recording;
+        otherwise, the 'src' field in the packets are used
+    relative_accuracy: float
+        the relative accuracy of the delay quantile estimates
+    window: float
+        the length of each window over which the throughput is measured
+    debug: bool
+        If True, prints more verbose debug information.
+    """
+
+    def __init__(
+        self,
+        env,
+        rec_flow_ids: bool = True,
+        relative_accuracy: float = 0.01,
+        window: float = 1.0,
+        debug: bool = False,
+    ):
+        self.env = env
+        self.rec_flow_ids = rec_flow_ids
+        self.relative_accuracy = relative_accuracy
+        self.window = window
+        self.debug = debug
+
+        self.stats = {}
+
+    def put(self, packet):
+        """Sends a packet to this element."""
+        now = self.env.now
+
+        if self.rec_flow_ids:
+            rec_index = packet.flow_id
+        else:
+            rec_index = packet.src
+
+        flow_stats = self.stats.get(rec_index)
+        if flow_stats is None:
+            flow_stats = FlowStats(self.relative_accuracy, self.window)
+            self.stats[rec_index] = flow_stats
+
+        flow_stats.add(now, packet)
+
+        if self.debug:
+            print(
+                "At time {:.2f}, packet {:d} in flow {} arrived.".format(
+                    now, packet.packet_id, packet.flow_id
+                )
+            )
+
+        if packet.pool is not None:
+            # the packet has reached its destination, and can be recycled
+            packet.pool.release(packet)
+
+    def all_flows(self) -> list:
+        """Returns a list containing all the flow IDs seen so far."""
+        return list(self.stats.keys())
+
+    def flow_stats(self, flow_id) -> FlowStats:
+        """Returns the statistics of a flow. A flow that has not been seen yet has empty
+        statistics: no packets or bytes, a mean delay and a throughput of zero, and
+        delay quantiles that are NaN."""
+        flow_stats = self.stats.get(flow_id)
+        if flow_stats is None:
+            return FlowStats(self.relative_accuracy, self.window)
+        return flow_stats
+
+    def packets_received(self, flow_id) -> int:
+        """Returns the number of packets received in a flow."""
+        return self.flow_stats(flow_id).delays.count
+
+    def bytes_received(self, flow_id) -> float:
+        """Returns the number of bytes received in a flow."""
+        return self.flow_stats(flow_id).throughput.total
+
+    def mean_delay(self, flow_id) -> float:
+        """Returns the mean delay of the packets in a flow."""
+        return self.flow_stats(flow_id).delays.mean
+
+    def delay_variance(self, flow_id) -> float:
+        """Returns the variance of the delays of the packets in a flow."""
+        return self.flow_stats(flow_id).delays.variance
+
+    def delay_quantile(self, flow_id, q: float) -> float:
+        """Returns an estimate of the q-quantile of the delays of the packets in a flow."""
+        return self.flow_stats(flow_id).delay_sketch.quantile(q)
+
+    def throughput(self, flow_id) -> float:
+        """Returns the throughput of a flow over the last complete window, in bytes/second."""
+        return self.flow_stats(flow_id).throughput.rate(self.env.now)
+
+    def average_throughput(self, flow_id) -> float:
+        """Returns the average throughput of a flow since its first packet, in bytes/second."""
+        return self.flow_stats(flow_id).throughput.average_rate()
+
+    def merge(self, other):
+        """Merges the statistics kept by another StatsPacketSink into this one."""
+        for flow_id, flow_stats in other.stats.items():
+            if flow_id not in self.stats:
+                self.stats[flow_id] = FlowStats(self.relative_accuracy, self.window)
+            self.stats[flow_id].merge(flow_stats)
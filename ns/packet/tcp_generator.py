@@ -1,12 +1,28 @@
 """
 Implements a packet generator that simulates the TCP protocol, including support
 for various congestion control mechanisms.
+
+With selective acknowledgments (SACK), the generator keeps a scoreboard of the data that
+the receiver has selectively acknowledged, and recovers from the losses in a window as in
+the conservative SACK-based loss recovery algorithm of RFC 6675: a segment is presumed lost
+once at least DupThresh segments above it have been selectively acknowledged, and during
+loss recovery, the lost segments are retransmitted, followed by new data, whenever the
+estimated number of bytes in flight (the "pipe") is below the congestion window. All the
+losses in a window can then be recovered in about one round-trip time, rather than by a
+retransmission timeout for each lost segment.
+
+Reference:
+
+E. Blanton, M. Allman, L. Wang, I. Jarvinen, M. Kojo, and Y. Nishida, "A Conservative Loss
+Recovery Algorithm Based on Selective Acknowledgment (SACK) for TCP," RFC 6675, 2012.
 """
+from collections import deque
 
 import simpy
 
 from ns.packet.packet import Packet
-from ns.utils.timer import Timer
+from ns.utils.intervals import IntervalSet
+from ns.utils.timer import TimerWheel
 
 
 class TCPPacketGenerator:
@@ -22,9 +38,29 @@ class TCPPacketGenerator:
         The ID for this element.
     rec_flow: bool
         Are we recording the statistics of packets generated?
+    pool: PacketPool
+        If provided, segments are drawn from this pool, and are returned to it once they
+        have been acknowledged. Acknowledgments that belong to a pool are returned to it
+        as soon as they have been processed.
+    timer_wheel: TimerWheel
+        The timer wheel that manages the retransmission timers of the segments, which may be
+        shared by many generators. If None, the generator uses a timer wheel of its own.
+    sack: bool
+        If True, the SACK blocks carried by the acknowledgments from a `TCPSink` with
+        SACK enabled are used for loss recovery, as in RFC 6675.
+    dupthresh: int
+        The number of duplicate acknowledgments, or of segments selectively acknowledged
+        above a segment, that indicates the segment has been lost (DupThresh in RFC 6675).
+    abc_limit: int
+        The largest number of segments by which a single acknowledgment that covers several
+        segments can grow the congestion window (L in RFC 3465, in segments). With the
+        default of 1, each acknowledgment grows the window once, as without byte counting,
+        so that a cumulative acknowledgment after a retransmission cannot cause a burst; it
+        should be raised to 2 for receivers that delay their acknowledgments.
     """
 
-    def __init__(self, env, flow, cc, element_id=None, debug=False):
+    def __init__(self, env, flow, cc, element_id=None, pool=None, debug=False,
+                 timer_wheel=None, sack=False, dupthresh=3, abc_limit=1):
         self.element_id = element_id
         self.env = env
         self.out = None
@@ -51,10 +87,48 @@ class TCPPacketGenerator:
         # whether or not space in the congestion window is available
         self.cwnd_available = simpy.Store(env)
 
-        # the timers, one for each in-flight packets (segments) sent
+        # the timers, one for each in-flight packets (segments) sent, which are managed
+        # by a timer wheel rather than by a simpy process each
+        self.timer_wheel = TimerWheel(env) if timer_wheel is None else timer_wheel
         self.timers = {}
         # the in-flight packets (segments)
         self.sent_packets = {}
+        # the IDs of the in-flight segments in the order of their sequence numbers, which
+        # is the order in which they were first sent, so that a cumulative acknowledgment
+        # only visits the segments that it acknowledges
+        self.in_flight = deque()
+        # the in-flight segments that have been retransmitted at least once
+        self.retransmitted = set()
+        # the retransmitted segments that have not been selectively acknowledged, and the
+        # number of bytes in them, which are counted in the pipe
+        self.retransmitted_unsacked = set()
+        self.retransmitted_bytes = 0
+        # the numbers of segments retransmitted, and of retransmission timeouts
+        self.retransmissions = 0
+        self.timeouts = 0
+
+        self.sack = sack
+        self.dupthresh = dupthresh
+        self.abc_limit = abc_limit
+        # the data above the last acknowledged sequence number that has been selectively
+        # acknowledged by the receiver
+        self.scoreboard = IntervalSet()
+        # whether or not SACK-based loss recovery is in progress
+        self.in_recovery = False
+        # the highest sequence number sent when loss recovery started, which ends the
+        # loss recovery once it has been acknowledged (RecoveryPoint in RFC 6675)
+        self.recovery_point = 0
+        # the end of the highest segment retransmitted during loss recovery (HighRxt)
+        self.high_rxt = 0
+        # whether or not the receiver has sent any SACK blocks
+        self.sack_received_before = False
+        # the sequence number below which the data that has not been selectively
+        # acknowledged is presumed lost, and the number of bytes presumed lost, which
+        # are updated once for each acknowledgment
+        self.lost_boundary = 0
+        self.lost_bytes = 0
+
+        self.pool = pool
 
         self.action = env.process(self.run())
         self.debug = debug
@@ -90,18 +164,11 @@ class TCPPacketGenerator:
                 self.send_buffer += packet_size
 
             # the sender can transmit up to the size of the congestion window
-            if self.next_seq + self.mss <= min(
-                self.send_buffer, self.last_ack + self.congestion_control.cwnd
-            ):
-                packet = Packet(
-                    self.env.now,
-                    self.mss,
-                    self.next_seq,
-                    src=self.flow.src,
-                    flow_id=self.flow.fid,
-                )
+            if self.next_seq + self.mss <= self.send_buffer and self.window_available():
+                packet = self.new_segment()
 
                 self.sent_packets[packet.packet_id] = packet
+                self.in_flight.append(packet.packet_id)
 
                 if self.debug:
                     print(
@@ -113,11 +180,8 @@ class TCPPacketGenerator:
                 self.out.put(packet)
 
                 self.next_seq += packet.size
-                self.timers[packet.packet_id] = Timer(
-                    self.env,
-                    timer_id=packet.packet_id,
-                    timeout_callback=self.timeout_callback,
-                    rto=self.rto,
+                self.timers[packet.packet_id] = self.timer_wheel.timer(
+                    packet.packet_id, self.timeout_callback, self.rto
                 )
 
                 if self.debug:
@@ -130,6 +194,29 @@ class TCPPacketGenerator:
                 # at this time, waiting for acknowledgements
                 yield self.cwnd_available.get()
 
+    def new_segment(self):
+        """Returns a new segment that starts at the next sequence number to be sent."""
+        new_packet = Packet if self.pool is None else self.pool.acquire
+        packet = new_packet(
+            self.env.now,
+            self.mss,
+            self.next_seq,
+            src=self.flow.src,
+            dst=self.flow.dst,
+            flow_id=self.flow.fid,
+        )
+        # the segment is kept for possible retransmissions, so it should only be
+        # recycled by this generator, after it has been acknowledged
+        packet.pool = None
+        return packet
+
+    def window_available(self) -> bool:
+        """Returns True if there is space in the congestion window for another segment,
+        which is estimated using the pipe during SACK-based loss recovery."""
+        if self.in_recovery:
+            return self.pipe() + self.mss <= self.congestion_control.cwnd
+        return self.next_seq + self.mss <= self.last_ack + self.congestion_control.cwnd
+
     def timeout_callback(self, packet_id=0):
         """To be called when a timer expired for a packet with 'packet_id'."""
         if self.debug:
@@ -138,10 +225,15 @@ class TCPPacketGenerator:
                 f"{packet_id} at time {self.env.now:.4f}."
             )
 
+        self.timeouts += 1
         self.congestion_control.timer_expired()
+        # a retransmission timeout ends any SACK-based loss recovery in progress
+        self.in_recovery = False
 
         # retransmitting the segment
         resent_pkt = self.sent_packets[packet_id]
+        self.mark_retransmitted(resent_pkt)
+        self.retransmissions += 1
         self.out.put(resent_pkt)
 
         if self.debug:
@@ -154,17 +246,107 @@ class TCPPacketGenerator:
         revised_rto = self.timers[packet_id].rto * 2
         self.timers[packet_id].restart(revised_rto)
 
+    def update_rto(self, sample_rtt):
+        """Updates the RTT estimate and the retransmission timeout with a new RTT sample."""
+        # Authoritative sources for RTO calculation
+
+        # RFC 6298: Computing TCP's Retransmission Timer
+
+        # This RFC specifically focuses on the RTO algorithm and updates the
+        # way RTO is calculated. It obsoletes the RTO calculation described
+        # in RFC 2988. The updated algorithm is commonly referred to as the
+        # "Karn/Partridge Algorithm."
+
+        alpha = 0.125
+        beta = 0.25
+
+        # calculates the deviation (RTTVAR) of the RTT to account for
+        # variations in the network
+        if self.rtt_var == 0.0:
+            self.rtt_var = sample_rtt / 2.0
+        else:
+            deviation = self.smoothed_rtt - sample_rtt
+            self.rtt_var = (1.0 - beta) * self.rtt_var + beta * abs(deviation)
+
+        # computes a smoothed round-trip time (SRTT)
+        if self.smoothed_rtt == 0.0:
+            self.smoothed_rtt = sample_rtt
+        else:
+            self.smoothed_rtt = (
+                1.0 - alpha
+            ) * self.smoothed_rtt + alpha * sample_rtt
+        self.rto = max(1.0, self.smoothed_rtt + 4.0 * self.rtt_var)
+
+    def new_data_acked(self, acked, sample_rtt):
+        """Updates the congestion window for the segments newly acknowledged by a cumulative
+        acknowledgment. An acknowledgment from a receiver that delays its acknowledgments, or
+        that sends stretch acks, covers several segments, and the congestion window grows as
+        it would with an acknowledgment for each of them, up to `abc_limit` segments, as in
+        the byte counting of RFC 3465, so that a single acknowledgment cannot open the window
+        enough for a line-rate burst."""
+        segments = min(max(1, -(-acked // self.mss)), self.abc_limit)
+        for _ in range(segments):
+            self.congestion_control.ack_received(sample_rtt, self.env.now)
+
+    def mark_retransmitted(self, packet):
+        """Records a retransmitted segment, which is counted in the pipe until it has been
+        acknowledged or selectively acknowledged."""
+        self.retransmitted.add(packet.packet_id)
+        if packet.packet_id not in self.retransmitted_unsacked:
+            self.retransmitted_unsacked.add(packet.packet_id)
+            self.retransmitted_bytes += packet.size
+
+    def unmark_retransmitted(self, packet):
+        """Stops counting a retransmitted segment in the pipe, once it has been acknowledged
+        or selectively acknowledged."""
+        if packet.packet_id in self.retransmitted_unsacked:
+            self.retransmitted_unsacked.remove(packet.packet_id)
+            self.retransmitted_bytes -= packet.size
+
+    def release_acked(self, ack_seq):
+        """Stops the timers of the segments acknowledged by a cumulative acknowledgment,
+        and removes them from the in-flight segments."""
+        while self.in_flight and self.in_flight[0] < ack_seq:
+            packet_id = self.in_flight.popleft()
+            if self.debug:
+                print(
+                    f"TCPPacketGenerator {self.element_id} stopped timer "
+                    f"{packet_id} at time {self.env.now:.4f}."
+                )
+            self.timers[packet_id].stop()
+            del self.timers[packet_id]
+            packet = self.sent_packets.pop(packet_id)
+
+            # a retransmitted segment may still be in flight, and cannot be recycled
+            if packet_id in self.retransmitted:
+                self.retransmitted.remove(packet_id)
+                self.unmark_retransmitted(packet)
+            elif self.pool is not None:
+                self.pool.release(packet)
+
     def put(self, ack):
         """On receiving an acknowledgment packet."""
         assert ack.flow_id >= 10000  # the received packet must be an ack
 
+        if self.sack:
+            self.sack_received(ack)
+            return
+
+        recovered = False
         if ack.ack == self.last_ack:
+            if self.last_ack == self.next_seq:
+                # with no data outstanding, such as after a needless retransmission,
+                # the acknowledgment is not a duplicate acknowledgment (RFC 5681)
+                if ack.pool is not None:
+                    ack.pool.release(ack)
+                return
             self.dupack += 1
         else:
             # fast recovery in RFC 2001 and TCP Reno
             if self.dupack > 0:
                 self.congestion_control.dupack_over()
                 self.dupack = 0
+                recovered = True
 
         if self.dupack >= 3:
             if self.dupack == 3:
@@ -179,21 +361,21 @@ class TCPPacketGenerator:
                     f"{self.env.now:.4f}."
                 )
 
+            self.mark_retransmitted(resent_pkt)
+            self.retransmissions += 1
             self.out.put(resent_pkt)
 
             if self.dupack > 3:
                 self.congestion_control.more_dupacks_received()
 
-                if self.last_ack + self.congestion_control.cwnd >= ack.ack:
-                    packet = Packet(
-                        self.env.now,
-                        self.mss,
-                        self.next_seq,
-                        src=self.flow.src,
-                        flow_id=self.flow.fid,
-                    )
+                # a new segment is sent if allowed by the inflated congestion window
+                if self.next_seq + self.mss <= min(
+                    self.send_buffer, self.last_ack + self.congestion_control.cwnd
+                ):
+                    packet = self.new_segment()
 
                     self.sent_packets[packet.packet_id] = packet
+                    self.in_flight.append(packet.packet_id)
 
                     if self.debug:
                         print(
@@ -205,11 +387,8 @@ class TCPPacketGenerator:
                     self.out.put(packet)
 
                     self.next_seq += packet.size
-                    self.timers[packet.packet_id] = Timer(
-                        self.env,
-                        timer_id=packet.packet_id,
-                        timeout_callback=self.timeout_callback,
-                        rto=self.rto,
+                    self.timers[packet.packet_id] = self.timer_wheel.timer(
+                        packet.packet_id, self.timeout_callback, self.rto
                     )
 
                     if self.debug:
@@ -218,43 +397,24 @@ class TCPPacketGenerator:
                             f"packet {packet.packet_id} with an RTO of {self.rto:.4f}."
                         )
 
+            if ack.pool is not None:
+                ack.pool.release(ack)
             return
 
         if self.dupack == 0:
-            # new ack received, update the RTT estimate and the retransmission timout
+            # new ack received, update the RTT estimate and the retransmission timout,
+            # unless the ack is for a retransmitted segment (Karn's algorithm)
             sample_rtt = self.env.now - ack.time
+            if ack.packet_id not in self.retransmitted:
+                self.update_rto(sample_rtt)
 
-            # Authoritative sources for RTO calculation
-
-            # RFC 6298: Computing TCP's Retransmission Timer
-
-            # This RFC specifically focuses on the RTO algorithm and updates the
-            # way RTO is calculated. It obsoletes the RTO calculation described
-            # in RFC 2988. The updated algorithm is commonly referred to as the
-            # "Karn/Partridge Algorithm."
-
-            alpha = 0.125
-            beta = 0.25
-
-            # calculates the deviation (RTTVAR) of the RTT to account for
-            # variations in the network
-            if self.rtt_var == 0.0:
-                self.rtt_var = sample_rtt / 2.0
-            else:
-                deviation = self.smoothed_rtt - sample_rtt
-                self.rtt_var = (1.0 - beta) * self.rtt_var + beta * abs(deviation)
-
-            # computes a smoothed round-trip time (SRTT)
-            if self.smoothed_rtt == 0.0:
-                self.smoothed_rtt = sample_rtt
+            # an acknowledgment that follows duplicate acknowledgments, such as the one
+            # that ends fast recovery, grows the window only once
+            if recovered:
+                self.congestion_control.ack_received(sample_rtt, self.env.now)
             else:
-                self.smoothed_rtt = (
-                    1.0 - alpha
-                ) * self.smoothed_rtt + alpha * sample_rtt
-            self.rto = max(1.0, self.smoothed_rtt + 4.0 * self.rtt_var)
-
+                self.new_data_acked(ack.ack - self.last_ack, sample_rtt)
             self.last_ack = ack.ack
-            self.congestion_control.ack_received(sample_rtt, self.env.now)
 
             if self.debug:
                 print(
@@ -269,19 +429,142 @@ class TCPPacketGenerator:
             # this acknowledgment should acknowledge all the intermediate
             # segments sent between the lost packet and the receipt of the
             # first duplicate ACK, if any
-            acked_packets = [
-                packet_id
-                for packet_id, _ in self.sent_packets.items()
-                if packet_id < ack.ack
-            ]
-            for packet_id in acked_packets:
-                if self.debug:
-                    print(
-                        f"TCPPacketGenerator {self.element_id} stopped timer "
-                        f"{packet_id} at time {self.env.now:.4f}."
-                    )
-                self.timers[packet_id].stop()
-                del self.timers[packet_id]
-                del self.sent_packets[packet_id]
+            self.release_acked(ack.ack)
 
             self.cwnd_available.put(True)
+
+        if ack.pool is not None:
+            ack.pool.release(ack)
+
+    def sack_received(self, ack):
+        """On receiving an acknowledgment packet, with SACK-based loss recovery."""
+        if ack.ack > self.last_ack:
+            # new ack received, update the RTT estimate and the retransmission timout,
+            # unless the ack is for a retransmitted segment (Karn's algorithm)
+            sample_rtt = self.env.now - ack.time
+            if ack.packet_id not in self.retransmitted:
+                self.update_rto(sample_rtt)
+
+            acked = ack.ack - self.last_ack
+            self.last_ack = ack.ack
+            self.dupack = 0
+            self.scoreboard.remove_below(ack.ack)
+
+            if self.in_recovery:
+                if ack.ack >= self.recovery_point:
+                    # the loss recovery is complete
+                    self.in_recovery = False
+                    self.congestion_control.dupack_over()
+                elif not self.sack_received_before and self.high_rxt <= ack.ack:
+                    # without SACK blocks from the receiver, a partial acknowledgment
+                    # indicates that the first segment not acknowledged has been lost
+                    # as well (as in NewReno, RFC 6582)
+                    self.retransmit(ack.ack)
+            else:
+                self.new_data_acked(acked, sample_rtt)
+
+            if self.debug:
+                print(
+                    f"TCPPacketGenerator {self.element_id} received ack till sequence number "
+                    f"{ack.ack} at time {self.env.now:.4f}."
+                )
+
+            self.release_acked(ack.ack)
+        elif ack.ack == self.last_ack and self.last_ack < self.next_seq:
+            self.dupack += 1
+
+        if ack.sack:
+            self.sack_received_before = True
+            self.update_scoreboard(ack.sack)
+
+        # the loss boundary only changes with the scoreboard and the cumulative
+        # acknowledgment, so it is found once for each acknowledgment
+        self.lost_boundary, sacked_below = self.loss_boundary()
+        self.lost_bytes = self.lost_boundary - self.last_ack - sacked_below
+
+        if not self.in_recovery and self.last_ack < self.next_seq and (
+            self.dupack >= self.dupthresh or self.lost_boundary > self.last_ack
+        ):
+            # starting loss recovery (step 4 of Section 5 in RFC 6675)
+            self.in_recovery = True
+            self.recovery_point = self.next_seq
+            self.congestion_control.consecutive_dupacks_received()
+            self.congestion_control.cwnd = self.congestion_control.ssthresh
+            # the first segment not acknowledged is retransmitted at once
+            self.high_rxt = self.last_ack
+            self.retransmit(self.last_ack)
+
+        if self.in_recovery:
+            self.retransmit_lost()
+
+        self.cwnd_available.put(True)
+
+        if ack.pool is not None:
+            ack.pool.release(ack)
+
+    def update_scoreboard(self, blocks):
+        """Adds the SACK blocks of an acknowledgment to the scoreboard, and stops the timers
+        of the segments that they acknowledge for the first time."""
+        for start, end in blocks:
+            start = max(start, self.last_ack)
+            if start >= end:
+                continue
+            for gap_start, gap_end in self.scoreboard.gaps(start, end):
+                for packet_id in range(gap_start, gap_end, self.mss):
+                    if packet_id in self.timers:
+                        self.timers[packet_id].stop()
+                        self.unmark_retransmitted(self.sent_packets[packet_id])
+            self.scoreboard.add(start, end)
+
+    def loss_boundary(self) -> tuple:
+        """Returns the sequence number below which all the data that has not been selectively
+        acknowledged is presumed lost, which is the start of the highest block of the
+        scoreboard with at least DupThresh segments selectively acknowledged at or above it,
+        along with the number of bytes selectively acknowledged below it."""
+        sacked = 0
+        threshold = (self.dupthresh - 1) * self.mss
+        starts, ends = self.scoreboard.starts, self.scoreboard.ends
+        for i in range(len(starts) - 1, -1, -1):
+            sacked += ends[i] - starts[i]
+            if sacked > threshold:
+                return starts[i], self.scoreboard.length - sacked
+        return self.last_ack, 0
+
+    def pipe(self) -> int:
+        """Returns the estimated number of bytes in flight (SetPipe in RFC 6675): the bytes
+        sent but neither acknowledged, selectively acknowledged, nor presumed lost, plus the
+        bytes retransmitted that have not been selectively acknowledged. It takes constant
+        time, as all of these are kept up to date as segments are sent, acknowledged,
+        selectively acknowledged, and retransmitted."""
+        return (self.next_seq - self.last_ack - self.scoreboard.length - self.lost_bytes
+                + self.retransmitted_bytes)
+
+    def retransmit(self, packet_id):
+        """Retransmits a segment during loss recovery, and restarts its timer."""
+        resent_pkt = self.sent_packets[packet_id]
+        resent_pkt.time = self.env.now
+        self.mark_retransmitted(resent_pkt)
+        self.retransmissions += 1
+        self.high_rxt = max(self.high_rxt, packet_id + resent_pkt.size)
+
+        if self.debug:
+            print(
+                f"TCPPacketGenerator {self.element_id} is resending packet "
+                f"{resent_pkt.packet_id} with flow_id {resent_pkt.flow_id} at time "
+                f"{self.env.now:.4f}."
+            )
+
+        self.out.put(resent_pkt)
+        self.timers[packet_id].restart(self.rto)
+
+    def retransmit_lost(self):
+        """Retransmits the segments presumed lost that have not been retransmitted during
+        this loss recovery, as long as the pipe is below the congestion window (NextSeg
+        in RFC 6675). New data is then sent by the generator itself."""
+        start = max(self.high_rxt, self.last_ack)
+        for gap_start, gap_end in self.scoreboard.gaps(start, self.lost_boundary):
+            for packet_id in range(gap_start, gap_end, self.mss):
+                if (self.pipe() + self.mss > self.congestion_control.cwnd
+                        or packet_id not in self.sent_packets):
+                    return
+                self.retransmit(packet_id)
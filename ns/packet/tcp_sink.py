@@ -5,11 +5,52 @@ TCPPacketGenerator.
 
 from ns.packet.sink import PacketSink
 from ns.packet.packet import Packet
+from ns.utils.intervals import IntervalSet
+from ns.utils.timer import TimerWheel
 
 
 class TCPSink(PacketSink):
     """A TCPSink inherits from the basic PacketSink, and sends ack packets back to
     the TCPPacketGenerator with advertised receive window sizes.
+
+    The data received out of order is kept in the receive buffer as a set of disjoint
+    intervals of sequence numbers, which are merged as segments arrive, until the missing
+    data before them has been received. If `sack` is True, each ack packet also carries
+    up to `max_sack_blocks` of these intervals as selective acknowledgment (SACK) blocks,
+    as defined in RFC 2018.
+
+    By default, an ack packet is sent for every segment received. If `ack_every` is larger
+    than 1, the acknowledgments are delayed as in RFC 1122 and RFC 5681: an ack packet is
+    sent once `ack_every` segments have been received in order, or `ack_delay` seconds after
+    the first segment that has not been acknowledged, whichever comes first, so that a single
+    cumulative ack packet covers several segments. With `ack_every` set to 2, this is the
+    usual delayed ACK; larger values produce stretch ACKs. Segments that arrive out of order,
+    duplicate segments, and segments that fill a gap in the receive buffer are still
+    acknowledged immediately, so that the sender can detect losses from duplicate
+    acknowledgments.
+
+    If `gro` is True, the delayed-ACK timer is restarted by every segment received in order
+    instead, so that a burst of back-to-back segments is acknowledged by a single stretch ack
+    once no segment has arrived for `ack_delay` seconds, or once `ack_every` segments have
+    been received, as if generic receive offload (GRO) had merged the burst into one large
+    segment.
+
+    If a `PacketPool` is provided as `pool`, the ack packets are drawn from it, and
+    will be returned to the pool by the TCPPacketGenerator once they are processed.
+
+    Parameters
+    ----------
+    ack_every: int
+        the number of segments received in order that are acknowledged by one ack packet.
+    ack_delay: float
+        the longest time for which an acknowledgment is delayed, which RFC 1122 requires
+        to be less than 0.5 seconds; or the gap that ends a burst of segments if `gro`
+        is True.
+    gro: bool
+        if True, acknowledges bursts of back-to-back segments with single stretch acks.
+    timer_wheel: TimerWheel
+        The timer wheel that manages the delayed-ACK timer, which may be shared by many
+        sinks. If None, the sink uses a timer wheel of its own.
     """
 
     def __init__(
@@ -21,58 +62,124 @@ class TCPSink(PacketSink):
         rec_flow_ids: bool = True,
         debug: bool = False,
         element_id: int = 0,
+        pool=None,
+        sack: bool = False,
+        max_sack_blocks: int = 3,
+        ack_every: int = 1,
+        ack_delay: float = 0.04,
+        gro: bool = False,
+        timer_wheel=None,
     ):
         super().__init__(
             env, rec_arrivals, absolute_arrivals, rec_waits, rec_flow_ids, debug
         )
-        self.recv_buffer = []
+        # the data received out of order, beyond the next sequence number expected
+        self.recv_buffer = IntervalSet()
         # the next sequence number expected to be received
         self.next_seq_expected = 0
         self.out = None
         self.ele_id = element_id
+        self.pool = pool
+        self.sack = sack
+        self.max_sack_blocks = max_sack_blocks
+
+        self.ack_every = ack_every
+        self.ack_delay = ack_delay
+        self.gro = gro
+        self.timer_wheel = TimerWheel(env) if timer_wheel is None else timer_wheel
+        self.ack_timer = None
+        # the ack packet that has been delayed, and the number of segments it covers
+        self.pending_ack = None
+        self.segments_unacked = 0
+        self.acks_sent = 0
 
     def packet_arrived(self, packet):
         """
-        Insert the packet into the receive buffer, which is a priority queue
-        that is sorted based on the sequence number of the packet (packet_id).
+        Insert the packet into the receive buffer, merging it with the data received out
+        of order that it overlaps or touches, and advance the next sequence number expected
+        if the packet fills the gap before the receive buffer. Returns the interval of data
+        received out of order that contains the packet, or None if the packet has been
+        received in order.
         """
+        interval = self.recv_buffer.add(packet.packet_id, packet.packet_id + packet.size)
 
-        self.recv_buffer.append([packet.packet_id, packet.packet_id + packet.size])
+        start, end = self.recv_buffer.first()
+        if start <= self.next_seq_expected:
+            self.recv_buffer.pop_first()
+            self.next_seq_expected = max(self.next_seq_expected, end)
+            if interval == (start, end):
+                return None
 
-        self.recv_buffer.sort()
-
-        merged_stats = []
-        for start, end in self.recv_buffer:
-            if merged_stats and start <= merged_stats[-1][1]:
-                merged_stats[-1][1] = max(merged_stats[-1][1], end)
-            else:
-                merged_stats.append([start, end])
-        self.recv_buffer = merged_stats
+        return interval
 
     def put(self, packet):
         """Sends a packet to this element."""
-        super().put(packet)
-
-        self.packet_arrived(packet)
-
-        self.next_seq_expected = self.recv_buffer[0][1]
+        expected = self.next_seq_expected
+        gap = bool(self.recv_buffer)
+        interval = self.packet_arrived(packet)
 
         # a TCP sink needs to send ack packets back to the TCP packet generator
         assert self.out is not None
 
-        acknowledgment = Packet(
-            packet.time,  # used for calculating RTT at the sender
-            size=40,  # default size of the ack packet
-            packet_id=packet.packet_id,
-            flow_id=packet.flow_id + 10000,
-        )
+        # a delayed acknowledgment is updated to cover the new segment as well
+        acknowledgment = self.pending_ack
+        if acknowledgment is None:
+            new_packet = Packet if self.pool is None else self.pool.acquire
+            acknowledgment = new_packet(
+                packet.time,  # used for calculating RTT at the sender
+                size=40,  # default size of the ack packet
+                packet_id=packet.packet_id,
+                src=packet.dst,
+                dst=packet.src,
+                flow_id=packet.flow_id + 10000,
+            )
+        else:
+            acknowledgment.time = packet.time
+            acknowledgment.packet_id = packet.packet_id
 
         # assert packet.delivered_time > 0
         acknowledgment.ack = self.next_seq_expected
+        if self.sack and self.recv_buffer:
+            acknowledgment.sack = self.recv_buffer.blocks(interval, self.max_sack_blocks)
         acknowledgment.delivered_time = packet.delivered_time
         acknowledgment.first_sent_time = packet.first_sent_time
         acknowledgment.delivered = packet.delivered
         acknowledgment.lost = packet.lost
         acknowledgment.is_app_limited = packet.is_app_limited
 
+        # the packet may be recycled once it has been recorded, so this
+        # happens after the acknowledgment has been filled in
+        super().put(packet)
+
+        self.pending_ack = acknowledgment
+        self.segments_unacked += 1
+        if (
+            self.segments_unacked < self.ack_every
+            and packet.packet_id == expected
+            and not gap
+        ):
+            # the segment has been received in order, and its acknowledgment is delayed
+            if self.ack_timer is None:
+                self.ack_timer = self.timer_wheel.timer(
+                    self.ele_id, self.ack_timeout, self.ack_delay
+                )
+            elif self.gro or self.segments_unacked == 1:
+                self.ack_timer.restart(self.ack_delay)
+        else:
+            self.send_ack()
+
+    def send_ack(self):
+        """Sends the acknowledgment of the segments that have not been acknowledged."""
+        acknowledgment = self.pending_ack
+        self.pending_ack = None
+        self.segments_unacked = 0
+        if self.ack_timer is not None:
+            self.ack_timer.stop()
+
+        self.acks_sent += 1
         self.out.put(acknowledgment)
+
+    def ack_timeout(self, timer_id=0):
+        """To be called when the delayed-ACK timer expired."""
+        if self.pending_ack is not None:
+            self.send_ack()
@@ -0,0 +1,142 @@
+"""
+Implements a fast-path variant of a port with an output buffer, given an output rate and a
+buffer size (in either bytes or the number of packets), using the simple tail-drop mechanism
+to drop packets.
+
+A `Port` runs a simpy process that retrieves each packet from its store and then waits for
+its transmission time, which costs several events (the store's put and get events, the
+timeout, and the resumption of the process) per packet. When the downstream element is a plain
+element with a `put()` function --- i.e., when `zero_downstream_buffer` is not needed ---
+the departure time of the next packet in the queue is simply the departure time of the
+current one plus its transmission time. A `FastPort` therefore does not run a process: it
+schedules the departure of the packet at the head of the queue directly with a single
+timeout event, and schedules the next departure from that event's callback.
+"""
+from collections import deque
+
+from ns.port.port import Port
+from ns.utils.background import BackgroundLoad
+
+
+class FastPort(Port):
+    """Models an output port on a switch with a given rate and buffer size (in either bytes
+    or the number of packets), using the simple tail-drop mechanism to drop packets. It
+    behaves in the same way as a `Port` without `zero_downstream_buffer`, but uses a single
+    simpy event for each packet transmitted.
+
+    Parameters
+    ----------
+    env: simpy.Environment
+        the simulation environment.
+    rate: float
+        the bit rate of the port (0 for unlimited).
+    element_id: int
+        the element id of this port.
+    qlimit: integer (or None)
+        a queue limit in bytes or packets (including the packet in service), beyond
+        which all packets will be dropped.
+    limit_bytes: bool
+        if True, the queue limit will be based on bytes; if False, the queue limit
+        will be based on packets.
+    debug: bool
+        If True, prints more verbose debug information.
+    background: BackgroundLoad (or None)
+        the background traffic modeled as a fluid on the outgoing link, whose rate is not
+        available to the packets sent by this port.
+    """
+
+    def __init__(
+        self,
+        env,
+        rate: float,
+        qlimit: int = None,
+        limit_bytes: bool = False,
+        element_id: int = None,
+        debug: bool = False,
+        background: BackgroundLoad = None,
+    ):
+        super().__init__(
+            env,
+            rate,
+            qlimit=qlimit,
+            limit_bytes=limit_bytes,
+            element_id=element_id,
+            debug=debug,
+            background=background,
+        )
+        # the packets waiting in the queue, not including the packet in service
+        self.queue = deque()
+
+    def start(self):
+        """There is no process to start, as departures are scheduled by `put()`
+        and by the callbacks of the departure events themselves."""
+        return None
+
+    def queue_length(self) -> int:
+        """Returns the number of packets waiting in the queue."""
+        return len(self.queue)
+
+    def transmit(self, packet):
+        """Starts transmitting a packet, scheduling its departure."""
+        self.busy = 1
+        self.busy_packet_size = packet.size
+
+        if self.rate > 0:
+            departure = self.env.timeout(self.transmission_time(packet), packet)
+            departure.callbacks.append(self.transmitted)
+        else:
+            self.depart(packet)
+
+    def transmitted(self, event):
+        """The callback used when the transmission of a packet is complete."""
+        self.depart(event.value)
+
+    def depart(self, packet):
+        """Sends a packet to the downstream element, and starts transmitting
+        the next packet in the queue, if any."""
+        self.byte_size -= packet.size
+        self.out.put(packet)
+
+        self.busy = 0
+        self.busy_packet_size = 0
+
+        if self.queue:
+            self.transmit(self.queue.popleft())
+
+    def put(self, packet):
+        """Sends a packet to this element."""
+        self.packets_received += 1
+        byte_count = self.byte_size + packet.size
+
+        if self.element_id is not None:
+            packet.perhop_time[self.element_id] = self.env.now
+
+        if self.qlimit is not None:
+            if self.limit_bytes and byte_count >= self.qlimit:
+                self.packets_dropped += 1
+                if self.debug:
+                    print(
+                        f"Packet dropped: flow id = {packet.flow_id} and packet id = {packet.packet_id}"
+                    )
+                if packet.pool is not None:
+                    packet.pool.release(packet)
+                return
+            if not self.limit_bytes and len(self.queue) >= self.qlimit - 1:
+                self.packets_dropped += 1
+                if self.debug:
+                    print(
+                        f"Packet dropped: flow id = {packet.flow_id}, packet id = {packet.packet_id}"
+                    )
+                if packet.pool is not None:
+                    packet.pool.release(packet)
+                return
+
+            if self.debug:
+                print(f"Queue length at port: {len(self.queue)} packets.")
+
+        self.byte_size = byte_count
+
+        if self.busy:
+            self.queue.append(packet)
+        else:
+            self.transmit(packet)
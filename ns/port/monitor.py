@@ -34,10 +34,10 @@ class PortMonitor:
 
             if self.pkt_in_service_included:
                 total_byte = self.port.byte_size + self.port.busy_packet_size
-                total = len(self.port.store.items) + self.port.busy
+                total = self.port.queue_length() + self.port.busy
             else:
                 total_byte = self.port.byte_size
-                total = len(self.port.store.items)
+                total = self.port.queue_length()
 
             self.sizes.append(total)
             self.sizes_byte.append(total_byte)
@@ -4,6 +4,8 @@ or the number of packets). This implementation uses the simple tail-drop mechani
 """
 import simpy
 
+from ns.utils.background import BackgroundLoad
+
 
 class Port:
     """Models an output port on a switch with a given rate and buffer size (in either bytes
@@ -29,6 +31,9 @@ class Port:
         element's buffer.
     debug: bool
         If True, prints more verbose debug information.
+    background: BackgroundLoad (or None)
+        the background traffic modeled as a fluid on the outgoing link, whose rate is not
+        available to the packets sent by this port.
     """
 
     def __init__(
@@ -40,9 +45,11 @@ class Port:
         zero_downstream_buffer: bool = False,
         element_id: int = None,
         debug: bool = False,
+        background: BackgroundLoad = None,
     ):
         self.store = simpy.Store(env)
         self.rate = rate
+        self.background = background
         self.env = env
         self.out = None
         self.packets_received = 0
@@ -50,47 +57,66 @@ class Port:
         self.qlimit = qlimit
         self.limit_bytes = limit_bytes
         self.byte_size = 0  # the current size of the queue in bytes
+        # the number of packets accepted but not yet released by a zero-buffer downstream
+        self.packets_held = 0
         self.element_id = element_id
 
         self.zero_downstream_buffer = zero_downstream_buffer
-        if self.zero_downstream_buffer:
-            self.downstream_store = simpy.Store(env)
 
         self.debug = debug
         self.busy = 0  # used to track if a packet is currently being sent
         self.busy_packet_size = 0
 
-        self.action = env.process(self.run())
+        self.action = self.start()
+
+    def start(self):
+        """Starts the process that transmits the packets in the queue. Subclasses that
+        schedule their transmissions without a process may return None instead."""
+        return self.env.process(self.run())
 
     def update(self, packet):
         """
         The packet has just been retrieved from this element's own buffer by a downstream
         node that has no buffers.
         """
-        # There is nothing that needs to be done, just print a debug message
+        self.byte_size -= packet.size
+        self.packets_held -= 1
+
         if self.debug:
             print(f"Retrieved Packet {packet.packet_id} from flow {packet.flow_id}.")
 
+    def queue_length(self) -> int:
+        """Returns the number of packets waiting in the queue. With a zero-buffer downstream
+        element, this includes the packets that have been sent but not yet released by
+        the downstream element."""
+        if self.zero_downstream_buffer:
+            return self.packets_held
+        return len(self.store.items)
+
+    def transmission_time(self, packet) -> float:
+        """Returns the time taken to transmit a packet starting now, at the rate left
+        over by the background traffic, if any."""
+        if self.background is None:
+            return packet.size * 8.0 / self.rate
+        return self.background.transmission_time(self.env.now, packet.size * 8.0, self.rate)
+
     def run(self):
         """The generator function used in simulations."""
         while True:
-            if self.zero_downstream_buffer:
-                packet = yield self.downstream_store.get()
-            else:
-                packet = yield self.store.get()
+            packet = yield self.store.get()
 
             self.busy = 1
             self.busy_packet_size = packet.size
 
             if self.rate > 0:
-                yield self.env.timeout(packet.size * 8.0 / self.rate)
-                self.byte_size -= packet.size
+                yield self.env.timeout(self.transmission_time(packet))
 
             if self.zero_downstream_buffer:
-                self.out.put(
-                    packet, upstream_update=self.update, upstream_store=self.store
-                )
+                # the packet remains in this element's buffer until it is released
+                # by the downstream element, which will then call update()
+                self.out.put(packet, upstream_update=self.update)
             else:
+                self.byte_size -= packet.size
                 self.out.put(packet)
 
             self.busy = 0
@@ -99,13 +125,6 @@ class Port:
     def put(self, packet):
         """Sends a packet to this element."""
         self.packets_received += 1
-
-        if self.zero_downstream_buffer:
-            # If the downstream node has no buffer, packets will be removed
-            # from this buffer by the downstream node, and the byte size of the
-            # buffer should be recomputed
-            self.byte_size = sum(packet.size for packet in self.store.items)
-
         byte_count = self.byte_size + packet.size
 
         if self.element_id is not None:
@@ -114,7 +133,7 @@ class Port:
         if self.qlimit is None:
             self.byte_size = byte_count
             if self.zero_downstream_buffer:
-                self.downstream_store.put(packet)
+                self.packets_held += 1
             return self.store.put(packet)
 
         if self.limit_bytes and byte_count >= self.qlimit:
@@ -123,20 +142,24 @@ class Port:
                 print(
                     f"Packet dropped: flow id = {packet.flow_id} and packet id = {packet.packet_id}"
                 )
-        elif not self.limit_bytes and len(self.store.items) >= self.qlimit - 1:
+            if packet.pool is not None:
+                packet.pool.release(packet)
+        elif not self.limit_bytes and self.queue_length() >= self.qlimit - 1:
             self.packets_dropped += 1
             if self.debug:
                 print(
                     f"Packet dropped: flow id = {packet.flow_id}, packet id = {packet.packet_id}"
                 )
+            if packet.pool is not None:
+                packet.pool.release(packet)
         else:
             # If the packet has not been dropped, record the queue length at this port
             if self.debug:
-                print(f"Queue length at port: {len(self.store.items)} packets.")
+                print(f"Queue length at port: {self.queue_length()} packets.")
 
             self.byte_size = byte_count
 
             if self.zero_downstream_buffer:
-                self.downstream_store.put(packet)
+                self.packets_held += 1
 
             return self.store.put(packet)
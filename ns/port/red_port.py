@@ -58,6 +58,9 @@ class REDPort(Port):
             if True, assume that the downstream element does not have any buffers,
             and backpressure is in effect so that all waiting packets queue up in this
             element's buffer.
+        rng: random number generator (or None)
+            the generator used to make the random drop decisions, such as a `BlockRNG`
+            obtained from a `SeedTree`; the global `random` module is used if None.
         debug: bool
             If True, prints more verbose debug information.
     """
@@ -73,6 +76,7 @@ class REDPort(Port):
                  qlimit: int = None,
                  limit_bytes: bool = False,
                  zero_downstream_buffer: bool = False,
+                 rng=None,
                  debug: bool = False):
 
         super().__init__(env,
@@ -87,22 +91,17 @@ class REDPort(Port):
         self.min_threshold = min_threshold
         self.weight_factor = weight_factor
         self.average_queue_size = 0
+        self.rng = random if rng is None else rng
 
     def put(self, packet):
         """ Sends a packet to this element. """
         self.packets_received += 1
 
-        if self.zero_downstream_buffer:
-            # If the downstream node has no buffer, packets will be removed
-            # from this buffer by the downstream node, and the byte size of the
-            # buffer should be recomputed
-            self.byte_size = sum(packet.size for packet in self.store.items)
-
         # current queue size is observed upon enqueueing the new packet
         if self.limit_bytes:
             current_queue_size = self.byte_size + packet.size
         else:
-            current_queue_size = len(self.store.items) + 1
+            current_queue_size = self.queue_length() + 1
 
         alpha = 2**-self.weight_factor
         self.average_queue_size = self.average_queue_size * (
@@ -113,8 +112,10 @@ class REDPort(Port):
             if self.debug:
                 print(f"The current queue length {current_queue_size} "
                       f"exceeds the upper limit {self.qlimit}.")
+            if packet.pool is not None:
+                packet.pool.release(packet)
         elif self.average_queue_size >= self.max_threshold:
-            rand = random.uniform(0, 1)
+            rand = self.rng.uniform(0, 1)
             if rand <= self.max_probability:
                 self.packets_dropped += 1
                 if self.debug:
@@ -123,15 +124,17 @@ class REDPort(Port):
                         f"exceeds the maximum threshold ({self.qlimit}), ",
                         f"packet dropped with probability {self.max_probability}"
                     )
+                if packet.pool is not None:
+                    packet.pool.release(packet)
             else:
                 self.byte_size += packet.size
                 if self.zero_downstream_buffer:
-                    self.downstream_store.put(packet)
+                    self.packets_held += 1
                 return self.store.put(packet)
         elif self.average_queue_size >= self.min_threshold:
             prob = (self.average_queue_size - self.min_threshold) / (
                 self.max_threshold - self.min_threshold) * self.max_probability
-            rand = random.uniform(0, 1)
+            rand = self.rng.uniform(0, 1)
             if rand <= prob:
                 self.packets_dropped += 1
                 if self.debug:
@@ -139,15 +142,17 @@ class REDPort(Port):
                         f"The average queue length {self.average_queue_size} "
                         f"exceeds the minimum threshold {self.min_threshold}, "
                         f"packet dropped with probability {prob}.")
+                if packet.pool is not None:
+                    packet.pool.release(packet)
             else:
                 self.byte_size += packet.size
                 if self.zero_downstream_buffer:
-                    self.downstream_store.put(packet)
+                    self.packets_held += 1
                 return self.store.put(packet)
         else:
             self.byte_size += packet.size
 
             if self.zero_downstream_buffer:
-                self.downstream_store.put(packet)
+                self.packets_held += 1
 
             return self.store.put(packet)
@@ -23,6 +23,9 @@ class Wire:
         loss_dist: function
             a function that takes one optional parameter, which is the packet ID, and
             returns the loss rate.
+        rng: random number generator (or None)
+            the generator used to decide whether each packet is lost, such as a `BlockRNG`
+            obtained from a `SeedTree`; the global `random` module is used if None.
     """
 
     def __init__(self,
@@ -30,12 +33,14 @@ class Wire:
                  delay_dist,
                  loss_dist=None,
                  wire_id=0,
+                 rng=None,
                  debug=False):
         self.store = simpy.Store(env)
         self.delay_dist = delay_dist
         self.loss_dist = loss_dist
         self.env = env
         self.wire_id = wire_id
+        self.rng = random if rng is None else rng
         self.out = None
         self.packets_rec = 0
         self.debug = debug
@@ -46,7 +51,7 @@ class Wire:
         while True:
             packet = yield self.store.get()
 
-            if self.loss_dist is None or random.uniform(
+            if self.loss_dist is None or self.rng.uniform(
                     0, 1) >= self.loss_dist(packet_id=packet.packet_id):
                 # The amount of time for this packet to stay in my store
                 queued_time = self.env.now - packet.current_time
@@ -68,6 +73,8 @@ class Wire:
                 if self.debug:
                     print("Dropped on wire #{} at {:.3f}: {}".format(
                         self.wire_id, self.env.now, packet))
+                if packet.pool is not None:
+                    packet.pool.release(packet)
 
     def put(self, packet):
         """ Sends a packet to this element. """
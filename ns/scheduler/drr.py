@@ -1,5 +1,7 @@
 """
-Implements a Deficit Round Robin (DRR) server.
+Implements a Deficit Round Robin (DRR) server, using an active list of backlogged
+queues so that the cost of scheduling each packet does not depend on the total
+number of queues.
 
 Reference:
 
@@ -8,6 +10,7 @@ Tran. Networking, vol. 4, no. 3, June 1996.
 """
 
 from collections import defaultdict as dd
+from collections import deque
 from collections.abc import Callable
 
 import simpy
@@ -63,23 +66,28 @@ class DRRServer:
         self.quantum = {}
 
         if isinstance(weights, list):
+            min_weight = min(weights)
             for queue_id, weight in enumerate(weights):
                 self.deficit[queue_id] = 0.0
                 self.flow_queue_count[queue_id] = 0
-                self.quantum[queue_id] = self.MIN_QUANTUM * weight / min(
-                    weights)
+                self.quantum[queue_id] = self.MIN_QUANTUM * weight / min_weight
 
         elif isinstance(weights, dict):
+            min_weight = min(weights.values())
             for (queue_id, value) in weights.items():
                 self.deficit[queue_id] = 0.0
                 self.flow_queue_count[queue_id] = 0
-                self.quantum[queue_id] = self.MIN_QUANTUM * value / min(
-                    weights.values())
+                self.quantum[queue_id] = self.MIN_QUANTUM * value / min_weight
         else:
             raise ValueError('Weights must be either a list or a dictionary.')
 
         self.head_of_line = {}
+        # The active list contains the backlogged queues in the order of their service,
+        # while the active set contains these queues as well as the queue in service
+        self.active_list = deque()
         self.active_set = set()
+        # the total number of packets currently in the server
+        self.packet_count = 0
 
         # One FIFO queue for each flow_id or class_id
         self.stores = {}
@@ -93,12 +101,9 @@ class DRRServer:
         self.out = None
 
         self.upstream_updates = {}
-        self.upstream_stores = {}
 
         self.zero_buffer = zero_buffer
         self.zero_downstream_buffer = zero_downstream_buffer
-        if self.zero_downstream_buffer:
-            self.downstream_stores = {}
 
         self.debug = debug
         self.action = env.process(self.run())
@@ -108,20 +113,22 @@ class DRRServer:
         The packet has been sent (or authorized to be sent if the downstream node has a zero-buffer
         configuration), we need to update the internal statistics related to this event.
         """
-        self.flow_queue_count[self.flow_classes(packet)] -= 1
+        queue_id = self.flow_classes(packet)
+        self.flow_queue_count[queue_id] -= 1
+        self.packet_count -= 1
 
-        self.deficit[self.flow_classes(packet)] -= packet.size
+        self.deficit[queue_id] -= packet.size
 
-        if self.flow_queue_count[self.flow_classes(packet)] == 0:
-            self.deficit[self.flow_classes(packet)] = 0.0
+        if self.flow_queue_count[queue_id] == 0:
+            self.deficit[queue_id] = 0.0
 
         if self.debug:
             print(
                 f"Deficit reduced to {self.deficit[packet.flow_id]} for flow {packet.flow_id}"
             )
 
-        if self.flow_classes(packet) in self.byte_sizes:
-            self.byte_sizes[self.flow_classes(packet)] -= packet.size
+        if queue_id in self.byte_sizes:
+            self.byte_sizes[queue_id] -= packet.size
         else:
             raise ValueError(
                 "Error: the packet to be sent has never been received.")
@@ -129,7 +136,7 @@ class DRRServer:
         if self.debug:
             print(
                 f"Sent out packet {packet.packet_id} from flow {packet.flow_id} "
-                f"belonging to class {self.flow_classes(packet)}")
+                f"belonging to class {queue_id}")
 
     def update(self, packet):
         """
@@ -137,13 +144,10 @@ class DRRServer:
         node that has no buffers. Propagate to the upstream if this node also has a zero-buffer
         configuration.
         """
-        # With no local buffers, this element needs to pull the packet from upstream
+        # With no local buffers, the packet has been held in the upstream element's buffer
         if self.zero_buffer:
-            # For each packet, remove it from its own upstream's store
-            self.upstream_stores[packet].get()
-            del self.upstream_stores[packet]
-            self.upstream_updates[packet](packet)
-            del self.upstream_updates[packet]
+            # Let the upstream element know that the packet has left the unified buffer
+            self.upstream_updates.pop(packet)(packet)
 
     def packet_in_service(self) -> Packet:
         """
@@ -182,93 +186,89 @@ class DRRServer:
         """
         Returns the total number of packets currently in the server.
         """
-        return sum(self.flow_queue_count.values())
+        return self.packet_count
 
     def run(self):
         """The generator function used in simulations."""
         while True:
-            while self.total_packets() > 0:
-                flow_queue_counts = self.flow_queue_count.items()
-
-                for queue_id, count in flow_queue_counts:
-                    if count > 0:
-                        self.deficit[queue_id] += self.quantum[queue_id]
-                        if self.debug:
-                            print(
-                                f"Flow queue length: {self.flow_queue_count}, ",
-                                f"deficit counters: {self.deficit}")
-
-                    while self.deficit[queue_id] > 0 and self.flow_queue_count[
-                            queue_id] > 0:
-                        if queue_id in self.head_of_line:
-                            packet = self.head_of_line[queue_id]
-                            del self.head_of_line[queue_id]
-                        else:
-                            if self.zero_downstream_buffer:
-                                ds_store = self.downstream_stores[queue_id]
-                                packet = yield ds_store.get()
-                            else:
-                                store = self.stores[queue_id]
-                                packet = yield store.get()
-
-                        assert queue_id == self.flow_classes(packet)
-
-                        if packet.size <= self.deficit[queue_id]:
-                            self.current_packet = packet
-                            yield self.env.timeout(packet.size * 8.0 /
-                                                   self.rate)
-
-                            if self.zero_downstream_buffer:
-                                self.update_stats(packet)
-
-                                self.out.put(
-                                    packet,
-                                    upstream_update=self.update,
-                                    upstream_store=self.stores[queue_id])
-                            else:
-                                self.update_stats(packet)
-                                self.update(packet)
-                                self.out.put(packet)
-
-                            self.current_packet = None
+            while self.active_list:
+                queue_id = self.active_list.popleft()
+
+                self.deficit[queue_id] += self.quantum[queue_id]
+                if self.debug:
+                    print(f"Flow queue length: {self.flow_queue_count}, ",
+                          f"deficit counters: {self.deficit}")
+
+                while self.deficit[queue_id] > 0 and self.flow_queue_count[
+                        queue_id] > 0:
+                    if queue_id in self.head_of_line:
+                        packet = self.head_of_line[queue_id]
+                        del self.head_of_line[queue_id]
+                    else:
+                        packet = yield self.stores[queue_id].get()
+
+                    assert queue_id == self.flow_classes(packet)
+
+                    if packet.size <= self.deficit[queue_id]:
+                        self.current_packet = packet
+                        yield self.env.timeout(packet.size * 8.0 / self.rate)
+
+                        if self.zero_downstream_buffer:
+                            self.update_stats(packet)
+
+                            self.out.put(packet,
+                                         upstream_update=self.update)
                         else:
-                            assert not queue_id in self.head_of_line
-                            self.head_of_line[queue_id] = packet
-                            break
+                            self.update_stats(packet)
+                            self.update(packet)
+                            self.out.put(packet)
+
+                        self.current_packet = None
+                    else:
+                        assert not queue_id in self.head_of_line
+                        self.head_of_line[queue_id] = packet
+                        break
+
+                # A queue that is still backlogged goes back to the end of the active
+                # list; otherwise it leaves the active list until its next packet arrives
+                if self.flow_queue_count[queue_id] > 0:
+                    self.active_list.append(queue_id)
+                else:
+                    self.active_set.remove(queue_id)
 
             # No more packets in the scheduler to process at this time
             yield self.packets_available.get()
 
     def put(self, packet, upstream_update=None, upstream_store=None):
-        """ Sends a packet to this element. """
+        """Sends a packet to this element. The `upstream_store` argument is deprecated
+        and ignored: the upstream element keeps the packet in its own queue, and is
+        only notified through `upstream_update` when the packet leaves this element."""
+        queue_id = self.flow_classes(packet)
         self.packets_received += 1
-        self.byte_sizes[self.flow_classes(packet)] += packet.size
+        self.byte_sizes[queue_id] += packet.size
 
         if self.debug:
             print(
                 f"Packet arrived at {self.env.now}, flow_id {packet.flow_id}, "
-                f"belonging to class {self.flow_classes(packet)} "
+                f"belonging to class {queue_id} "
                 f"packet_id {packet.packet_id}, "
-                f"deficit {self.deficit[self.flow_classes(packet)]}, "
+                f"deficit {self.deficit[queue_id]}, "
                 f"deficit counters: {self.deficit}")
 
-        if not self.flow_classes(packet) in self.stores:
-            self.stores[self.flow_classes(packet)] = simpy.Store(self.env)
-
-            if self.zero_downstream_buffer:
-                self.downstream_stores[self.flow_classes(
-                    packet)] = simpy.Store(self.env)
+        if not queue_id in self.stores:
+            self.stores[queue_id] = simpy.Store(self.env)
 
-        if self.total_packets() == 0:
+        if self.packet_count == 0:
             self.packets_available.put(True)
 
-        self.flow_queue_count[self.flow_classes(packet)] += 1
+        self.flow_queue_count[queue_id] += 1
+        self.packet_count += 1
 
-        if self.zero_buffer and upstream_update is not None and upstream_store is not None:
-            self.upstream_stores[packet] = upstream_store
-            self.upstream_updates[packet] = upstream_update
+        if queue_id not in self.active_set:
+            self.active_set.add(queue_id)
+            self.active_list.append(queue_id)
 
-        if self.zero_downstream_buffer:
-            self.downstream_stores[self.flow_classes(packet)].put(packet)
+        if self.zero_buffer and upstream_update is not None:
+            self.upstream_updates[packet] = upstream_update
 
-        return self.stores[self.flow_classes(packet)].put(packet)
+        return self.stores[queue_id].put(packet)
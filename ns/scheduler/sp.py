@@ -71,6 +71,18 @@ class SPServer:
 
         self.priorities_list = sorted(self.prio_queue_count, reverse=True)
 
+        # Each priority is assigned a bit in a bitmap according to its rank, with the
+        # highest priority as the least significant bit. A bit is set when there are
+        # packets with the corresponding priority, so that the highest non-empty
+        # priority can be found without walking through all the priorities.
+        self.prio_ranks = {
+            prio: rank
+            for rank, prio in enumerate(self.priorities_list)
+        }
+        self.nonempty_prios = 0
+        # the total number of packets currently in the queues
+        self.packet_count = 0
+
         self.packets_available = simpy.Store(self.env)
 
         self.current_packet = None
@@ -80,11 +92,8 @@ class SPServer:
         self.packets_received = 0
         self.out = None
         self.upstream_updates = {}
-        self.upstream_stores = {}
         self.zero_buffer = zero_buffer
         self.zero_downstream_buffer = zero_downstream_buffer
-        if self.zero_downstream_buffer:
-            self.downstream_stores = {}
 
         self.debug = debug
         self.action = env.process(self.run())
@@ -94,7 +103,12 @@ class SPServer:
         The packet has been sent (or authorized to be sent if this scheduler has a zero-buffer
         configuration), we need to update the internal statistics related to this event.
         """
-        self.prio_queue_count[packet.prio[self.element_id]] -= 1
+        prio = packet.prio[self.element_id]
+        self.prio_queue_count[prio] -= 1
+        self.packet_count -= 1
+
+        if self.prio_queue_count[prio] == 0:
+            self.nonempty_prios &= ~(1 << self.prio_ranks[prio])
 
         if self.flow_classes(packet) in self.byte_sizes:
             self.byte_sizes[self.flow_classes(packet)] -= packet.size
@@ -113,13 +127,10 @@ class SPServer:
         node that has no buffers. Propagate to the upstream if this node also has a zero-buffer
         configuration.
         """
-        # With no local buffers, this element needs to pull the packet from upstream
+        # With no local buffers, the packet has been held in the upstream element's buffer
         if self.zero_buffer:
-            # For each packet, remove it from its own upstream's store
-            self.upstream_stores[packet].get()
-            del self.upstream_stores[packet]
-            self.upstream_updates[packet](packet)
-            del self.upstream_updates[packet]
+            # Let the upstream element know that the packet has left the unified buffer
+            self.upstream_updates.pop(packet)(packet)
 
     def packet_in_service(self) -> Packet:
         """
@@ -158,54 +169,58 @@ class SPServer:
         """
         Returns the total number of packets currently in the queues.
         """
-        return sum(self.prio_queue_count.values())
+        return self.packet_count
+
+    def highest_prio(self):
+        """
+        Returns the highest priority with packets in the queues, or None if all
+        the queues are empty.
+        """
+        if self.nonempty_prios == 0:
+            return None
+
+        lowest_bit = self.nonempty_prios & -self.nonempty_prios
+        return self.priorities_list[lowest_bit.bit_length() - 1]
 
     def run(self):
         """The generator function used in simulations."""
         while True:
-            for prio in self.priorities_list:
-                if self.prio_queue_count[prio] > 0:
-                    if self.zero_downstream_buffer:
-                        ds_store = self.downstream_stores[prio]
-                        packet = yield ds_store.get()
-                        packet.prio[self.element_id] = prio
-
-                        self.current_packet = packet
-                        yield self.env.timeout(packet.size * 8.0 / self.rate)
-
-                        self.update_stats(packet)
-                        self.out.put(packet,
-                                     upstream_update=self.update,
-                                     upstream_store=self.stores[prio])
-                        self.current_packet = None
-                    else:
-                        store = self.stores[prio]
-                        packet = yield store.get()
-                        packet.prio[self.element_id] = prio
-
-                        self.current_packet = packet
-                        yield self.env.timeout(packet.size * 8.0 / self.rate)
-
-                        self.update_stats(packet)
-                        self.update(packet)
-                        self.out.put(packet)
-                        self.current_packet = None
-
-                    break
-
-            if self.total_packets() == 0:
+            prio = self.highest_prio()
+
+            if prio is not None:
+                packet = yield self.stores[prio].get()
+                packet.prio[self.element_id] = prio
+
+                self.current_packet = packet
+                yield self.env.timeout(packet.size * 8.0 / self.rate)
+
+                self.update_stats(packet)
+                if self.zero_downstream_buffer:
+                    self.out.put(packet, upstream_update=self.update)
+                else:
+                    self.update(packet)
+                    self.out.put(packet)
+                self.current_packet = None
+
+            if self.packet_count == 0:
                 yield self.packets_available.get()
 
     def put(self, packet, upstream_update=None, upstream_store=None):
-        """ Sends a packet to this element. """
+        """Sends a packet to this element. The `upstream_store` argument is deprecated
+        and ignored: the upstream element keeps the packet in its own queue, and is
+        only notified through `upstream_update` when the packet leaves this element."""
         self.packets_received += 1
         self.byte_sizes[self.flow_classes(packet)] += packet.size
 
-        if self.total_packets() == 0:
+        if self.packet_count == 0:
             self.packets_available.put(True)
 
         prio = self.prio[self.flow_classes(packet)]
         self.prio_queue_count[prio] += 1
+        self.packet_count += 1
+
+        if self.prio_queue_count[prio] == 1:
+            self.nonempty_prios |= 1 << self.prio_ranks[prio]
 
         if self.debug:
             print(
@@ -216,14 +231,7 @@ class SPServer:
         if not prio in self.stores:
             self.stores[prio] = simpy.Store(self.env)
 
-            if self.zero_downstream_buffer:
-                self.downstream_stores[prio] = simpy.Store(self.env)
-
-        if self.zero_buffer and upstream_update is not None and upstream_store is not None:
-            self.upstream_stores[packet] = upstream_store
+        if self.zero_buffer and upstream_update is not None:
             self.upstream_updates[packet] = upstream_update
 
-        if self.zero_downstream_buffer:
-            self.downstream_stores[prio].put(packet)
-
         return self.stores[prio].put(packet)
@@ -88,11 +88,8 @@ class VirtualClockServer:
         self.byte_sizes = dd(lambda: 0)
 
         self.upstream_updates = {}
-        self.upstream_stores = {}
         self.zero_buffer = zero_buffer
         self.zero_downstream_buffer = zero_downstream_buffer
-        if self.zero_downstream_buffer:
-            self.downstream_store = taggedstore.TaggedStore(env)
 
         self.store = taggedstore.TaggedStore(env)
         self.action = env.process(self.run())
@@ -121,13 +118,10 @@ class VirtualClockServer:
         node that has no buffers. Propagate to the upstream if this node also has a zero-buffer
         configuration.
         """
-        # With no local buffers, this element needs to pull the packet from upstream
+        # With no local buffers, the packet has been held in the upstream element's buffer
         if self.zero_buffer:
-            # For each packet, remove it from its own upstream's store
-            self.upstream_stores[packet].get()
-            del self.upstream_stores[packet]
-            self.upstream_updates[packet](packet)
-            del self.upstream_updates[packet]
+            # Let the upstream element know that the packet has left the unified buffer
+            self.upstream_updates.pop(packet)(packet)
 
     def packet_in_service(self) -> Packet:
         """
@@ -162,30 +156,27 @@ class VirtualClockServer:
     def run(self):
         """The generator function used in simulations."""
         while True:
-            if self.zero_downstream_buffer:
-                packet = yield self.downstream_store.get()
-
-                self.current_packet = packet
-                yield self.env.timeout(packet.size * 8.0 / self.rate)
+            packet = yield self.store.get()
 
-                self.update_stats(packet)
-                self.out.put(
-                    packet, upstream_update=self.update, upstream_store=self.store
-                )
-                self.current_packet = None
-            else:
-                packet = yield self.store.get()
+            self.current_packet = packet
+            yield self.env.timeout(packet.size * 8.0 / self.rate)
 
-                self.current_packet = packet
-                yield self.env.timeout(packet.size * 8.0 / self.rate)
+            self.update_stats(packet)
 
-                self.update_stats(packet)
+            if self.zero_downstream_buffer:
+                # The packet stays in the unified buffer until the downstream
+                # element calls self.update() to release it
+                self.out.put(packet, upstream_update=self.update)
+            else:
                 self.update(packet)
                 self.out.put(packet)
-                self.current_packet = None
+
+            self.current_packet = None
 
     def put(self, packet, upstream_update=None, upstream_store=None):
-        """Sends a packet to this element."""
+        """Sends a packet to this element. The `upstream_store` argument is deprecated
+        and ignored: the upstream element keeps the packet in its own queue, and is
+        only notified through `upstream_update` when the packet leaves this element."""
         self.packets_received += 1
         self.byte_sizes[self.flow_classes(packet)] += packet.size
         now = self.env.now
@@ -219,15 +210,7 @@ class VirtualClockServer:
                 f"aux_vc {self.aux_vc[self.flow_classes(packet)]}"
             )
 
-        if (
-            self.zero_buffer
-            and upstream_update is not None
-            and upstream_store is not None
-        ):
-            self.upstream_stores[packet] = upstream_store
+        if self.zero_buffer and upstream_update is not None:
             self.upstream_updates[packet] = upstream_update
 
-        if self.zero_downstream_buffer:
-            self.downstream_store.put((self.aux_vc[self.flow_classes(packet)], packet))
-
         return self.store.put((self.aux_vc[self.flow_classes(packet)], packet))
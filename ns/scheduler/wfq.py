@@ -13,6 +13,7 @@ from collections import defaultdict as dd
 from collections.abc import Callable
 
 from ns.packet.packet import Packet
+from ns.utils.background import BackgroundLoad
 from ns.utils import taggedstore
 
 
@@ -44,6 +45,10 @@ class WFQServer:
         next-hop element.
     debug: bool
         If True, prints more verbose debug information.
+    background: BackgroundLoad (or None)
+        the background traffic modeled as a fluid on the outgoing link, whose rate is not
+        available to the packets served by this server. The virtual time then advances
+        with the capacity left over by the background traffic.
     """
 
     def __init__(
@@ -55,9 +60,11 @@ class WFQServer:
         zero_buffer=False,
         zero_downstream_buffer=False,
         debug: bool = False,
+        background: BackgroundLoad = None,
     ) -> None:
         self.env = env
         self.rate = rate
+        self.background = background
         self.weights = weights
 
         self.flow_classes = flow_classes
@@ -76,7 +83,15 @@ class WFQServer:
         else:
             raise ValueError("Weights must be either a list or a dictionary.")
 
+        # Finish times are reset to zero whenever the server becomes idle. Rather than
+        # resetting each of them, a finish time is only valid if it has been updated
+        # in the current epoch, which is incremented when the server becomes idle.
+        self.epoch = 0
+        self.finish_epochs = dict.fromkeys(self.finish_times, 0)
+
         self.active_set = set()
+        # the sum of the weights of all the flow classes in the active set
+        self.weight_sum = 0.0
         self.vtime = 0.0
         self.out = None
         self.packets_received = 0
@@ -87,11 +102,8 @@ class WFQServer:
         self.byte_sizes = dd(lambda: 0)
 
         self.upstream_updates = {}
-        self.upstream_stores = {}
         self.zero_buffer = zero_buffer
         self.zero_downstream_buffer = zero_downstream_buffer
-        if self.zero_downstream_buffer:
-            self.downstream_store = taggedstore.TaggedStore(env)
 
         self.store = taggedstore.TaggedStore(env)
         self.action = env.process(self.run())
@@ -102,53 +114,65 @@ class WFQServer:
         The packet has been sent (or authorized to be sent if the downstream node has a zero-buffer
         configuration), we need to update the internal statistics related to this event.
         """
-
-        weight_sum = 0.0
         now = self.env.now
+        queue_id = self.flow_classes(packet)
 
         # Updating the virtual time based on the current set of active flow classes
-        for i in self.active_set:
-            weight_sum += self.weights[i]
-
-        self.vtime += (now - self.last_update) / weight_sum
+        self.vtime += self.elapsed(now) / self.weight_sum
 
         # Computing the new set of active flow classes
-        self.flow_queue_count[self.flow_classes(packet)] -= 1
+        self.flow_queue_count[queue_id] -= 1
 
-        if self.flow_queue_count[self.flow_classes(packet)] == 0:
-            self.active_set.remove(self.flow_classes(packet))
+        if self.flow_queue_count[queue_id] == 0:
+            self.active_set.remove(queue_id)
+            self.weight_sum -= self.weights[queue_id]
 
         if len(self.active_set) == 0:
-            self.vtime = 0.0
-            for queue_id, __ in self.finish_times.items():
-                self.finish_times[queue_id] = 0.0
+            self.reset()
 
         self.last_update = now
 
-        if self.flow_classes(packet) in self.byte_sizes:
-            self.byte_sizes[self.flow_classes(packet)] -= packet.size
+        if queue_id in self.byte_sizes:
+            self.byte_sizes[queue_id] -= packet.size
         else:
             raise ValueError("Error: the packet is from an unrecorded flow.")
 
         if self.debug:
             print(
                 f"Sent Packet {packet.packet_id} from flow {packet.flow_id} "
-                f"belonging to class {self.flow_classes(packet)} at time {now}."
+                f"belonging to class {queue_id} at time {now}."
             )
 
+    def elapsed(self, now) -> float:
+        """Returns the time since the last update, or with background traffic, the time
+        it would have taken to serve at the full rate the bits served since then."""
+        if self.background is None:
+            return now - self.last_update
+        return self.background.service(self.last_update, now, self.rate) / self.rate
+
+    def reset(self):
+        """Resets the virtual time and all the finish times when the server becomes idle."""
+        self.vtime = 0.0
+        self.weight_sum = 0.0
+        self.epoch += 1
+
+    def finish_time(self, queue_id) -> float:
+        """Returns the finish time of the last packet from a flow class in the current epoch."""
+        if self.finish_epochs.get(queue_id) == self.epoch:
+            return self.finish_times[queue_id]
+
+        return 0.0
+
     def update(self, packet):
         """
         The packet has just been retrieved from this element's own buffer by a downstream
         node that has no buffers. Propagate to the upstream if this node also has a zero-buffer
         configuration.
         """
-        # With no local buffers, this element needs to pull the packet from upstream
+        # With no local buffers, the packet has been held in the upstream element's buffer
         if self.zero_buffer:
-            # For each packet, remove it from its own upstream's store
-            self.upstream_stores[packet].get()
-            del self.upstream_stores[packet]
-            self.upstream_updates[packet](packet)
-            del self.upstream_updates[packet]
+            # Let the upstream element know that the packet has left the unified buffer
+            self.upstream_updates.pop(packet)(packet)
 
     def packet_in_service(self) -> Packet:
         """
@@ -184,78 +208,69 @@ class WFQServer:
     def run(self):
         """The generator function used in simulations."""
         while True:
-            if self.zero_downstream_buffer:
-                packet = yield self.downstream_store.get()
-                self.current_packet = packet
-                yield self.env.timeout(packet.size * 8.0 / self.rate)
+            packet = yield self.store.get()
 
-                self.update_stats(packet)
-                self.out.put(
-                    packet, upstream_update=self.update, upstream_store=self.store
-                )
-                self.current_packet = None
+            self.current_packet = packet
+            if self.background is None:
+                yield self.env.timeout(packet.size * 8.0 / self.rate)
             else:
-                packet = yield self.store.get()
+                yield self.env.timeout(
+                    self.background.transmission_time(self.env.now, packet.size * 8.0,
+                                                      self.rate))
 
-                self.current_packet = packet
-                yield self.env.timeout(packet.size * 8.0 / self.rate)
+            self.update_stats(packet)
 
-                self.update_stats(packet)
+            if self.zero_downstream_buffer:
+                # The packet stays in the unified buffer until the downstream
+                # element calls self.update() to release it
+                self.out.put(packet, upstream_update=self.update)
+            else:
                 self.update(packet)
                 self.out.put(packet)
-                self.current_packet = None
+
+            self.current_packet = None
 
     def put(self, packet, upstream_update=None, upstream_store=None):
-        """Sends a packet to this element."""
+        """Sends a packet to this element. The `upstream_store` argument is deprecated
+        and ignored: the upstream element keeps the packet in its own queue, and is
+        only notified through `upstream_update` when the packet leaves this element."""
         self.packets_received += 1
         flow_id = packet.flow_id
+        queue_id = self.flow_classes(packet)
 
         # Updating the virtual time and the finish time for each flow class
         now = self.env.now
 
         if len(self.active_set) == 0:
-            self.vtime = 0.0
-            for queue_id, __ in self.finish_times.items():
-                self.finish_times[queue_id] = 0.0
+            self.reset()
+            finish_time = 0.0
         else:
-            weight_sum = 0.0
-
-            for i in self.active_set:
-                weight_sum += self.weights[i]
-
-            self.vtime += (now - self.last_update) / weight_sum
-            self.finish_times[self.flow_classes(packet)] = max(
-                self.finish_times[self.flow_classes(packet)], self.vtime
-            ) + packet.size * 8.0 / (
-                self.rate * self.weights[self.flow_classes(packet)]
+            self.vtime += self.elapsed(now) / self.weight_sum
+            finish_time = max(self.finish_time(queue_id), self.vtime) + packet.size * 8.0 / (
+                self.rate * self.weights[queue_id]
             )
 
+        self.finish_times[queue_id] = finish_time
+        self.finish_epochs[queue_id] = self.epoch
+
         # Updating the byte sizes, the flow queue count, and the set of active flows
-        self.byte_sizes[self.flow_classes(packet)] += packet.size
-        self.flow_queue_count[self.flow_classes(packet)] += 1
-        self.active_set.add(self.flow_classes(packet))
+        self.byte_sizes[queue_id] += packet.size
+        self.flow_queue_count[queue_id] += 1
+        if queue_id not in self.active_set:
+            self.active_set.add(queue_id)
+            self.weight_sum += self.weights[queue_id]
 
         if self.debug:
             print(
                 f"Packet arrived at {now}, with flow_id {flow_id}, "
-                f"belonging to class {self.flow_classes(packet)}, "
+                f"belonging to class {queue_id}, "
                 f"packet_id {packet.packet_id}, "
-                f"finish_time {self.finish_times[self.flow_classes(packet)]}"
+                f"finish_time {finish_time}"
             )
 
         self.last_update = now
 
-        if (
-            self.zero_buffer
-            and upstream_update is not None
-            and upstream_store is not None
-        ):
-            self.upstream_stores[packet] = upstream_store
+        if self.zero_buffer and upstream_update is not None:
             self.upstream_updates[packet] = upstream_update
 
-        if self.zero_downstream_buffer:
-            self.downstream_store.put(
-                (self.finish_times[self.flow_classes(packet)], packet)
-            )
-
-        return self.store.put((self.finish_times[self.flow_classes(packet)], packet))
+        return self.store.put((finish_time, packet))
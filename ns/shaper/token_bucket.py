@@ -48,11 +48,8 @@ class TokenBucketShaper:
         self.peak = peak
 
         self.upstream_updates = {}
-        self.upstream_stores = {}
         self.zero_buffer = zero_buffer
         self.zero_downstream_buffer = zero_downstream_buffer
-        if self.zero_downstream_buffer:
-            self.downstream_stores = simpy.Store(env)
 
         self.current_bucket = bucket_size  # Current size of the bucket in bytes
         self.update_time = 0.0  # Last time the bucket was updated
@@ -66,13 +63,10 @@ class TokenBucketShaper:
         node that has no buffers. Propagate to the upstream if this node also has a zero-buffer
         configuration.
         """
-        # With no local buffers, this element needs to pull the packet from upstream
+        # With no local buffers, the packet has been held in the upstream element's buffer
         if self.zero_buffer:
-            # For each packet, remove it from its own upstream's store
-            self.upstream_stores[packet].get()
-            del self.upstream_stores[packet]
-            self.upstream_updates[packet](packet)
-            del self.upstream_updates[packet]
+            # Let the upstream element know that the packet has left the unified buffer
+            self.upstream_updates.pop(packet)(packet)
 
         if self.debug:
             print(
@@ -81,10 +75,7 @@ class TokenBucketShaper:
     def run(self):
         """The generator function used in simulations."""
         while True:
-            if self.zero_downstream_buffer:
-                packet = yield self.downstream_stores.get()
-            else:
-                packet = yield self.store.get()
+            packet = yield self.store.get()
 
             now = self.env.now
 
@@ -109,18 +100,14 @@ class TokenBucketShaper:
             # Sending the packet now
             if self.peak is None:  # infinite peak rate
                 if self.zero_downstream_buffer:
-                    self.out.put(packet,
-                                 upstream_update=self.update,
-                                 upstream_store=self.store)
+                    self.out.put(packet, upstream_update=self.update)
                 else:
                     self.update(packet)
                     self.out.put(packet)
             else:
                 yield self.env.timeout(packet.size * 8.0 / self.peak)
                 if self.zero_downstream_buffer:
-                    self.out.put(packet,
-                                 upstream_update=self.update,
-                                 upstream_store=self.store)
+                    self.out.put(packet, upstream_update=self.update)
                 else:
                     self.update(packet)
                     self.out.put(packet)
@@ -132,13 +119,11 @@ class TokenBucketShaper:
                 )
 
     def put(self, packet, upstream_update=None, upstream_store=None):
-        """ Sends a packet to this element. """
+        """Sends a packet to this element. The `upstream_store` argument is deprecated
+        and ignored: the upstream element keeps the packet in its own queue, and is
+        only notified through `upstream_update` when the packet leaves this element."""
         self.packets_received += 1
-        if self.zero_buffer and upstream_update is not None and upstream_store is not None:
-            self.upstream_stores[packet] = upstream_store
+        if self.zero_buffer and upstream_update is not None:
             self.upstream_updates[packet] = upstream_update
 
-        if self.zero_downstream_buffer:
-            self.downstream_stores.put(packet)
-
         return self.store.put(packet)
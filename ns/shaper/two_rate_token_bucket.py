@@ -53,11 +53,8 @@ class TwoRateTokenBucketShaper:
         self.packets_sent = 0
 
         self.upstream_updates = {}
-        self.upstream_stores = {}
         self.zero_buffer = zero_buffer
         self.zero_downstream_buffer = zero_downstream_buffer
-        if self.zero_downstream_buffer:
-            self.downstream_stores = simpy.Store(env)
 
         self.current_bucket_commit = cbs  # Current size of the committed bucket in bytes
         self.current_bucket_peak = pbs  # Current size of the peak bucket in bytes
@@ -72,21 +69,15 @@ class TwoRateTokenBucketShaper:
         node that has no buffers. Propagate to the upstream if this node also has a zero-buffer
         configuration.
         """
-        # With no local buffers, this element needs to pull the packet from upstream
+        # With no local buffers, the packet has been held in the upstream element's buffer
         if self.zero_buffer:
-            # For each packet, remove it from its own upstream's store
-            self.upstream_stores[packet].get()
-            del self.upstream_stores[packet]
-            self.upstream_updates[packet](packet)
-            del self.upstream_updates[packet]
+            # Let the upstream element know that the packet has left the unified buffer
+            self.upstream_updates.pop(packet)(packet)
 
     def run(self):
         """The generator function used in simulations."""
         while True:
-            if self.zero_downstream_buffer:
-                packet = yield self.downstream_stores.get()
-            else:
-                packet = yield self.store.get()
+            packet = yield self.store.get()
 
             now = self.env.now
 
@@ -140,9 +131,7 @@ class TwoRateTokenBucketShaper:
 
             # Sending the packet now
             if self.zero_downstream_buffer:
-                self.out.put(packet,
-                             upstream_update=self.update,
-                             upstream_store=self.store)
+                self.out.put(packet, upstream_update=self.update)
             else:
                 self.update(packet)
                 self.out.put(packet)
@@ -155,12 +144,11 @@ class TwoRateTokenBucketShaper:
                 )
 
     def put(self, packet, upstream_update=None, upstream_store=None):
-        """ Sends a packet to this element. """
+        """Sends a packet to this element. The `upstream_store` argument is deprecated
+        and ignored: the upstream element keeps the packet in its own queue, and is
+        only notified through `upstream_update` when the packet leaves this element."""
         self.packets_received += 1
-        if self.zero_buffer and upstream_update is not None and upstream_store is not None:
-            self.upstream_stores[packet] = upstream_store
+        if self.zero_buffer and upstream_update is not None:
             self.upstream_updates[packet] = upstream_update
 
-        if self.zero_downstream_buffer:
-            self.downstream_stores.put(packet)
         return self.store.put(packet)
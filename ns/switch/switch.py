@@ -11,6 +11,48 @@ from ns.scheduler.virtual_clock import VirtualClockServer
 from ns.scheduler.sp import SPServer
 
 
+class LazyPort:
+    """ A placeholder for an outgoing port of a switch that has not carried any packets yet.
+        Its downstream element can be connected as usual by setting its `out` attribute.
+        The port itself, which starts its own simpy process (along with the process of its
+        scheduler, if any), is only created when the first packet arrives, and then
+        replaces the placeholder in the switch's lists of ports.
+
+        Parameters
+        ----------
+        create: function
+            the function that creates the port, given its port number and its downstream
+            element, and returns the element that receives its packets and the element
+            connected to the downstream element.
+        port_number: int
+            the port number on the switch.
+    """
+
+    def __init__(self, create: Callable, port_number: int) -> None:
+        self.create = create
+        self.port_number = port_number
+        self.element = None
+        self.last_element = None
+        self._out = None
+
+    @property
+    def out(self):
+        """ The downstream element of this port. """
+        return self._out
+
+    @out.setter
+    def out(self, out):
+        self._out = out
+        if self.last_element is not None:
+            self.last_element.out = out
+
+    def put(self, packet):
+        """ Sends a packet to this element, creating the port first if needed. """
+        if self.element is None:
+            self.element, self.last_element = self.create(self.port_number, self._out)
+        self.element.put(packet)
+
+
 class SimplePacketSwitch:
     """ Implements a packet switch with a FIFO bounded buffer on each of the outgoing ports.
 
@@ -28,6 +70,9 @@ class SimplePacketSwitch:
             The (optional) element ID of this component.
         debug: bool
             If True, prints more verbose debug information.
+        lazy_ports: bool
+            If True, each outgoing port is only created when it receives its first packet,
+            so that ports that never carry traffic cost neither memory nor simpy processes.
     """
 
     def __init__(self,
@@ -36,19 +81,34 @@ class SimplePacketSwitch:
                  port_rate: float,
                  buffer_size: int,
                  element_id: str = "",
-                 debug: bool = False) -> None:
+                 debug: bool = False,
+                 lazy_ports: bool = False) -> None:
         self.env = env
-        self.ports = []
+        self.port_rate = port_rate
+        self.buffer_size = buffer_size
+        self.element_id = element_id
+        self.debug = debug
+
+        self.ports = [None] * nports
         for port in range(nports):
-            self.ports.append(
-                Port(env,
-                     rate=port_rate,
-                     qlimit=buffer_size,
-                     limit_bytes=False,
-                     element_id=f"{element_id}_{port}",
-                     debug=debug))
+            if lazy_ports:
+                self.ports[port] = LazyPort(self.create_port, port)
+            else:
+                self.create_port(port)
+
         self.demux = FIBDemux(fib=None, outs=self.ports, default=None)
 
+    def create_port(self, port: int, out=None) -> tuple:
+        """ Creates an outgoing port, connected to the given downstream element. """
+        self.ports[port] = Port(self.env,
+                                rate=self.port_rate,
+                                qlimit=self.buffer_size,
+                                limit_bytes=False,
+                                element_id=f"{self.element_id}_{port}",
+                                debug=self.debug)
+        self.ports[port].out = out
+        return self.ports[port], self.ports[port]
+
     def put(self, packet):
         """ Sends a packet to this element. """
         self.demux.put(packet)
@@ -84,6 +144,10 @@ class FairPacketSwitch:
             The (optional) element ID of this component.
         debug: bool
             If True, prints more verbose debug information.
+        lazy_ports: bool
+            If True, each outgoing port and its scheduler are only created when the port
+            receives its first packet, so that ports that never carry traffic cost neither
+            memory nor simpy processes.
     """
 
     def __init__(self,
@@ -95,61 +159,83 @@ class FairPacketSwitch:
                  server: str,
                  flow_classes: Callable = lambda p: p.flow_id,
                  element_id: str = "",
-                 debug: bool = False) -> None:
+                 debug: bool = False,
+                 lazy_ports: bool = False) -> None:
+        if server not in ('WFQ', 'DRR', 'VirtualClock', 'SP'):
+            raise ValueError(
+                "Scheduler type must be 'WFQ', 'DRR', 'SP', or 'VirtualClock'.")
+
         self.env = env
-        self.ports = []
-        self.egress_ports = []
+        self.port_rate = port_rate
+        self.buffer_size = buffer_size
+        self.weights = weights
+        self.server = server
+        self.flow_classes = flow_classes
+        self.element_id = element_id
+        self.debug = debug
+
+        self.ports = [None] * nports
+        self.egress_ports = [None] * nports
 
         for port in range(nports):
-            egress_port = Port(env,
-                               rate=0,
-                               qlimit=buffer_size,
-                               limit_bytes=False,
-                               zero_downstream_buffer=True,
-                               element_id=f"{element_id}_{port}",
-                               debug=debug)
-
-            scheduler = None
-            if server == 'WFQ':
-                scheduler = WFQServer(env,
-                                      rate=port_rate,
-                                      weights=weights,
-                                      flow_classes=flow_classes,
-                                      zero_buffer=True,
-                                      debug=debug)
-            elif server == 'DRR':
-                scheduler = DRRServer(env,
-                                      rate=port_rate,
-                                      weights=weights,
-                                      flow_classes=flow_classes,
-                                      zero_buffer=True,
-                                      debug=debug)
-            elif server == 'VirtualClock':
-                scheduler = VirtualClockServer(env,
-                                               rate=port_rate,
-                                               vticks=weights,
-                                               flow_classes=flow_classes,
-                                               zero_buffer=True,
-                                               debug=debug)
-            elif server == 'SP':
-                scheduler = SPServer(env,
-                                     rate=port_rate,
-                                     priorities=weights,
-                                     flow_classes=flow_classes,
-                                     zero_buffer=True,
-                                     debug=debug)
+            if lazy_ports:
+                lazy_port = LazyPort(self.create_port, port)
+                self.egress_ports[port] = lazy_port
+                self.ports[port] = lazy_port
             else:
-                raise ValueError(
-                    "Scheduler type must be 'WFQ', 'DRR', 'SP', or 'VirtualClock'."
-                )
-
-            egress_port.out = scheduler
-
-            self.egress_ports.append(egress_port)
-            self.ports.append(scheduler)
+                self.create_port(port)
 
         self.demux = FIBDemux(fib=None, outs=self.egress_ports, default=None)
 
+    def create_port(self, port: int, out=None) -> tuple:
+        """ Creates an outgoing port and its scheduler, connected to the given downstream
+            element. """
+        env = self.env
+        egress_port = Port(env,
+                           rate=0,
+                           qlimit=self.buffer_size,
+                           limit_bytes=False,
+                           zero_downstream_buffer=True,
+                           element_id=f"{self.element_id}_{port}",
+                           debug=self.debug)
+
+        scheduler = None
+        if self.server == 'WFQ':
+            scheduler = WFQServer(env,
+                                  rate=self.port_rate,
+                                  weights=self.weights,
+                                  flow_classes=self.flow_classes,
+                                  zero_buffer=True,
+                                  debug=self.debug)
+        elif self.server == 'DRR':
+            scheduler = DRRServer(env,
+                                  rate=self.port_rate,
+                                  weights=self.weights,
+                                  flow_classes=self.flow_classes,
+                                  zero_buffer=True,
+                                  debug=self.debug)
+        elif self.server == 'VirtualClock':
+            scheduler = VirtualClockServer(env,
+                                           rate=self.port_rate,
+                                           vticks=self.weights,
+                                           flow_classes=self.flow_classes,
+                                           zero_buffer=True,
+                                           debug=self.debug)
+        elif self.server == 'SP':
+            scheduler = SPServer(env,
+                                 rate=self.port_rate,
+                                 priorities=self.weights,
+                                 flow_classes=self.flow_classes,
+                                 zero_buffer=True,
+                                 debug=self.debug)
+
+        egress_port.out = scheduler
+        scheduler.out = out
+
+        self.egress_ports[port] = egress_port
+        self.ports[port] = scheduler
+        return egress_port, scheduler
+
     def put(self, packet):
         """ Sends a packet to this element. """
         self.demux.put(packet)
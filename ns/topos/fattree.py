@@ -49,6 +49,8 @@ def build(k):
 
     topo = nx.Graph()
     topo.name = "fat_tree_topology(%d)" % (k)
+    # used to compute the shortest paths between hosts without searching the graph
+    topo.graph["fat_tree_k"] = k
 
     # Create core nodes
     n_core = (k // 2)**2
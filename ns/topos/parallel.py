@@ -0,0 +1,411 @@
+"""
+Implements a conservative parallel discrete-event simulation of a network topology, which
+partitions the nodes of a `networkx` graph (such as a fat-tree built by `ns.topos.fattree`)
+across worker processes, each simulating its own partition in its own simpy `Environment`.
+
+Every link between two nodes is modeled as a wire with a constant propagation delay. A packet
+sent over a link that crosses two partitions at time t cannot arrive before t + d, where d is
+the propagation delay of the link; the smallest such delay over all the links crossing
+partitions is therefore a lookahead L within which the partitions cannot affect each other.
+The simulation advances in synchronization windows: in each window [T, T + L), all partitions
+run independently up to T + L, and the packets sent over links that cross partitions during the
+window are exchanged in a single batched message per partition at the end of the window, to be
+delivered in a later window. Windows start at the earliest pending event across all partitions,
+so that idle periods are skipped.
+
+Packets sent across partitions arrive at exactly the same times, and are handled in the same
+order with respect to simultaneous events, as they would be within a single partition. The
+partitioned simulation therefore reproduces the results of the same network simulated as a
+single partition in one process, as long as each element draws its random numbers from its own
+stream (see `ns.utils.rng.SeedTree`) rather than from the global `random` module.
+
+The network is built in each worker process by a module-level function
+
+    build(env, G, nodes, **kwargs) -> (devices, collect)
+
+which creates the devices (such as `FairPacketSwitch` instances) for the given subset of nodes,
+as well as the packet generators of the flows whose sources, and the packet sinks of the flows
+whose destinations, are among these nodes. The nodes should be visited in the order in which
+they appear in the graph. It returns a dictionary mapping each node to its device, and a
+function with no arguments that returns the (picklable) results of the partition after the
+simulation has finished. Each device should have a `put()` function and a list of `ports`,
+whose outgoing links to the neighboring nodes are connected according to the 'port_to_nexthop'
+attribute of each node, as computed by `ns.topos.utils.generate_fib()`.
+"""
+import math
+import multiprocessing
+import traceback
+
+import simpy
+from simpy.events import Event
+
+
+def pod_partition(G, n_partitions: int) -> dict:
+    """Partitions the nodes of a fat-tree into contiguous groups of pods, and distributes the
+    core switches, which do not belong to any pod, evenly across the partitions. Returns a
+    dictionary mapping each node to the index of its partition."""
+    pods = sorted({G.nodes[n]["pod"] for n in G.nodes() if "pod" in G.nodes[n]})
+    pod_index = {pod: i for i, pod in enumerate(pods)}
+    cores = [n for n in G.nodes() if "pod" not in G.nodes[n]]
+    core_index = {n: i for i, n in enumerate(cores)}
+
+    partition = {}
+    for n in G.nodes():
+        if "pod" in G.nodes[n]:
+            partition[n] = pod_index[G.nodes[n]["pod"]] * n_partitions // len(pods)
+        else:
+            partition[n] = core_index[n] * n_partitions // len(cores)
+
+    return partition
+
+
+class Arrival(Event):
+    """An event that is triggered at a given delay from now with a given priority, used for
+    the arrivals of packets at the ends of links, and for the ends of synchronization windows.
+    simpy handles events that are scheduled at the same time in the order of their priorities
+    (with URGENT = 0 before NORMAL = 1), and then in the order in which they were scheduled."""
+
+    def __init__(self, env, delay: float, priority: int, value=None):
+        super().__init__(env)
+        # an arrival is triggered as soon as it is scheduled, in the same way as a Timeout
+        self._ok = True
+        self._value = value
+        env.schedule(self, priority, delay)
+
+
+class Link:
+    """A link with a constant propagation delay between two nodes in the same partition. It
+    delays packets in the same way as a `Wire` with a constant delay, but without running a
+    process, as packets can never overtake each other.
+
+    Parameters
+    ----------
+    env: simpy.Environment
+        the simulation environment.
+    delay: float
+        the propagation delay of the link.
+    priority: int
+        the priority of the arrivals over this link, which orders them with respect to the
+        arrivals over other links at the same time.
+    """
+
+    def __init__(self, env, delay: float, priority: int):
+        self.env = env
+        self.delay = delay
+        self.priority = priority
+        self.out = None
+        self.packets_rec = 0
+
+    def put(self, packet):
+        """Sends a packet to this element."""
+        self.packets_rec += 1
+        Arrival(self.env, self.delay, self.priority, packet).callbacks.append(self.arrived)
+
+    def arrived(self, event):
+        """The callback used when a packet arrives at the end of the link."""
+        self.out.put(event.value)
+
+
+class BoundaryLink:
+    """The sending end of a link whose receiving node is simulated by another partition. It
+    holds each packet, along with its time of arrival at the receiving node, in an outbox
+    until the end of the synchronization window.
+
+    Parameters
+    ----------
+    env: simpy.Environment
+        the simulation environment.
+    delay: float
+        the propagation delay of the link.
+    priority: int
+        the priority of the arrivals over this link.
+    partition: int
+        the partition that simulates the receiving node.
+    node:
+        the receiving node.
+    outbox: list
+        the list of (partition, time, priority, node, packet) tuples to be sent at the end
+        of the window.
+    """
+
+    def __init__(self, env, delay: float, priority: int, partition: int, node,
+                 outbox: list):
+        self.env = env
+        self.delay = delay
+        self.priority = priority
+        self.partition = partition
+        self.node = node
+        self.outbox = outbox
+        self.packets_rec = 0
+
+    def put(self, packet):
+        """Sends a packet to this element."""
+        self.packets_rec += 1
+        # the packet is copied to the receiving process, and cannot be recycled there
+        packet.pool = None
+        self.outbox.append((self.partition, self.env.now + self.delay, self.priority,
+                            self.node, packet))
+
+
+def _delay_until(env, time: float) -> float:
+    """Returns the delay from now at which an event is scheduled at exactly the given time.
+    simpy computes the time of an event as (now + delay), which may be off by a rounding
+    error, so the delay is adjusted until the time is exact."""
+    delay = time - env.now
+    while env.now + delay < time:
+        delay = math.nextafter(delay, math.inf)
+    while env.now + delay > time:
+        delay = math.nextafter(delay, -math.inf)
+    return delay
+
+
+class Partition:
+    """The part of the network simulated by a single process.
+
+    Every link in the network is given its own priority, below simpy's URGENT priority, in
+    the order of the links' indices in the graph; the end of each synchronization window has
+    an even lower priority. All the packets arriving at a given time are therefore handled
+    before all other events at that time, and in the same order regardless of how the
+    network is partitioned or when the arrivals were scheduled. Packets at different nodes
+    often arrive at exactly the same time: for example, a packet arriving at a switch right
+    behind another one over the same path, at the time that the other packet finishes its
+    transmission.
+
+    Parameters
+    ----------
+    G: networkx.Graph
+        the topology, with the forwarding information computed by `generate_fib()`.
+    build: function
+        the module-level function that builds the devices of a subset of nodes.
+    partition: dict
+        a dictionary mapping each node to the index of its partition.
+    index: int
+        the index of this partition.
+    delay: float
+        the propagation delay of the links without a 'delay' attribute.
+    kwargs: dict
+        additional keyword arguments to `build`.
+    """
+
+    def __init__(self, G, build, partition: dict, index: int, delay: float, kwargs: dict):
+        self.env = simpy.Environment()
+        self.index = index
+        self.outbox = []
+
+        nodes = [n for n in G.nodes() if partition[n] == index]
+        self.devices, self.collect = build(self.env, G, nodes, **kwargs)
+
+        links = [(n, port_number, next_hop) for n in G.nodes()
+                 for port_number, next_hop in G.nodes[n]["port_to_nexthop"].items()]
+        self.stop_priority = -len(links) - 1
+
+        for link_index, (n, port_number, next_hop) in enumerate(links):
+            if partition[n] != index:
+                continue
+
+            link_delay = G.edges[n, next_hop].get("delay", delay)
+            priority = link_index - len(links)
+            if partition[next_hop] == index:
+                link = Link(self.env, link_delay, priority)
+                link.out = self.devices[next_hop]
+            else:
+                link = BoundaryLink(self.env, link_delay, priority, partition[next_hop],
+                                    next_hop, self.outbox)
+            self.devices[n].ports[port_number].out = link
+
+    def run_until(self, until: float):
+        """Runs the simulation up to the given time, stopping before any event at that time."""
+        stop = Arrival(self.env, _delay_until(self.env, until), self.stop_priority)
+        self.env.run(until=stop)
+
+    def run(self, until: float, arrivals: list) -> tuple:
+        """Schedules the packets arriving from other partitions, and runs the simulation
+        up to (but not including) the given time. Returns the packets sent to other
+        partitions, and the time of the next event in this partition."""
+        for time, priority, node, packet in arrivals:
+            device = self.devices[node]
+            arrival = Arrival(self.env, _delay_until(self.env, time), priority, packet)
+            arrival.callbacks.append(lambda event, device=device: device.put(event.value))
+
+        self.run_until(until)
+
+        outbox = self.outbox[:]
+        self.outbox.clear()
+        return outbox, self.env.peek()
+
+    def finish(self, until: float):
+        """Runs the simulation to its end, and returns the results of this partition."""
+        if self.env.now < until:
+            self.run_until(until)
+        return self.collect()
+
+
+def _run_partition(conn, G, build, partition, index, delay, kwargs):
+    """The main loop of a worker process, which simulates one partition as instructed by
+    the parent process. Each reply is a pair of an exception (or None) and a result; an
+    exception raised in the worker is sent to the parent process, with its traceback as
+    the result, to be raised there."""
+    try:
+        part = Partition(G, build, partition, index, delay, kwargs)
+
+        while True:
+            command, until, arrivals = conn.recv()
+            if command == "run":
+                conn.send((None, part.run(until, arrivals)))
+            else:
+                conn.send((None, part.finish(until)))
+                return
+    except Exception as exc:  # pylint: disable=broad-except
+        try:
+            conn.send((exc, traceback.format_exc()))
+        except Exception:  # pylint: disable=broad-except
+            # the exception itself cannot be pickled
+            conn.send((RuntimeError(repr(exc)), traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+def _worker_exited(index: int, worker) -> RuntimeError:
+    """Returns the error raised when the worker process of a partition has exited
+    without reporting an exception."""
+    worker.join()
+    return RuntimeError(
+        f"The worker process of partition {index} exited unexpectedly with exit "
+        f"code {worker.exitcode}.")
+
+
+def _send(conn, index: int, worker, message):
+    """Sends a command to the worker process of a partition."""
+    try:
+        conn.send(message)
+    except (BrokenPipeError, ConnectionResetError):
+        raise _worker_exited(index, worker) from None
+
+
+def _receive(conn, index: int, worker):
+    """Receives a reply from the worker process of a partition, and raises the exception
+    raised in the worker, if any."""
+    try:
+        exc, result = conn.recv()
+    except (EOFError, ConnectionResetError):
+        raise _worker_exited(index, worker) from None
+
+    if exc is not None:
+        raise exc from RuntimeError(
+            f"Raised in the worker process of partition {index}:\n{result}")
+    return result
+
+
+class ParallelSimulation:
+    """Simulates a network topology partitioned across worker processes, synchronized
+    conservatively using the propagation delays of the links that cross partitions.
+
+    Parameters
+    ----------
+    G: networkx.Graph
+        the topology, with the forwarding information computed by `generate_fib()`. The
+        propagation delay of a link can be set as the 'delay' attribute of its edge.
+    build: function
+        a module-level function build(env, G, nodes, **kwargs) that builds the devices,
+        packet generators and packet sinks of a subset of nodes, and returns a dictionary
+        mapping each node to its device, as well as a function returning the results.
+    partition: dict
+        a dictionary mapping each node to the index of its partition, such as the one
+        returned by `pod_partition()`. Each partition is simulated by its own process;
+        with a single partition, the simulation runs in the current process.
+    delay: float
+        the propagation delay of the links without a 'delay' attribute.
+    kwargs:
+        additional keyword arguments to `build`.
+    """
+
+    def __init__(self, G, build, partition: dict, delay: float, **kwargs):
+        self.G = G
+        self.build = build
+        self.partition = partition
+        self.delay = delay
+        self.kwargs = kwargs
+        self.n_partitions = max(partition.values()) + 1
+
+        # the lookahead is the smallest delay of all the links that cross partitions
+        self.lookahead = min(
+            (data.get("delay", delay) for u, v, data in G.edges(data=True)
+             if partition[u] != partition[v]),
+            default=math.inf,
+        )
+        if self.lookahead <= 0:
+            raise ValueError(
+                "The links that cross partitions must have positive propagation delays.")
+
+        self.windows = 0
+        self.packets_exchanged = 0
+
+    def run(self, until: float) -> list:
+        """Runs the simulation until the given time, and returns the list of results
+        of all the partitions."""
+        if self.n_partitions == 1:
+            part = Partition(self.G, self.build, self.partition, 0, self.delay,
+                             self.kwargs)
+            return [part.finish(until)]
+
+        conns = []
+        workers = []
+        for index in range(self.n_partitions):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_run_partition,
+                args=(child_conn, self.G, self.build, self.partition, index, self.delay,
+                      self.kwargs),
+            )
+            worker.start()
+            # the parent closes its copy of the worker's end, so that it sees EOF on its
+            # own end if the worker exits
+            child_conn.close()
+            conns.append(parent_conn)
+            workers.append(worker)
+
+        try:
+            results = self._synchronize(until, conns, workers)
+        except BaseException:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+            raise
+        finally:
+            for conn in conns:
+                conn.close()
+            for worker in workers:
+                worker.join()
+
+        return results
+
+    def _synchronize(self, until: float, conns: list, workers: list) -> list:
+        """Runs the partitions in the worker processes window by window, exchanging the
+        packets that cross partitions, and returns their results."""
+        pending = [[] for __ in range(self.n_partitions)]
+        next_events = [0.0] * self.n_partitions
+
+        while True:
+            start = min(
+                min(next_events),
+                min((arrival[0] for arrivals in pending for arrival in arrivals),
+                    default=math.inf),
+            )
+            if start >= until:
+                break
+
+            end = min(start + self.lookahead, until)
+            for index, (conn, arrivals) in enumerate(zip(conns, pending)):
+                _send(conn, index, workers[index], ("run", end, arrivals))
+            self.windows += 1
+
+            pending = [[] for __ in range(self.n_partitions)]
+            for index, conn in enumerate(conns):
+                outbox, next_events[index] = _receive(conn, index, workers[index])
+                self.packets_exchanged += len(outbox)
+                for dest, time, priority, node, packet in outbox:
+                    pending[dest].append((time, priority, node, packet))
+
+        for index, conn in enumerate(conns):
+            _send(conn, index, workers[index], ("finish", until, None))
+        return [_receive(conn, index, workers[index]) for index, conn in enumerate(conns)]
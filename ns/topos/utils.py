@@ -1,4 +1,5 @@
-from random import sample
+import random
+
 import networkx as nx
 
 from ns.flow.flow import Flow
@@ -12,6 +13,165 @@ def read_topo(fname):
         print(f"{fname} is not GraphML")
 
 
+class ShortestPaths:
+    """A routing index of all the shortest paths between the nodes of a graph, which returns
+    the paths in the same order as `nx.all_shortest_paths()`, so that the i-th shortest path
+    between two nodes can be found without listing all of them.
+
+    The breadth-first search tree of predecessors from each source node, along with the
+    number of shortest paths from the source to each node, is computed once and cached. A
+    node with a single neighbor, such as a host, shares the search tree of its neighbor
+    (its top-of-rack switch), as all of its paths go through the neighbor. Finding a path
+    then only costs a walk back from the destination to the source.
+
+    Parameters
+    ----------
+    G: networkx.Graph
+        the topology, which must not change after the routing index has been created.
+    """
+
+    def __init__(self, G):
+        self.G = G
+        self.trees = {}
+
+    def tree(self, src) -> tuple:
+        """Returns the predecessors of each node on the shortest paths from the source, and
+        the number of shortest paths from the source to each node."""
+        if src not in self.trees:
+            # a breadth-first search in the same order as nx.predecessor()
+            pred = {src: []}
+            n_paths = {src: 1}
+            level = {src: 0}
+            this_level = [src]
+            while this_level:
+                next_level = []
+                for v in this_level:
+                    next_hop = level[v] + 1
+                    for w in self.G[v]:
+                        if w not in level:
+                            level[w] = next_hop
+                            pred[w] = [v]
+                            n_paths[w] = n_paths[v]
+                            next_level.append(w)
+                        elif level[w] == next_hop:
+                            pred[w].append(v)
+                            n_paths[w] += n_paths[v]
+                this_level = next_level
+            self.trees[src] = (pred, n_paths)
+        return self.trees[src]
+
+    def reduce(self, src, dst) -> tuple:
+        """Returns the node whose search tree is used for the paths from the source to
+        the destination, and the nodes to be prepended to these paths."""
+        if src != dst and len(self.G[src]) == 1:
+            return next(iter(self.G[src])), [src]
+        return src, []
+
+    def count(self, src, dst) -> int:
+        """Returns the number of shortest paths from the source to the destination."""
+        root, __ = self.reduce(src, dst)
+        pred, n_paths = self.tree(root)
+        if dst not in pred:
+            raise nx.NetworkXNoPath(f"Target {dst} cannot be reached from {src}")
+        return n_paths[dst]
+
+    def path(self, src, dst, index: int) -> list:
+        """Returns the shortest path from the source to the destination at the given index,
+        in the order of `nx.all_shortest_paths()`."""
+        root, head = self.reduce(src, dst)
+        pred, n_paths = self.tree(root)
+        if dst not in pred:
+            raise nx.NetworkXNoPath(f"Target {dst} cannot be reached from {src}")
+
+        # the paths are listed in the order of the predecessors, from the destination back
+        path = [dst]
+        node = dst
+        while node != root:
+            for p in pred[node]:
+                if index < n_paths[p]:
+                    break
+                index -= n_paths[p]
+            path.append(p)
+            node = p
+        path.reverse()
+
+        return head + path
+
+
+class FatTreePaths(ShortestPaths):
+    """A routing index of all the shortest paths between the hosts of a fat-tree built by
+    `ns.topos.fattree.build()`, computed from the numbering of its nodes without searching
+    the graph. It returns the same paths, in the same order, as `ShortestPaths`, and falls
+    back to it for switches.
+
+    A path between hosts under different edge switches in the same pod goes through one of
+    the k/2 aggregation switches of the pod, and a path between hosts in different pods goes
+    through one of the k/2 aggregation switches of the source pod, one of the k/2 core
+    switches connected to it, and the aggregation switch of the destination pod connected to
+    that core switch.
+
+    Parameters
+    ----------
+    G: networkx.Graph
+        the fat-tree, which must not change after the routing index has been created.
+    k: int
+        the number of ports of the switches in the fat-tree.
+    """
+
+    def __init__(self, G, k: int):
+        super().__init__(G)
+        self.half = k // 2
+        self.n_core = self.half**2
+        self.first_host = self.n_core + k * k
+
+    def edge_switch(self, host) -> tuple:
+        """Returns the pod, the edge switch, and its index in the pod, of a host."""
+        ordinal = (host - self.first_host) // self.half
+        pod, index = divmod(ordinal, self.half)
+        return pod, self.n_core + pod * 2 * self.half + self.half + index, index
+
+    def count(self, src, dst) -> int:
+        if src < self.first_host or dst < self.first_host:
+            return super().count(src, dst)
+
+        src_pod, src_edge, __ = self.edge_switch(src)
+        dst_pod, dst_edge, __ = self.edge_switch(dst)
+        if src == dst or src_edge == dst_edge:
+            return 1
+        if src_pod == dst_pod:
+            return self.half
+        return self.half**2
+
+    def path(self, src, dst, index: int) -> list:
+        if src < self.first_host or dst < self.first_host:
+            return super().path(src, dst, index)
+
+        src_pod, src_edge, __ = self.edge_switch(src)
+        dst_pod, dst_edge, __ = self.edge_switch(dst)
+        if src == dst:
+            return [src]
+        if src_edge == dst_edge:
+            return [src, src_edge, dst]
+
+        if src_pod == dst_pod:
+            aggr = self.n_core + src_pod * 2 * self.half + index
+            return [src, src_edge, aggr, dst_edge, dst]
+
+        aggr_index, core_index = divmod(index, self.half)
+        core = aggr_index * self.half + core_index
+        src_aggr = self.n_core + src_pod * 2 * self.half + aggr_index
+        dst_aggr = self.n_core + dst_pod * 2 * self.half + aggr_index
+        return [src, src_edge, src_aggr, core, dst_aggr, dst_edge, dst]
+
+
+def shortest_paths(G) -> ShortestPaths:
+    """Returns a routing index of all the shortest paths in a graph: a FatTreePaths for a
+    fat-tree built by `ns.topos.fattree.build()`, and a ShortestPaths otherwise."""
+    if G.graph.get("fat_tree_k") is not None:
+        return FatTreePaths(G, G.graph["fat_tree_k"])
+    return ShortestPaths(G)
+
+
 def generate_flows(
     G,
     hosts,
@@ -21,10 +181,22 @@ def generate_flows(
     finish_time=None,
     arrival_dist=None,
     size_dist=None,
+    rng=None,
+    paths=None,
 ):
+    # a random.Random instance, such as one from SeedTree.python_rng(), can be
+    # used so that the flows do not depend on the global random state
+    if rng is None:
+        rng = random
+
+    # a routing index can be shared across calls on the same topology
+    if paths is None:
+        paths = shortest_paths(G)
+
+    hosts = sorted(hosts)
     all_flows = dict()
     for flow_id in range(nflows):
-        src, dst = sample(sorted(hosts), 2)
+        src, dst = rng.sample(hosts, 2)
         all_flows[flow_id] = Flow(
             flow_id,
             src,
@@ -37,7 +209,9 @@ def generate_flows(
         )
         # all_flows[flow_id].path = sample(
         #    list(nx.all_simple_paths(G, src, dst, cutoff=nx.diameter(G))), 1
-        all_flows[flow_id].path = sample(list(nx.all_shortest_paths(G, src, dst)), 1)[0]
+        # choosing a path uniformly at random in the same way as
+        # rng.sample(list(nx.all_shortest_paths(G, src, dst)), 1)[0]
+        all_flows[flow_id].path = paths.path(src, dst, rng.randrange(paths.count(src, dst)))
     return all_flows
 
 
@@ -56,18 +230,60 @@ def generate_fib(G, all_flows, tcp=False):
         node["flow_to_nexthop"] = dict()
 
     for f in all_flows:
-        flow = all_flows[f]
-        path = list(zip(flow.path, flow.path[1:]))
-        for seg in path:
-            a, z = seg
-            G.nodes[a]["flow_to_port"][flow.fid] = G.nodes[a]["nexthop_to_port"][z]
-            G.nodes[a]["flow_to_nexthop"][flow.fid] = z
-
-            # generates reverse fib for TCPSink sending Ack to TCPSource
-            if tcp:
-                G.nodes[z]["flow_to_port"][flow.fid + 10000] = G.nodes[z][
-                    "nexthop_to_port"
-                ][a]
-                G.nodes[z]["flow_to_nexthop"][flow.fid + 10000] = a
+        add_flow_to_fib(G, all_flows[f], tcp=tcp)
 
     return G
+
+
+def add_flow_to_fib(G, flow, tcp=False):
+    """Adds the forwarding entries of a new flow along its path to a topology whose
+    forwarding information has been generated by generate_fib(), at a cost proportional
+    to the length of the path."""
+    path = list(zip(flow.path, flow.path[1:]))
+    for seg in path:
+        a, z = seg
+        G.nodes[a]["flow_to_port"][flow.fid] = G.nodes[a]["nexthop_to_port"][z]
+        G.nodes[a]["flow_to_nexthop"][flow.fid] = z
+
+        # generates reverse fib for TCPSink sending Ack to TCPSource
+        if tcp:
+            G.nodes[z]["flow_to_port"][flow.fid + 10000] = G.nodes[z][
+                "nexthop_to_port"
+            ][a]
+            G.nodes[z]["flow_to_nexthop"][flow.fid + 10000] = a
+
+
+def generate_ecmp(G, hosts, paths=None):
+    """Generates the groups of equal-cost output ports of every node towards each destination
+    host, for forwarding with an `ECMPDemux`, using the port numbers generated by
+    generate_fib(). Rather than a group for every host, each node has a group for each node
+    that a host is attached to (its top-of-rack switch, if it has a single neighbor), and
+    the node that a host is attached to has a group for the host itself. Returns the
+    dictionary mapping each host to the node that it is attached to."""
+    if paths is None:
+        paths = ShortestPaths(G)
+
+    attachments = dict()
+    for host in sorted(hosts):
+        attachments[host] = next(iter(G[host])) if len(G[host]) == 1 else host
+
+    for n in G.nodes():
+        G.nodes[n]["ecmp_groups"] = dict()
+
+    # identical groups, such as those of all the hosts, share the same tuple of ports
+    shared = dict()
+    for attachment in sorted(set(attachments.values())):
+        # the predecessors of a node on the shortest paths from the attachment are its
+        # next hops on the shortest paths towards the attachment
+        pred, __ = paths.tree(attachment)
+        for n, next_hops in pred.items():
+            if next_hops:
+                ports = tuple(sorted(G.nodes[n]["nexthop_to_port"][nh] for nh in next_hops))
+                G.nodes[n]["ecmp_groups"][attachment] = shared.setdefault(ports, ports)
+
+    for host, attachment in attachments.items():
+        if attachment != host:
+            G.nodes[attachment]["ecmp_groups"][host] = (
+                G.nodes[attachment]["nexthop_to_port"][host], )
+
+    return attachments
@@ -0,0 +1,79 @@
+"""
+Implements a time-varying background load on a link, for hybrid simulations in which a few flows
+of interest are simulated packet by packet, while the background traffic sharing their links is
+modeled as fluid rates that consume part of the capacity of each link.
+
+The background load is a piecewise-constant profile of rates (in bits per second) over time,
+such as the load of a link recorded by a `FluidSimulation`. An element that serves packets at a
+given rate, such as a `Port` or a `WFQServer`, is left with the remaining capacity at any time:
+the transmission of a packet completes when the remaining capacity integrated from the start of
+its transmission reaches its size. The background traffic therefore costs no events at all, and
+only the packets of the foreground flows are simulated.
+
+The background load is not affected by the foreground flows: it always receives its rate first,
+and the foreground packets are served at the capacity left over.
+"""
+import bisect
+import math
+
+
+class BackgroundLoad:
+    """A piecewise-constant profile of the rate of the background traffic on a link.
+
+    Parameters
+    ----------
+    profile: list or float
+        a list of (time, rate) pairs in increasing order of times, where each rate (in bits
+        per second) applies from its time until the next time in the list. The rate is 0
+        before the first time. A single number is a constant rate at all times.
+    """
+
+    def __init__(self, profile):
+        if isinstance(profile, (int, float)):
+            profile = [(0.0, profile)]
+
+        self.times = [time for time, __ in profile]
+        self.rates = [rate for __, rate in profile]
+        if any(t1 < t0 for t0, t1 in zip(self.times, self.times[1:])):
+            raise ValueError("The times in a background load profile must be increasing.")
+
+    def segment(self, time: float) -> tuple:
+        """Returns the rate of the background traffic at the given time, and the time at
+        which the rate changes next."""
+        i = bisect.bisect_right(self.times, time)
+        end = self.times[i] if i < len(self.times) else math.inf
+        rate = self.rates[i - 1] if i > 0 else 0.0
+        return rate, end
+
+    def rate(self, time: float) -> float:
+        """Returns the rate of the background traffic at the given time."""
+        return self.segment(time)[0]
+
+    def service(self, start: float, end: float, capacity: float) -> float:
+        """Returns the number of bits that a link with the given capacity can serve, besides
+        the background traffic, from the start time to the end time."""
+        bits = 0.0
+        time = start
+        while time < end:
+            rate, change = self.segment(time)
+            until = min(change, end)
+            bits += max(capacity - rate, 0.0) * (until - time)
+            time = until
+        return bits
+
+    def transmission_time(self, start: float, bits: float, capacity: float) -> float:
+        """Returns the time taken to serve the given number of bits, starting at the start
+        time, by a link with the given capacity besides the background traffic. It is
+        infinite if the background traffic uses the entire capacity from then on."""
+        time = start
+        while True:
+            rate, change = self.segment(time)
+            available = capacity - rate
+            if available > 0:
+                duration = bits / available
+                if time + duration <= change:
+                    return time + duration - start
+                bits -= available * (change - time)
+            if change == math.inf:
+                return math.inf
+            time = change
@@ -2,8 +2,8 @@
 Implements a delayer that adds arbitrary delay within [0, D] without changing the order
 of packets arrived.
 """
+import random
 from copy import copy
-from random import uniform
 
 import simpy
 
@@ -16,11 +16,15 @@ class Delayer:
             The simulation environment.
         max_delay:
             The maximum amount of delay.
+        rng: random number generator (or None)
+            The generator used to draw the delays, such as a `BlockRNG` obtained
+            from a `SeedTree`; the global `random` module is used if None.
     """
 
-    def __init__(self, env, max_delay):
+    def __init__(self, env, max_delay, rng=None):
         self.env = env
         self.max_delay = max_delay
+        self.rng = random if rng is None else rng
         self.waiting_queue = []
         self.queue = simpy.Store(env)
         self.out = None
@@ -40,7 +44,7 @@ class Delayer:
     def put(self, packet):
         """Sends a packet to this element."""
         new_packet = copy(packet)
-        delay_time = uniform(0, self.max_delay)
+        delay_time = self.rng.uniform(0, self.max_delay)
         self.waiting_queue.append((new_packet, self.env.now + delay_time))
         self.queue.put(True)
 
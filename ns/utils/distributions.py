@@ -0,0 +1,141 @@
+"""
+Implements distribution objects for the inter-arrival times and the sizes of packets, which can
+be used anywhere a no-parameter function returning successive samples is accepted, such as
+the `arrival_dist` and `size_dist` arguments of a `DistPacketGenerator`.
+
+Rather than making one Python call into the random number generator for each packet, as a
+`functools.partial` of `random.expovariate` does, each distribution object draws its samples
+from a NumPy generator in vectorized blocks, and then hands them out one at a time from a
+buffer. The generator can be obtained from `SeedTree.generator()`, so that each distribution has
+its own independent and reproducible stream.
+"""
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class BlockDistribution(ABC):
+    """The base class of all distributions that draw their samples in blocks. Calling
+    the object returns the next sample.
+
+    Parameters
+    ----------
+    generator: numpy.random.Generator, int, or None
+        the NumPy generator to draw samples from, such as one returned by
+        `SeedTree.generator()`, or a seed for a new generator. If None, a generator seeded
+        with fresh entropy from the operating system is used.
+    block_size: int
+        the number of samples drawn from the generator at a time.
+    """
+
+    def __init__(self, generator=None, block_size: int = 4096):
+        if isinstance(generator, np.random.Generator):
+            self.generator = generator
+        else:
+            self.generator = np.random.default_rng(generator)
+        self.block_size = block_size
+        self.samples = iter(())
+
+    @abstractmethod
+    def sample(self, n: int) -> np.ndarray:
+        """Returns an array of n new samples."""
+
+    def __call__(self):
+        try:
+            return next(self.samples)
+        except StopIteration:
+            self.samples = iter(self.sample(self.block_size).tolist())
+            return next(self.samples)
+
+
+class Exponential(BlockDistribution):
+    """The exponential distribution with a given rate (such as packets per second), which
+    has a mean of 1 / rate, in the same way as `random.expovariate(rate)`."""
+
+    def __init__(self, rate: float, generator=None, block_size: int = 4096):
+        super().__init__(generator, block_size)
+        self.rate = rate
+
+    def sample(self, n: int) -> np.ndarray:
+        return self.generator.exponential(1.0 / self.rate, n)
+
+
+class Constant(BlockDistribution):
+    """A distribution that always returns the same value."""
+
+    def __init__(self, value):
+        super().__init__(block_size=1)
+        self.value = value
+
+    def sample(self, n: int) -> np.ndarray:
+        return np.full(n, self.value)
+
+    def __call__(self):
+        return self.value
+
+
+class Pareto(BlockDistribution):
+    """The Pareto distribution with a shape parameter alpha and a scale (minimum value)
+    xmin, supported on [xmin, +inf). Its mean is infinite if alpha <= 1, and is
+    alpha * xmin / (alpha - 1) otherwise."""
+
+    def __init__(self,
+                 alpha: float,
+                 xmin: float = 1.0,
+                 generator=None,
+                 block_size: int = 4096):
+        super().__init__(generator, block_size)
+        self.alpha = alpha
+        self.xmin = xmin
+
+    def sample(self, n: int) -> np.ndarray:
+        # NumPy draws from the Lomax (Pareto II) distribution, which is shifted by one
+        return self.xmin * (self.generator.pareto(self.alpha, n) + 1.0)
+
+
+class LogNormal(BlockDistribution):
+    """The log-normal distribution, whose natural logarithm has a mean of mu and a standard
+    deviation of sigma, in the same way as `random.lognormvariate(mu, sigma)`."""
+
+    def __init__(self,
+                 mu: float,
+                 sigma: float,
+                 generator=None,
+                 block_size: int = 4096):
+        super().__init__(generator, block_size)
+        self.mu = mu
+        self.sigma = sigma
+
+    def sample(self, n: int) -> np.ndarray:
+        return self.generator.lognormal(self.mu, self.sigma, n)
+
+
+class EmpiricalCDF(BlockDistribution):
+    """An empirical distribution over a set of values, such as the packet sizes seen in a
+    trace, sampled by inverting its cumulative distribution function.
+
+    Parameters
+    ----------
+    values: list
+        the values, in increasing order if `cdf` is provided.
+    cdf: list (or None)
+        the cumulative probability of each value, which is non-decreasing and ends at 1.
+        If None, each value is equally likely; repeated values then have proportionally
+        larger probabilities, so the values can simply be a list of observations.
+    """
+
+    def __init__(self, values, cdf=None, generator=None, block_size: int = 4096):
+        super().__init__(generator, block_size)
+        self.values = np.asarray(values)
+
+        if cdf is None:
+            self.cdf = np.arange(1, len(self.values) + 1) / len(self.values)
+        else:
+            if len(cdf) != len(self.values):
+                raise ValueError("The values and the CDF must be of the same length.")
+            self.cdf = np.asarray(cdf, dtype=float)
+
+    def sample(self, n: int) -> np.ndarray:
+        indices = np.searchsorted(self.cdf, self.generator.random(n), side="right")
+        # guards against a CDF that ends slightly below 1 due to rounding errors
+        return self.values[np.minimum(indices, len(self.values) - 1)]
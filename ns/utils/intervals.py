@@ -0,0 +1,102 @@
+"""
+Implements a set of disjoint intervals of sequence numbers, such as the out-of-order data
+held in the receive buffer of a TCP sink, or the ranges of data that have been selectively
+acknowledged at a TCP sender.
+
+Each interval is half-open, covering the sequence numbers from its start up to (but not
+including) its end, and intervals that overlap or touch are merged as they are added. The
+starts and the ends of the intervals are kept in two sorted lists, so that the intervals
+overlapping a new one are found by binary search in O(log n) time.
+"""
+from bisect import bisect_left, bisect_right
+
+
+class IntervalSet:
+    """A set of disjoint, half-open intervals [start, end), sorted by their starts."""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        # the total length of the intervals
+        self.length = 0
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def add(self, start: int, end: int) -> tuple:
+        """Adds an interval, merging it with the intervals that it overlaps or touches, and
+        returns the merged interval that contains it."""
+        # the intervals from i to j - 1 overlap or touch the new interval
+        i = bisect_left(self.ends, start)
+        j = bisect_right(self.starts, end, i)
+
+        if i == j:
+            self.starts.insert(i, start)
+            self.ends.insert(i, end)
+        else:
+            self.length -= sum(self.ends[i:j]) - sum(self.starts[i:j])
+            start = min(start, self.starts[i])
+            end = max(end, self.ends[j - 1])
+            self.starts[i:j] = [start]
+            self.ends[i:j] = [end]
+        self.length += end - start
+
+        return start, end
+
+    def first(self) -> tuple:
+        """Returns the interval with the lowest start, or None if the set is empty."""
+        if not self.starts:
+            return None
+        return self.starts[0], self.ends[0]
+
+    def pop_first(self) -> tuple:
+        """Removes and returns the interval with the lowest start."""
+        start, end = self.starts.pop(0), self.ends.pop(0)
+        self.length -= end - start
+        return start, end
+
+    def remove_below(self, point: int):
+        """Removes the parts of the intervals that lie below a given point."""
+        while self.starts and self.ends[0] <= point:
+            self.pop_first()
+        if self.starts and self.starts[0] < point:
+            self.length -= point - self.starts[0]
+            self.starts[0] = point
+
+    def covers(self, start: int, end: int) -> bool:
+        """Returns True if the interval [start, end) is entirely contained in the set."""
+        i = bisect_right(self.starts, start) - 1
+        return i >= 0 and self.ends[i] >= end
+
+    def gaps(self, start: int, end: int) -> list:
+        """Returns the parts of the interval [start, end) that are not in the set, in the
+        order of their starts."""
+        gaps = []
+        i = bisect_right(self.ends, start)
+        while start < end:
+            if i < len(self.starts) and self.starts[i] <= start:
+                start = self.ends[i]
+                i += 1
+                continue
+            gap_end = min(end, self.starts[i]) if i < len(self.starts) else end
+            gaps.append((start, gap_end))
+            start = gap_end
+        return gaps
+
+    def blocks(self, latest: tuple = None, limit: int = 3) -> list:
+        """Returns up to `limit` intervals as selective acknowledgment (SACK) blocks. As in
+        RFC 2018, the first block is the interval containing the most recently received
+        data, if any, followed by the other intervals in the order of their starts."""
+        blocks = [] if latest is None else [latest]
+        for interval in self:
+            if len(blocks) >= limit:
+                break
+            if interval != latest:
+                blocks.append(interval)
+        return blocks
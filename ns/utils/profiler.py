@@ -0,0 +1,279 @@
+"""
+Implements opt-in profiling hooks that show which network elements dominate the running time of
+a simulation. Each instrumented element, such as a port, a scheduler, a shaper, a wire, a packet
+generator, or a packet sink, has its `put()` function and the generator of its simpy process
+(if any) wrapped, so that the number of packets it receives, the number of simpy events that
+resume its process, and the wall-clock time spent in both are counted for the element.
+
+The generators of the simpy processes are wrapped as the processes are started, by a
+`ProfiledEnvironment`, which is a `simpy.Environment` that hands each new process to its
+profiler. The profiler should therefore be created before the elements to be profiled, with a
+`ProfiledEnvironment`; with a plain `simpy.Environment`, only the `put()` functions of the
+elements are profiled.
+
+Since an element usually calls the `put()` function of its downstream element directly, the
+time measured for each element excludes the time spent in the other instrumented elements that
+it calls. The statistics are also aggregated by the type of the elements, and the elements that
+took the most time can be reported at the end of each call to `env.run()`.
+
+Elements that are not instrumented are left untouched, so that the profiling hooks cost nothing
+at all unless they are used.
+"""
+import time
+import weakref
+
+import simpy
+
+
+class ElementStats:
+    """The statistics of an instrumented element, or of all the elements of a type."""
+
+    def __init__(self, name: str, kind: str):
+        self.name = name
+        self.kind = kind
+        self.packets = 0
+        self.events = 0
+        self.elements = 1
+        # the wall-clock time spent in the element itself, in nanoseconds
+        self.time = 0
+
+    def merge(self, other):
+        """Merges the statistics of another element into this one."""
+        self.packets += other.packets
+        self.events += other.events
+        self.elements += other.elements
+        self.time += other.time
+
+
+class ProfiledGenerator:
+    """Wraps the generator of a simpy process, so that each time the process is resumed by
+    an event, the event is counted and the time taken by the process is measured. Until the
+    element that started the process is instrumented, its statistics are None, and the
+    generator is resumed as usual."""
+
+    def __init__(self, generator, stats: ElementStats, profiler):
+        self.generator = generator
+        self.stats = stats
+        self.profiler = profiler
+
+    @property
+    def __name__(self):
+        """The name of the wrapped generator, used by simpy to name the process."""
+        return self.generator.__name__
+
+    @property
+    def gi_frame(self):
+        """The frame of the wrapped generator, used by simpy to describe errors."""
+        return self.generator.gi_frame
+
+    def send(self, value):
+        if self.stats is None:
+            return self.generator.send(value)
+        self.stats.events += 1
+        return self.profiler.timed(self.stats, self.generator.send, value)
+
+    def throw(self, *args):
+        if self.stats is None:
+            return self.generator.throw(*args)
+        self.stats.events += 1
+        return self.profiler.timed(self.stats, self.generator.throw, *args)
+
+    def close(self):
+        return self.generator.close()
+
+
+class ProfiledEnvironment(simpy.Environment):
+    """A simulation environment whose processes can be profiled by a `Profiler`: the generator
+    of each process is wrapped as the process is started, and the wall-clock time of each call
+    to `run()` is measured. It behaves as a `simpy.Environment` until a `Profiler` is created
+    for it.
+
+    Parameters
+    ----------
+    initial_time: float
+        the initial simulation time.
+    """
+
+    def __init__(self, initial_time=0):
+        super().__init__(initial_time)
+        self.profiler = None
+
+    def process(self, generator):
+        """Starts a process, whose generator is profiled once the element that started it
+        has been instrumented."""
+        if self.profiler is None:
+            return super().process(generator)
+
+        profiled = ProfiledGenerator(generator, None, self.profiler)
+        process = super().process(profiled)
+        self.profiler.generators[process] = profiled
+        return process
+
+    def run(self, until=None):
+        """Runs the simulation, and prints the profiler's report at the end if requested."""
+        if self.profiler is None:
+            return super().run(until)
+
+        start = time.perf_counter_ns()
+        result = super().run(until)
+        self.profiler.run_time += time.perf_counter_ns() - start
+        if self.profiler.report_runs:
+            self.profiler.report()
+        return result
+
+
+class Profiler:
+    """Counts the packets, the events, and the wall-clock time of the instrumented elements.
+
+    Parameters
+    ----------
+    env: simpy.Environment
+        the simulation environment; the processes of the elements are only profiled if it is
+        a `ProfiledEnvironment`, and the elements are created after the profiler.
+    top: int
+        the number of elements that took the most time to be reported.
+    report: bool
+        if True, the report is printed at the end of each call to `env.run()` on a
+        `ProfiledEnvironment`.
+    """
+
+    def __init__(self, env, top: int = 10, report: bool = False):
+        self.env = env
+        self.top = top
+        self.report_runs = report
+        self.stats = {}
+        # the instrumented elements that are currently running, with the times at which
+        # they started and the time spent in the other instrumented elements they called
+        self.stack = []
+        self.run_time = 0
+        # the wrapped generators of the processes started since the profiler was created
+        self.generators = weakref.WeakKeyDictionary()
+
+        if isinstance(env, ProfiledEnvironment):
+            env.profiler = self
+
+    def timed(self, stats: ElementStats, function, *args, **kwargs):
+        """Calls a function on behalf of an element, and adds the time spent in it, except
+        for the time spent in other instrumented elements, to the element's statistics."""
+        frame = [time.perf_counter_ns(), 0]
+        self.stack.append(frame)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter_ns() - frame[0]
+            self.stack.pop()
+            stats.time += elapsed - frame[1]
+            if self.stack:
+                self.stack[-1][1] += elapsed
+
+    def wrap_put(self, element, stats: ElementStats):
+        """Wraps the `put()` function of an element, so that the packets it receives and the
+        time spent in it are counted."""
+        put = element.put
+
+        def profiled_put(*args, **kwargs):
+            stats.packets += 1
+            return self.timed(stats, put, *args, **kwargs)
+
+        element.put = profiled_put
+
+    def instrument(self, element, name: str = None):
+        """Instruments an element, as well as the ports, the schedulers, and the demultiplexer
+        of a switch, so that they are profiled. Each element is only instrumented once."""
+        if id(element) in self.stats:
+            return
+
+        kind = type(element).__name__
+        if name is None:
+            element_id = getattr(element, "element_id", None)
+            if element_id is None or element_id == "":
+                element_id = len(self.stats)
+            name = f"{kind} {element_id}"
+
+        stats = ElementStats(name, kind)
+        self.stats[id(element)] = stats
+
+        if hasattr(element, "put"):
+            self.wrap_put(element, stats)
+
+        # an element that compiles itself, such as a `FIBDemux`, rebinds its `put()` to the
+        # compiled method, which is wrapped again
+        compile_element = getattr(element, "compile", None)
+        if callable(compile_element) and hasattr(element, "put"):
+
+            def profiled_compile(*args, **kwargs):
+                result = compile_element(*args, **kwargs)
+                self.wrap_put(element, stats)
+                return result
+
+            element.compile = profiled_compile
+
+        # the generator of the element's process, if it was started by a ProfiledEnvironment
+        action = getattr(element, "action", None)
+        if isinstance(action, simpy.Process) and action in self.generators:
+            self.generators[action].stats = stats
+
+        # the components of a switch, including the ports that it creates lazily
+        create_port = getattr(element, "create_port", None)
+        if create_port is not None:
+
+            def profiled_create_port(port_number, out=None):
+                egress_port, port = create_port(port_number, out)
+                self.instrument(egress_port, f"{name} egress_ports {port_number}")
+                self.instrument(port, f"{name} ports {port_number}")
+                return egress_port, port
+
+            element.create_port = profiled_create_port
+            for port in getattr(element, "ports", None) or []:
+                if hasattr(port, "create"):
+                    port.create = profiled_create_port
+
+        for attribute in ("egress_ports", "ports"):
+            for port_number, port in enumerate(getattr(element, attribute, None) or []):
+                # the placeholders of ports that have not been created yet are skipped,
+                # as the ports are instrumented under the same names once created
+                if port is not None and not hasattr(port, "create"):
+                    self.instrument(port, f"{name} {attribute} {port_number}")
+        demux = getattr(element, "demux", None)
+        if demux is not None:
+            self.instrument(demux, f"{name} demux")
+
+    def instrument_all(self, elements):
+        """Instruments all the elements in an iterable."""
+        for element in elements:
+            self.instrument(element)
+
+    def by_type(self) -> dict:
+        """Returns the statistics aggregated by the types of the elements."""
+        kinds = {}
+        for stats in self.stats.values():
+            if stats.kind not in kinds:
+                kinds[stats.kind] = ElementStats(stats.kind, stats.kind)
+                kinds[stats.kind].elements = 0
+            kinds[stats.kind].merge(stats)
+        return kinds
+
+    def hot_elements(self, top: int = None) -> list:
+        """Returns the statistics of the elements that took the most time."""
+        top = self.top if top is None else top
+        return sorted(self.stats.values(), key=lambda s: s.time, reverse=True)[:top]
+
+    def report(self, top: int = None):
+        """Prints the elements that took the most time, and the statistics of each type."""
+        total = sum(stats.time for stats in self.stats.values())
+        if self.run_time > 0:
+            print(f"Profile: {total / 1e9:.3f} seconds in instrumented elements, out of "
+                  f"{self.run_time / 1e9:.3f} seconds in env.run().")
+
+        def row(stats):
+            share = stats.time / total * 100 if total > 0 else 0.0
+            return (f"{stats.time / 1e6:10.2f} {share:6.1f}% {stats.packets:10d} "
+                    f"{stats.events:10d}  {stats.name}")
+
+        print(f"{'Time (ms)':>10s} {'Share':>7s} {'Packets':>10s} {'Events':>10s}  Element")
+        for stats in self.hot_elements(top):
+            print(row(stats))
+
+        print(f"{'Time (ms)':>10s} {'Share':>7s} {'Packets':>10s} {'Events':>10s}  Type")
+        for stats in sorted(self.by_type().values(), key=lambda s: s.time, reverse=True):
+            print(row(stats) + f" ({stats.elements} elements)")
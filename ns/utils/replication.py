@@ -0,0 +1,136 @@
+"""
+Implements a ReplicationRunner, which runs many independent replications of a simulation
+scenario, over a grid of parameter values, in parallel across a pool of worker processes.
+
+A scenario is a (module-level, so that it can be sent to worker processes) function that
+receives a fresh `simpy.Environment` and the parameter values of a point in the grid as
+keyword arguments, builds the network, and returns a function without arguments that
+collects the results --- typically statistics read from sinks and monitors --- once the
+simulation has finished. The collected results are sent back to the parent process, and
+therefore need to be picklable: plain lists, dictionaries and numbers, or the streaming
+statistics in `ns.utils.stats`, rather than the network elements themselves.
+
+Each replication is seeded with its own independent stream, spawned from a single root seed
+using NumPy's `SeedSequence`, so that runs are reproducible regardless of the number of
+worker processes. The same streams are reused across the points of the parameter grid
+(common random numbers), which reduces the variance of comparisons between points. A
+scenario can also ask for a `SeedTree` rooted at the seed of its replication, so that each
+element is given its own stream.
+"""
+import itertools
+import os
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import simpy
+
+from ns.utils.rng import SeedTree
+
+Replication = namedtuple("Replication", ["params", "index", "seed", "result"])
+
+
+def _run_replication(task):
+    """Runs a single replication of a scenario; used by the worker processes."""
+    scenario, params, index, seed_seq, until, seed_tree = task
+
+    # the elements in ns.py draw their random variates from the global generators
+    seed = int(seed_seq.generate_state(1)[0])
+    random.seed(seed)
+    np.random.seed(seed)
+
+    env = simpy.Environment()
+    if seed_tree:
+        collect = scenario(env, seed_tree=SeedTree(seed_seq), **params)
+    else:
+        collect = scenario(env, **params)
+    env.run(until=until)
+
+    return Replication(params, index, seed, collect())
+
+
+class ReplicationRunner:
+    """Runs replications of a simulation scenario over a grid of parameter values.
+
+    Parameters
+    ----------
+    scenario: function
+        a module-level function that takes a `simpy.Environment` and the parameter values
+        as keyword arguments, builds the simulation, and returns a function with no
+        arguments that returns the (picklable) results after the simulation has run.
+    until: float
+        the simulation time at which each replication stops.
+    params: dict
+        a dictionary mapping each parameter name to a list of values; every combination
+        of the values will be simulated. Use a list with a single value for a fixed
+        parameter.
+    replications: int
+        the number of independent replications for each combination of parameter values.
+    seed: int
+        the root seed from which the random number streams of all replications are spawned.
+    processes: int (or None)
+        the number of worker processes, defaulting to the number of CPU cores. With a single
+        process, all replications are run one after another in the current process.
+    seed_tree: bool
+        if True, the scenario is also passed a `SeedTree` rooted at the seed of the
+        replication, as the `seed_tree` keyword argument.
+    """
+
+    def __init__(
+        self,
+        scenario,
+        until: float,
+        params: dict = None,
+        replications: int = 1,
+        seed: int = 0,
+        processes: int = None,
+        seed_tree: bool = False,
+    ):
+        self.scenario = scenario
+        self.until = until
+        self.params = params if params is not None else {}
+        self.replications = replications
+        self.seed = seed
+        self.processes = processes if processes is not None else os.cpu_count()
+        self.seed_tree = seed_tree
+
+    def grid(self) -> list:
+        """Returns all the combinations of parameter values, as a list of dictionaries."""
+        names = list(self.params.keys())
+        return [
+            dict(zip(names, values))
+            for values in itertools.product(*(self.params[name] for name in names))
+        ]
+
+    def tasks(self) -> list:
+        """Returns the list of replications to be run, each with its own seed sequence."""
+        seed_seqs = np.random.SeedSequence(self.seed).spawn(self.replications)
+
+        return [
+            (self.scenario, params, index, seed_seq, self.until, self.seed_tree)
+            for params in self.grid()
+            for index, seed_seq in enumerate(seed_seqs)
+        ]
+
+    def run(self) -> list:
+        """Runs all the replications, and returns a list of `Replication` records
+        (the parameter values, the replication index, the seed and the collected
+        result), in the order of the parameter grid and then of the replication index."""
+        tasks = self.tasks()
+
+        if self.processes == 1:
+            return [_run_replication(task) for task in tasks]
+
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            return list(executor.map(_run_replication, tasks))
+
+    @staticmethod
+    def results_by_params(replications: list) -> dict:
+        """Groups the results of a list of `Replication` records by their parameter
+        values, mapping a tuple of sorted (name, value) pairs to a list of results."""
+        results = {}
+        for replication in replications:
+            key = tuple(sorted(replication.params.items()))
+            results.setdefault(key, []).append(replication.result)
+        return results
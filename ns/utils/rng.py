@@ -0,0 +1,120 @@
+"""
+Implements a seed tree that hands each network element its own independent stream of random
+numbers, and a generator that draws these random numbers in pre-generated blocks.
+
+Network elements that make random decisions (such as a `Wire` with a loss distribution, a
+`REDPort`, a `RandomDemux`, or a `Delayer`) draw from the global `random` module by default,
+so the random numbers seen by each element depend on the order in which all elements in the
+simulation draw them. With a `SeedTree`, each element is instead given a generator derived
+from a root seed and a key that identifies the element (for example, its name, or a tuple
+such as `("wire", 3)`), using NumPy's `SeedSequence`. The stream of each element therefore
+depends only on the root seed and its key --- not on the construction order of the elements,
+or on the other elements in the same simulation --- and the same network can be split across
+processes reproducibly.
+
+Drawing one variate at a time from a NumPy generator is slower than from the `random` module,
+because of the overhead of each call. A `BlockRNG` draws variates from its generator in
+vectorized blocks, and then hands them out one at a time.
+"""
+import hashlib
+import random
+
+import numpy as np
+
+
+def _spawn_key(key) -> tuple:
+    """Converts a key (an integer, a string, or a tuple of these) to a tuple of
+    non-negative integers, used as the spawn key of a `SeedSequence`."""
+    if not isinstance(key, tuple):
+        key = (key, )
+
+    words = []
+    for part in key:
+        if isinstance(part, int) and part >= 0:
+            words.append(part)
+        else:
+            digest = hashlib.blake2b(repr(part).encode(), digest_size=8).digest()
+            words.append(int.from_bytes(digest, "little"))
+    return tuple(words)
+
+
+class BlockRNG:
+    """A random number generator that draws uniform variates from a NumPy generator in
+    blocks, and provides the subset of the interface of the `random` module used by the
+    network elements: `random()`, `uniform()`, and `randint()`.
+
+    Parameters
+    ----------
+    generator: numpy.random.Generator
+        the NumPy generator from which the blocks of variates are drawn.
+    block_size: int
+        the number of variates drawn from the generator at a time.
+    """
+
+    def __init__(self, generator, block_size: int = 4096):
+        self.generator = generator
+        self.block_size = block_size
+        self.variates = iter(())
+
+    def random(self) -> float:
+        """Returns the next uniform variate in [0.0, 1.0)."""
+        try:
+            return next(self.variates)
+        except StopIteration:
+            self.variates = iter(self.generator.random(self.block_size).tolist())
+            return next(self.variates)
+
+    def uniform(self, a: float, b: float) -> float:
+        """Returns a uniform variate in [a, b)."""
+        return a + (b - a) * self.random()
+
+    def randint(self, a: int, b: int) -> int:
+        """Returns a random integer in [a, b], including both end points."""
+        return a + int(self.random() * (b - a + 1))
+
+
+class SeedTree:
+    """A tree of independent random number streams, derived from a root seed and keyed
+    by the elements that use them.
+
+    Parameters
+    ----------
+    seed: int, or numpy.random.SeedSequence (or None)
+        the root seed of the tree; if None, fresh entropy from the operating system is used.
+    block_size: int
+        the number of variates drawn at a time by the generators returned by `rng()`.
+    """
+
+    def __init__(self, seed=None, block_size: int = 4096):
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_seq = seed
+        else:
+            self.seed_seq = np.random.SeedSequence(seed)
+        self.block_size = block_size
+
+    def seed_sequence(self, key) -> np.random.SeedSequence:
+        """Returns the seed sequence of the stream identified by a key."""
+        return np.random.SeedSequence(
+            self.seed_seq.entropy,
+            spawn_key=self.seed_seq.spawn_key + _spawn_key(key),
+        )
+
+    def subtree(self, key):
+        """Returns the subtree identified by a key, such as the tree for all the elements
+        in a switch, from which the streams of these elements can be derived in turn."""
+        return SeedTree(self.seed_sequence(key), self.block_size)
+
+    def generator(self, key) -> np.random.Generator:
+        """Returns a NumPy generator for the stream identified by a key."""
+        return np.random.Generator(np.random.PCG64(self.seed_sequence(key)))
+
+    def rng(self, key) -> BlockRNG:
+        """Returns a `BlockRNG` for the stream identified by a key, which can be passed as
+        the `rng` argument of the network elements."""
+        return BlockRNG(self.generator(key), self.block_size)
+
+    def python_rng(self, key) -> random.Random:
+        """Returns a `random.Random` instance seeded from the stream identified by a key,
+        for code that needs the full interface of the `random` module (such as
+        `sample()`)."""
+        return random.Random(int(self.seed_sequence(key).generate_state(1, np.uint64)[0]))
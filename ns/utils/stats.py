@@ -0,0 +1,256 @@
+"""
+Implements streaming summary statistics that use a bounded amount of memory, and that can
+be merged with one another: running moments using Welford's algorithm, a DDSketch for
+quantiles with a relative accuracy guarantee, and a windowed rate estimator.
+
+References:
+
+B. P. Welford, "Note on a Method for Calculating Corrected Sums of Squares and Products,"
+Technometrics, vol. 4, no. 3, pp. 419-420, 1962.
+
+T. F. Chan, G. H. Golub, R. J. LeVeque, "Updating Formulae and a Pairwise Algorithm for
+Computing Sample Variances," Technical Report STAN-CS-79-773, Stanford University, 1979.
+
+C. Masson, J. E. Rim, H. K. Lee, "DDSketch: A Fast and Fully-Mergeable Quantile Sketch
+with Relative-Error Guarantees," Proc. VLDB Endowment, vol. 12, no. 12, 2019.
+"""
+import copy
+import math
+
+
+class RunningStats:
+    """Maintains the count, mean, variance, minimum and maximum of a stream of values
+    in O(1) memory, using Welford's algorithm."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        """Adds a new value to the stream."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def variance(self) -> float:
+        """The (unbiased) sample variance of the values seen so far."""
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+    @property
+    def std(self) -> float:
+        """The sample standard deviation of the values seen so far."""
+        return math.sqrt(self.variance)
+
+    def merge(self, other):
+        """Merges the statistics of another stream into this one."""
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+
+class DDSketch:
+    """A quantile sketch that guarantees a relative error of at most `relative_accuracy`
+    for each quantile estimate, by counting values in logarithmically-sized buckets.
+
+    Parameters
+    ----------
+    relative_accuracy: float
+        The relative accuracy guaranteed for the quantile estimates.
+    max_buckets: int
+        The maximum number of buckets; when exceeded, the lowest buckets are collapsed
+        together, so that only the accuracy of the lowest quantiles is affected.
+    min_value: float
+        Values smaller than this (including zero) are counted in a separate bucket,
+        and are estimated as zero.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        max_buckets: int = 2048,
+        min_value: float = 1e-9,
+    ):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("The relative accuracy must be between 0 and 1.")
+
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.min_value = min_value
+
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        """Adds a new value to the sketch."""
+        self.count += 1
+
+        if value < self.min_value:
+            self.zero_count += 1
+            return
+
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+        if len(self.buckets) > self.max_buckets:
+            self.collapse()
+
+    def collapse(self):
+        """Merges the lowest buckets together until the number of buckets is within bounds."""
+        indices = sorted(self.buckets)
+        excess = len(indices) - self.max_buckets
+        if excess <= 0:
+            return
+
+        lowest = indices[excess]
+        for index in indices[:excess]:
+            self.buckets[lowest] += self.buckets.pop(index)
+
+    def quantile(self, q: float) -> float:
+        """Returns an estimate of the q-quantile (0 <= q <= 1) of the values seen so far."""
+        if not 0 <= q <= 1:
+            raise ValueError("The quantile must be between 0 and 1.")
+
+        if self.count == 0:
+            return math.nan
+
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+
+        seen = self.zero_count
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2.0 * self.gamma**index / (self.gamma + 1)
+
+        return 2.0 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def merge(self, other):
+        """Merges another sketch, with the same relative accuracy, into this one."""
+        if other.gamma != self.gamma:
+            raise ValueError("Only sketches with the same relative accuracy can be merged.")
+
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.collapse()
+
+
+class WindowedRate:
+    """Measures the rate of a stream of amounts (such as bytes received) over consecutive,
+    non-overlapping time windows, as well as over the entire stream.
+
+    Parameters
+    ----------
+    window: float
+        The length of each measurement window.
+    """
+
+    def __init__(self, window: float = 1.0):
+        self.window = window
+        self.window_start = None
+        self.window_total = 0.0
+        # the rate measured over the last complete window
+        self.last_rate = 0.0
+
+        self.total = 0.0
+        self.first_time = None
+        self.first_amount = 0.0
+        self.last_time = None
+
+    def expire(self, now):
+        """Completes the windows that have ended by time `now`."""
+        if self.window_start is None or now - self.window_start < self.window:
+            return
+
+        # windows with no arrivals have a zero rate
+        elapsed_windows = (now - self.window_start) // self.window
+        if elapsed_windows == 1:
+            self.last_rate = self.window_total / self.window
+        else:
+            self.last_rate = 0.0
+        self.window_start += elapsed_windows * self.window
+        self.window_total = 0.0
+
+    def add(self, now, amount):
+        """Adds an amount observed at time `now`."""
+        if self.first_time is None:
+            self.first_time = now
+            self.first_amount = amount
+            self.window_start = now
+
+        self.expire(now)
+
+        self.window_total += amount
+        self.total += amount
+        self.last_time = now
+
+    def rate(self, now=None) -> float:
+        """The rate over the last complete window. If the current time `now` is provided,
+        the windows that have ended since the last observation are completed first, so that
+        the rate decays to zero after an idle period."""
+        if now is not None:
+            self.expire(now)
+        return self.last_rate
+
+    def average_rate(self) -> float:
+        """The average rate between the first and the last observations. The amount observed
+        first is excluded, as it arrived at the start of the interval."""
+        if self.first_time is None or self.last_time == self.first_time:
+            return 0.0
+        return (self.total - self.first_amount) / (self.last_time - self.first_time)
+
+    def merge(self, other):
+        """Merges the totals of another stream into this one. The two streams are assumed
+        to be concurrent: the current windows of both are first brought up to the later of
+        the two, and the amounts in the current windows, as well as the rates over the last
+        complete windows, are then added up."""
+        if other.first_time is None:
+            return
+
+        if self.first_time is None:
+            self.first_time = other.first_time
+            self.first_amount = other.first_amount
+            self.last_time = other.last_time
+            self.window_start = other.window_start
+        else:
+            if other.first_time < self.first_time:
+                self.first_time = other.first_time
+                self.first_amount = other.first_amount
+            self.last_time = max(self.last_time, other.last_time)
+
+            # the other stream is copied, so that completing its windows leaves it intact
+            other = copy.copy(other)
+            window_start = max(self.window_start, other.window_start)
+            self.expire(window_start)
+            other.expire(window_start)
+            self.window_start = window_start
+
+        self.total += other.total
+        self.window_total += other.window_total
+        self.last_rate += other.last_rate
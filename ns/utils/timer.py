@@ -2,6 +2,7 @@
 Implements a simple timer that expires after a timeout value. When it expires,
 it runs a provided callback function.
 """
+import heapq
 
 
 class Timer:
@@ -57,3 +58,161 @@ class Timer:
             self.timer_started = start_time
 
         self.timer_expiry = self.timer_started + revised_rto
+
+
+class WheelTimer:
+    """A timer managed by a `TimerWheel`, with the same interface as `Timer`. It has no simpy
+    process of its own, so that starting, stopping, and restarting it take constant time, and
+    a stopped timer does not generate any events.
+
+    Parameters
+    ----------
+    wheel: TimerWheel
+        The timer wheel that manages this timer.
+    timer_id: int
+        The id of this timer, used as a parameter when the timeout
+        callback function is called.
+    timeout_callback:
+        The callback function that runs when the timer expires.
+    rto: float
+        The timeout value.
+    """
+
+    __slots__ = ("wheel", "timer_id", "timeout_callback", "rto", "timer_started",
+                 "timer_expiry", "stopped", "slot")
+
+    def __init__(self, wheel, timer_id, timeout_callback, rto):
+        self.wheel = wheel
+        self.timer_id = timer_id
+        self.timeout_callback = timeout_callback
+        self.rto = rto
+        self.timer_started = wheel.env.now
+        self.timer_expiry = self.timer_started + rto
+        self.stopped = False
+        self.slot = None
+        wheel.add(self)
+
+    def stop(self):
+        """Stopping the timer."""
+        self.stopped = True
+        self.wheel.remove(self)
+
+    def restart(self, revised_rto, start_time=0):
+        """Restarting the timer with a new rto value."""
+        self.rto = revised_rto
+
+        if start_time == 0:
+            self.timer_started = self.wheel.env.now
+        else:
+            self.timer_started = start_time
+
+        self.timer_expiry = self.timer_started + revised_rto
+        self.stopped = False
+        self.wheel.remove(self)
+        self.wheel.add(self)
+
+
+class TimerWheel:
+    """A hashed timer wheel that manages many timers, such as the retransmission timers of
+    TCP connections, without a simpy process for each timer.
+
+    The time is divided into slots of a fixed granularity, and each timer is kept in the slot
+    that its expiry time falls into, so that it is added to or removed from its slot in
+    constant time. Since the slots are kept in a dictionary keyed by their absolute indices,
+    timers of any duration share a single level, with no overflow levels to cascade.
+
+    The wheel schedules a simpy event only when a timer is added that expires before all the
+    events that are already pending, and each timer still expires at its exact expiry time.
+    Stopping a timer only removes it from its slot, and restarting it with a later expiry
+    time, as with the retransmission timers of acknowledged segments, schedules nothing, so
+    that neither costs an event of its own. Since a simpy event cannot be cancelled, an event
+    whose timers have all been stopped still fires, but it only schedules the next event, if
+    any timers are left, rather than an event for each slot that has been emptied.
+
+    Parameters
+    ----------
+    env: simpy.Environment
+        The simulation environment.
+    granularity: float
+        The width of each slot, such as the clock granularity of the retransmission timers
+        (G in RFC 6298).
+    """
+
+    def __init__(self, env, granularity: float = 0.01):
+        self.env = env
+        self.granularity = granularity
+        # the timers in each slot, keyed by the index of the slot; a slot is removed as
+        # soon as it has no timers left
+        self.slots = {}
+        # a heap of the indices of the slots, which may include slots that have been removed
+        self.slot_heap = []
+        # a heap of the times of the events that have been scheduled and not fired yet
+        self.wakeups = []
+
+    def timer(self, timer_id, timeout_callback, rto) -> WheelTimer:
+        """Starts a new timer that expires after `rto`, and runs `timeout_callback(timer_id)`
+        when it expires."""
+        return WheelTimer(self, timer_id, timeout_callback, rto)
+
+    def add(self, timer: WheelTimer):
+        """Adds a timer to the slot of its expiry time."""
+        slot = int(timer.timer_expiry // self.granularity)
+        timer.slot = slot
+
+        timers = self.slots.get(slot)
+        if timers is None:
+            timers = self.slots[slot] = {}
+            heapq.heappush(self.slot_heap, slot)
+        timers[timer] = None
+
+        if not self.wakeups or timer.timer_expiry < self.wakeups[0]:
+            self.schedule(timer.timer_expiry)
+
+    def remove(self, timer: WheelTimer):
+        """Removes a timer from its slot, if it has not expired."""
+        timers = self.slots.get(timer.slot)
+        if timers is not None and timer in timers:
+            del timers[timer]
+            if not timers:
+                del self.slots[timer.slot]
+        timer.slot = None
+
+    def schedule(self, wakeup: float):
+        """Schedules an event that expires the timers at a given time."""
+        heapq.heappush(self.wakeups, wakeup)
+        event = self.env.timeout(max(0.0, wakeup - self.env.now), wakeup)
+        event.callbacks.append(self.expire)
+
+    def first_slot(self):
+        """Returns the index of the earliest slot that has timers, or None if there is none."""
+        slot_heap = self.slot_heap
+        while slot_heap and slot_heap[0] not in self.slots:
+            heapq.heappop(slot_heap)
+        return slot_heap[0] if slot_heap else None
+
+    def expire(self, event):
+        """Runs the callbacks of the timers that have expired by the time of an event, and
+        schedules another event for the earliest of the remaining timers, unless one is
+        already pending."""
+        now = event.value
+        heapq.heappop(self.wakeups)
+
+        slot = self.first_slot()
+        while slot is not None and slot * self.granularity <= now:
+            timers = self.slots[slot]
+            for timer in [t for t in timers if t.timer_expiry <= now]:
+                # a callback may have stopped or restarted the timers that follow it
+                if timer.slot == slot and timer.timer_expiry <= now:
+                    self.remove(timer)
+                    timer.timeout_callback(timer.timer_id)
+
+            if slot in self.slots and self.slots[slot] is timers:
+                # the timers left in the slot expire later than now, as do all the timers
+                # in the later slots
+                break
+            slot = self.first_slot()
+
+        if slot is not None:
+            wakeup = min(timer.timer_expiry for timer in self.slots[slot])
+            if not self.wakeups or wakeup < self.wakeups[0]:
+                self.schedule(wakeup)